@@ -0,0 +1,335 @@
+# -*- coding: UTF-8 -*-
+# Language change scripts for NVDA
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Language detection of untagged text, used by langChangeRate.
+The text is first segmented by script (Latin, Cyrillic, Greek, Arabic, Han, etc.). Most scripts give the language
+directly, unless the default language is written in the same script; the segments in Latin script are split into
+sentences, and the language of each sentence long enough is detected with a character trigram model.
+The model is built from the short sample texts of TRAINING_TEXTS when the first detector is created; only the
+MAX_NGRAMS most frequent trigrams of each language are kept, so that its size is bounded.
+This module does not depend on NVDA; its name begins with "_" so that it is not loaded as a global plugin.
+"""
+
+import bisect
+from collections import Counter
+import math
+import re
+
+# Number of trigrams kept for each language.
+MAX_NGRAMS = 300
+# Minimum number of trigrams of a sentence to detect its language.
+MIN_TRIGRAMS = 15
+# Minimum average difference of log-probability per trigram between the detected language and the default one.
+MIN_MARGIN = 0.2
+
+# (first code point, last code point, script)
+SCRIPT_RANGES = sorted([
+	(0x41, 0x5A, 'Latin'),
+	(0x61, 0x7A, 'Latin'),
+	(0xC0, 0xD6, 'Latin'),
+	(0xD8, 0xF6, 'Latin'),
+	(0xF8, 0x24F, 'Latin'),
+	(0x1E00, 0x1EFF, 'Latin'),
+	(0x370, 0x3FF, 'Greek'),
+	(0x1F00, 0x1FFF, 'Greek'),
+	(0x400, 0x52F, 'Cyrillic'),
+	(0x590, 0x5FF, 'Hebrew'),
+	(0x600, 0x6FF, 'Arabic'),
+	(0x750, 0x77F, 'Arabic'),
+	(0x900, 0x97F, 'Devanagari'),
+	(0xE00, 0xE7F, 'Thai'),
+	(0x1100, 0x11FF, 'Hangul'),
+	(0x3130, 0x318F, 'Hangul'),
+	(0xAC00, 0xD7AF, 'Hangul'),
+	(0x3040, 0x30FF, 'Kana'),
+	(0x3400, 0x4DBF, 'Han'),
+	(0x4E00, 0x9FFF, 'Han'),
+])
+_RANGE_STARTS = [r[0] for r in SCRIPT_RANGES]
+
+# Language of the scripts used by a single language (or mostly).
+SCRIPT_LANGUAGES = {
+	'Greek': 'el',
+	'Cyrillic': 'ru',
+	'Hebrew': 'he',
+	'Arabic': 'ar',
+	'Devanagari': 'hi',
+	'Thai': 'th',
+	'Hangul': 'ko',
+	'Kana': 'ja',
+	'Han': 'zh',
+}
+
+# Script of the other languages written in one of the scripts of SCRIPT_LANGUAGES; text in the script of the default
+# language is not annotated.
+LANGUAGE_SCRIPTS = {
+	'be': 'Cyrillic',
+	'bg': 'Cyrillic',
+	'kk': 'Cyrillic',
+	'ky': 'Cyrillic',
+	'mk': 'Cyrillic',
+	'mn': 'Cyrillic',
+	'sr': 'Cyrillic',
+	'tg': 'Cyrillic',
+	'uk': 'Cyrillic',
+	'yi': 'Hebrew',
+	'ckb': 'Arabic',
+	'fa': 'Arabic',
+	'ps': 'Arabic',
+	'sd': 'Arabic',
+	'ug': 'Arabic',
+	'ur': 'Arabic',
+	'mr': 'Devanagari',
+	'ne': 'Devanagari',
+	'sa': 'Devanagari',
+	**{language: script for script, language in SCRIPT_LANGUAGES.items()},
+}
+
+# Sample texts used to build the trigram model of the languages written in Latin script.
+TRAINING_TEXTS = {
+	'en': (
+		"The weather was cold this morning, so we stayed at home and read the newspaper. "
+		"Please let me know when you have finished the report, because I need it for the meeting with the team. "
+		"There is a small shop at the end of the street where they sell fresh bread and coffee. "
+		"She told me that the train would be late, but it arrived on time and we were able to catch the bus. "
+		"If you want to change the settings, open the menu and choose the option that you need. "
+		"Thank you for your message; I will answer the questions as soon as possible. "
+		"The children are playing in the garden while their parents are cooking dinner in the kitchen. "
+		"It is important to save your work often, otherwise you could lose everything that you have written. "
+		"We should think about the future of our city and what we can do to make it better for everyone. "
+		"Which book would you recommend to someone who has never read anything by this author?"
+	),
+	'fr': (
+		"Il faisait froid ce matin, alors nous sommes restés à la maison pour lire le journal. "
+		"Merci de me prévenir quand vous aurez terminé le rapport, car j'en ai besoin pour la réunion avec l'équipe. "
+		"Il y a une petite boutique au bout de la rue où l'on vend du pain frais et du café. "
+		"Elle m'a dit que le train serait en retard, mais il est arrivé à l'heure et nous avons pu prendre le bus. "
+		"Si vous voulez modifier les paramètres, ouvrez le menu et choisissez l'option dont vous avez besoin. "
+		"Merci pour votre message ; je répondrai aux questions dès que possible. "
+		"Les enfants jouent dans le jardin pendant que leurs parents préparent le dîner dans la cuisine. "
+		"Il est important d'enregistrer souvent votre travail, sinon vous pourriez perdre tout ce que vous avez écrit. "
+		"Nous devrions réfléchir à l'avenir de notre ville et à ce que nous pouvons faire pour l'améliorer. "
+		"Quel livre conseilleriez-vous à quelqu'un qui n'a jamais rien lu de cet auteur ?"
+	),
+	'de': (
+		"Heute Morgen war es kalt, deshalb sind wir zu Hause geblieben und haben die Zeitung gelesen. "
+		"Bitte sagen Sie mir Bescheid, wenn Sie den Bericht fertig haben, denn ich brauche ihn für die Besprechung. "
+		"Am Ende der Straße gibt es einen kleinen Laden, in dem man frisches Brot und Kaffee kaufen kann. "
+		"Sie hat mir gesagt, dass der Zug Verspätung haben würde, aber er ist pünktlich angekommen. "
+		"Wenn Sie die Einstellungen ändern möchten, öffnen Sie das Menü und wählen Sie die gewünschte Option. "
+		"Vielen Dank für Ihre Nachricht; ich werde die Fragen so schnell wie möglich beantworten. "
+		"Die Kinder spielen im Garten, während ihre Eltern in der Küche das Abendessen kochen. "
+		"Es ist wichtig, die Arbeit oft zu speichern, sonst könnte man alles verlieren, was man geschrieben hat. "
+		"Wir sollten über die Zukunft unserer Stadt nachdenken und darüber, was wir für alle verbessern können. "
+		"Welches Buch würden Sie jemandem empfehlen, der noch nie etwas von diesem Autor gelesen hat?"
+	),
+	'es': (
+		"Esta mañana hacía frío, así que nos quedamos en casa y leímos el periódico. "
+		"Por favor, avíseme cuando haya terminado el informe, porque lo necesito para la reunión con el equipo. "
+		"Hay una pequeña tienda al final de la calle donde venden pan fresco y café. "
+		"Me dijo que el tren llegaría tarde, pero llegó a tiempo y pudimos tomar el autobús. "
+		"Si quiere cambiar la configuración, abra el menú y elija la opción que necesita. "
+		"Gracias por su mensaje; responderé a las preguntas lo antes posible. "
+		"Los niños juegan en el jardín mientras sus padres preparan la cena en la cocina. "
+		"Es importante guardar el trabajo con frecuencia, de lo contrario podría perder todo lo que ha escrito. "
+		"Deberíamos pensar en el futuro de nuestra ciudad y en lo que podemos hacer para mejorarla. "
+		"¿Qué libro le recomendaría a alguien que nunca ha leído nada de este autor?"
+	),
+	'it': (
+		"Stamattina faceva freddo, quindi siamo rimasti a casa a leggere il giornale. "
+		"Per favore, mi faccia sapere quando ha finito la relazione, perché mi serve per la riunione con la squadra. "
+		"C'è un piccolo negozio in fondo alla strada dove vendono pane fresco e caffè. "
+		"Mi ha detto che il treno sarebbe arrivato in ritardo, ma è arrivato in orario e abbiamo preso l'autobus. "
+		"Se vuole modificare le impostazioni, apra il menu e scelga l'opzione di cui ha bisogno. "
+		"Grazie per il suo messaggio; risponderò alle domande il prima possibile. "
+		"I bambini giocano in giardino mentre i genitori preparano la cena in cucina. "
+		"È importante salvare spesso il proprio lavoro, altrimenti si potrebbe perdere tutto quello che si è scritto. "
+		"Dovremmo pensare al futuro della nostra città e a cosa possiamo fare per renderla migliore per tutti. "
+		"Quale libro consiglierebbe a qualcuno che non ha mai letto niente di questo autore?"
+	),
+	'pt': (
+		"Esta manhã estava frio, por isso ficámos em casa a ler o jornal. "
+		"Por favor, avise-me quando terminar o relatório, porque preciso dele para a reunião com a equipa. "
+		"Há uma pequena loja no fim da rua onde vendem pão fresco e café. "
+		"Ela disse-me que o comboio ia chegar atrasado, mas chegou a horas e conseguimos apanhar o autocarro. "
+		"Se quiser alterar as configurações, abra o menu e escolha a opção de que precisa. "
+		"Obrigado pela sua mensagem; vou responder às perguntas o mais depressa possível. "
+		"As crianças brincam no jardim enquanto os pais preparam o jantar na cozinha. "
+		"É importante guardar o trabalho com frequência, senão pode perder tudo o que escreveu. "
+		"Devíamos pensar no futuro da nossa cidade e no que podemos fazer para a tornar melhor para todos. "
+		"Que livro recomendaria a alguém que nunca leu nada deste autor?"
+	),
+	'nl': (
+		"Vanochtend was het koud, dus we zijn thuis gebleven en hebben de krant gelezen. "
+		"Laat het me alsjeblieft weten wanneer je het verslag af hebt, want ik heb het nodig voor de vergadering. "
+		"Aan het einde van de straat is een kleine winkel waar ze vers brood en koffie verkopen. "
+		"Ze zei dat de trein vertraging zou hebben, maar hij kwam op tijd aan en we konden de bus nemen. "
+		"Als je de instellingen wilt wijzigen, open dan het menu en kies de optie die je nodig hebt. "
+		"Bedankt voor je bericht; ik zal de vragen zo snel mogelijk beantwoorden. "
+		"De kinderen spelen in de tuin terwijl hun ouders het avondeten in de keuken klaarmaken. "
+		"Het is belangrijk om je werk vaak op te slaan, anders zou je alles kunnen verliezen wat je hebt geschreven. "
+		"We moeten nadenken over de toekomst van onze stad en wat we kunnen doen om die voor iedereen te verbeteren. "
+		"Welk boek zou je aanraden aan iemand die nog nooit iets van deze schrijver heeft gelezen?"
+	),
+}
+
+RE_WORD = re.compile(r"[^\W\d_]+")
+# A sentence, with its final punctuation and the following blanks.
+RE_SENTENCE = re.compile(r'[^.!?;:]*(?:[.!?;:]+\s*|$)')
+
+
+def getScript(char):
+	cp = ord(char)
+	i = bisect.bisect_right(_RANGE_STARTS, cp) - 1
+	if i >= 0 and cp <= SCRIPT_RANGES[i][1]:
+		return SCRIPT_RANGES[i][2]
+	return None
+
+
+def iterTrigrams(text):
+	"""Yield the character trigrams of the lowercased words of text, each word being surrounded by spaces."""
+	for word in RE_WORD.findall(text.lower()):
+		word = f' {word} '
+		for i in range(len(word) - 2):
+			yield word[i:i + 3]
+
+
+class TrigramModel:
+	"""Log-probabilities of the most frequent trigrams of each language."""
+
+	def __init__(self, texts=TRAINING_TEXTS, maxNgrams=MAX_NGRAMS):
+		self.languages = sorted(texts)
+		probabilities = []
+		floors = []
+		for language in self.languages:
+			counts = Counter(iterTrigrams(texts[language]))
+			total = sum(counts.values())
+			probabilities.append({
+				trigram: math.log(count / total)
+				for trigram, count in counts.most_common(maxNgrams)
+			})
+			# Log-probability of the trigrams which are not in the model of this language.
+			floors.append(math.log(0.5 / total))
+		#: Trigram -> tuple of the log-probabilities for each language
+		self.table = {}
+		for trigram in set().union(*probabilities):
+			self.table[trigram] = tuple(
+				p.get(trigram, floor) for p, floor in zip(probabilities, floors)
+			)
+
+	def scores(self, text):
+		"""Return the number of known trigrams of text and the list of the scores of each language."""
+		scores = [0.0] * len(self.languages)
+		n = 0
+		table = self.table
+		for trigram in iterTrigrams(text):
+			row = table.get(trigram)
+			if row is None:
+				continue
+			n += 1
+			scores = [s + p for s, p in zip(scores, row)]
+		return n, scores
+
+
+_model = None
+
+
+def getModel():
+	global _model
+	if _model is None:
+		_model = TrigramModel()
+	return _model
+
+
+class LanguageDetector:
+
+	def __init__(self, model=None):
+		self.model = model or getModel()
+		self._languageIndexes = {language: i for i, language in enumerate(self.model.languages)}
+
+	def detectLatin(self, text, defaultRoot):
+		"""Return the language of a text in Latin script, or None if it is the default one or cannot be detected."""
+		defaultIndex = self._languageIndexes.get(defaultRoot)
+		if defaultIndex is None:
+			# Without a model for the default language, the detection would not be reliable.
+			return None
+		n, scores = self.model.scores(text)
+		if n < MIN_TRIGRAMS:
+			return None
+		best = max(range(len(scores)), key=scores.__getitem__)
+		if best == defaultIndex or scores[best] - scores[defaultIndex] < MIN_MARGIN * n:
+			return None
+		return self.model.languages[best]
+
+	def segment(self, text, defaultLanguage):
+		"""Split text in (language, text) segments, where language is None for the default language."""
+		if not text:
+			return [(None, text)]
+		defaultRoot = defaultLanguage.split('_')[0].lower()
+		defaultScript = LANGUAGE_SCRIPTS.get(defaultRoot)
+		# Split by script; characters which are not letters (blanks, digits, punctuation) go with the preceding
+		# letters, or with the first ones at the beginning of the text.
+		runs = []
+		curScript = None
+		start = 0
+		for i, char in enumerate(text):
+			if not char.isalpha():
+				continue
+			script = getScript(char) or 'Other'
+			if script != curScript:
+				if curScript is not None:
+					runs.append((curScript, text[start:i]))
+					start = i
+				curScript = script
+		runs.append((curScript, text[start:]))
+		hasKana = any(script == 'Kana' for script, runText in runs)
+		segments = []
+		for script, runText in runs:
+			if script == 'Latin':
+				for sentence in RE_SENTENCE.findall(runText):
+					self._addSegment(segments, self.detectLatin(sentence, defaultRoot), sentence)
+			else:
+				language = SCRIPT_LANGUAGES.get(script)
+				if script == 'Han' and (hasKana or defaultRoot == 'ja'):
+					language = 'ja'
+				elif script == defaultScript:
+					# E.g. Cyrillic text with Ukrainian as default language.
+					language = None
+				if language == defaultRoot:
+					language = None
+				self._addSegment(segments, language, runText)
+		return segments
+
+	@staticmethod
+	def _addSegment(segments, language, text):
+		if not text:
+			return
+		if segments and segments[-1][0] == language:
+			segments[-1] = (language, segments[-1][1] + text)
+		else:
+			segments.append((language, text))
+
+	def annotate(self, speechSequence, defaultLanguage, langChangeCommandClass):
+		"""Return a copy of speechSequence where language change commands are inserted before the strings, or parts
+		of strings, in a language other than defaultLanguage; returns speechSequence itself if there is none.
+		"""
+		newSeq = None
+		curLanguage = None
+		for index, item in enumerate(speechSequence):
+			if type(item) is not str:
+				if newSeq is not None:
+					newSeq.append(item)
+				continue
+			segments = self.segment(item, defaultLanguage)
+			if newSeq is None:
+				if len(segments) == 1 and segments[0][0] is None:
+					continue
+				newSeq = list(speechSequence[:index])
+			for language, text in segments:
+				if language != curLanguage:
+					newSeq.append(langChangeCommandClass(language))
+					curLanguage = language
+				newSeq.append(text)
+		return speechSequence if newSeq is None else newSeq
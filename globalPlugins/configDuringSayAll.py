@@ -4,15 +4,33 @@
 # This file is covered by the GNU General Public License.
 
 # This script allows to change some configuration parameters without interrupting say all.
-# Currently, the following commands are supported:
+# By default, the following commands are supported:
 # - synth settings ring commands
 # - change punctuation level
 # - report CLDR
+# Other scripts, e.g. of app modules or of other add-ons, can be added to the "scripts" configuration value, a comma
+# separated list of script names without "script_", optionally preceded by their class name and module, e.g.:
+# `config.conf['configDuringSayAll']['scripts'] += ", AppModule.volumeUp, appModules.foobar2000.AppModule.volumeDown"`
+#
+# By default, say all is cancelled by these commands and then restarted from the cursor, which causes a short silence
+# and sometimes repeats a chunk of text. In gap-free mode, the commands of the synth settings ring changing the rate,
+# the pitch or the volume do not cancel say all; the synth applies the new value to the next chunks of text, and the
+# new value is announced at once, say all being paused meanwhile. It requires NVDA 2021.1 or later. To enable it,
+# type in the console:
+# `config.conf['configDuringSayAll']['gapFree'] = True`
 
+import functools
 import globalPluginHandler
 import ui
 import scriptHandler
 import config
+import globalVars
+import keyboardHandler
+try:
+	from speech.priorities import Spri
+except ImportError:
+	# Older versions such as NVDA 2019.2.1, where gap-free mode is not supported
+	Spri = None
 try:
 	from speech.sayAll import SayAllHandler as sayAllHandler
 except ImportError:  # Python 3: raises ModuleNotFoundError (a subclass from ImportError); Python 2: raises ImportError
@@ -20,16 +38,129 @@ except ImportError:  # Python 3: raises ModuleNotFoundError (a subclass from Imp
 from globalCommands import commands, GlobalCommands
 from types import MethodType
 
+# The scripts which do not interrupt say all by default
+DEFAULT_SCRIPTS = ", ".join([
+	"GlobalCommands.increaseSynthSetting",
+	"GlobalCommands.decreaseSynthSetting",
+	"GlobalCommands.nextSynthSetting",
+	"GlobalCommands.previousSynthSetting",
+	"GlobalCommands.cycleSpeechSymbolLevel",
+	# Not present in older NVDA versions such as NVDA 2019.2.1
+	"GlobalCommands.toggleReportCLDR",
+])
+
+# The synth settings which can be changed in gap-free mode.
+GAP_FREE_SETTINGS = frozenset(['rate', 'pitch', 'volume'])
+
+
+class ScriptRegistry:
+	"""The scripts which do not interrupt say all, whatever its mode, parsed from the "scripts" configuration value.
+	The names of a script are looked up in a set the first time it is met; the result is then cached by function.
+	"""
+
+	def __init__(self, text):
+		self.text = text
+		self.names = frozenset(name.strip() for name in text.split(',') if name.strip())
+		#: Script function -> whether it is registered
+		self._cache = {}
+
+	def isRegistered(self, script):
+		func = getattr(script, '__func__', script)
+		try:
+			return self._cache[func]
+		except KeyError:
+			pass
+		except TypeError:
+			# Not hashable, thus not a script function.
+			return False
+		name = getattr(func, '__name__', '')
+		if name.startswith('script_'):
+			name = name[len('script_'):]
+		className = getattr(func, '__qualname__', '').rpartition('.')[0]
+		qualifiedName = f'{className}.{name}'
+		registered = (
+			name in self.names
+			or qualifiedName in self.names
+			or f'{getattr(func, "__module__", "")}.{qualifiedName}' in self.names
+		)
+		self._cache[func] = registered
+		return registered
+
+
+_registry = None
+
+
+def getScriptRegistry():
+	"""Return the ScriptRegistry, built again only if the configuration value has changed."""
+	global _registry
+	text = config.conf['configDuringSayAll']['scripts']
+	if _registry is None or _registry.text != text:
+		_registry = ScriptRegistry(text)
+	return _registry
+
+
+def getRingSettingId():
+	"""Return the id of the current setting of the synth settings ring, e.g. "rate", or None."""
+	ring = globalVars.settingsRing
+	try:
+		return ring.settings[ring._current].setting.id
+	except (AttributeError, IndexError, TypeError):
+		return None
+
+
+def isGapFree(gesture):
+	"""Whether the script of gesture changes a setting of GAP_FREE_SETTINGS during say all in gap-free mode.
+	This is checked for each keyboard gesture, so the cheapest conditions are checked first.
+	"""
+	return (
+		config.conf['configDuringSayAll']['gapFree']
+		and Spri is not None
+		and sayAllHandler.isRunning()
+		and getattr(gesture.script, 'gapFree', False)
+		and getRingSettingId() in GAP_FREE_SETTINGS
+	)
+
+
+def makeGapFreeScript(func):
+	"""Return a wrapper of the script func which, in gap-free mode, speaks the messages of func at once."""
+	@functools.wraps(func)
+	def script(self, gesture):
+		if not isGapFree(gesture):
+			return func(self, gesture)
+		# Speech has not been cancelled: the synth applies the new value to the next chunks by itself, but a message
+		# spoken with the normal priority would only be heard after the text queued by say all.
+		message = ui.message
+		ui.message = functools.partial(message, speechPriority=Spri.NOW)
+		try:
+			func(self, gesture)
+		finally:
+			ui.message = message
+	script.gapFree = True
+	return script
+
+
+# The speechEffectWhenExecuted property of keyboard gestures, replaced while the plugin is running.
+originalSpeechEffect = keyboardHandler.KeyboardInputGesture.speechEffectWhenExecuted
+
+
+def speechEffectWhenExecutedNew(gesture):
+	if isGapFree(gesture):
+		# Say all continues: speech must not be cancelled.
+		return None
+	return originalSpeechEffect.fget(gesture)
+
 
 def willSayAllResumeNew(gesture):
+	if isGapFree(gesture):
+		# Say all has not been interrupted, there is nothing to resume.
+		return False
+	if not (config.conf['keyboard']['allowSkimReadingInSayAll'] and gesture.wasInSayAll):
+		return False
+	script = gesture.script
 	return (
-		config.conf['keyboard']['allowSkimReadingInSayAll']
-		and gesture.wasInSayAll
-		and getattr(
-			gesture.script,
-			'resumeSayAllMode',
-			None
-		) in [sayAllHandler.lastSayAllMode, sayAllHandler.CURSOR_ANY]
+		getScriptRegistry().isRegistered(script)
+		# The scripts which resume say all in NVDA, e.g. the navigation by line with the caret.
+		or getattr(script, 'resumeSayAllMode', None) == sayAllHandler.lastSayAllMode
 	)
 def disableWithPython2(c):
 	import sys
@@ -43,33 +174,27 @@ def disableWithPython2(c):
 @disableWithPython2
 class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
-	# The scripts that should not interrupt during whatever type of SayAll (caret or review)
-	scriptList = [
+	# The scripts which do not interrupt say all in gap-free mode
+	gapFreeScriptList = [
 		GlobalCommands.script_increaseSynthSetting,
 		GlobalCommands.script_decreaseSynthSetting,
-		GlobalCommands.script_nextSynthSetting,
-		GlobalCommands.script_previousSynthSetting,
-		GlobalCommands.script_cycleSpeechSymbolLevel,
 	]
-	try:
-		scriptList.append(GlobalCommands.script_toggleReportCLDR)
-	except AttributeError:
-		# Older NVDA versions such as NVDA 2019.2.1 : script_toggleReportCLDR not present
-		pass
 	
 	def __init__(self):
 		super().__init__()
+		config.conf.spec['configDuringSayAll'] = {
+			'scripts': f'string(default="{DEFAULT_SCRIPTS}")',
+			'gapFree': 'boolean(default=False)',
+		}
 		self.willSayAllResumeOriginal = scriptHandler.willSayAllResume
 		scriptHandler.willSayAllResume = willSayAllResumeNew
-		sayAllHandler.CURSOR_ANY = -1
-		for scr in self.scriptList:
-			func = scr
-			func.resumeSayAllMode = sayAllHandler.CURSOR_ANY
-			setattr(GlobalCommands, func.__name__, func)
+		keyboardHandler.KeyboardInputGesture.speechEffectWhenExecuted = property(speechEffectWhenExecutedNew)
+		for scr in self.gapFreeScriptList:
+			setattr(GlobalCommands, scr.__name__, makeGapFreeScript(scr))
 
 	def terminate(self):
 		super().terminate()
-		del sayAllHandler.CURSOR_ANY
-		for scr in self.scriptList:
-			del scr.resumeSayAllMode
+		for scr in self.gapFreeScriptList:
+			setattr(GlobalCommands, scr.__name__, scr)
+		keyboardHandler.KeyboardInputGesture.speechEffectWhenExecuted = originalSpeechEffect
 		scriptHandler.willSayAllResume = self.willSayAllResumeOriginal
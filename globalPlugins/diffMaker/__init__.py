@@ -0,0 +1,295 @@
+# DiffMaker: provide the result of a diff in a browseable message.
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script providing diff information in browseable message.
+"""
+
+import globalPluginHandler
+import ui
+import addonHandler
+import textInfos
+from scriptHandler import script
+import api
+from logHandler import log
+import gui
+import core
+import speech
+
+import wx
+
+from . import diffBackends
+from . import diffEngine
+from . import diffPager
+from . import diffStore
+from . import diffWorker
+from . import textCapture
+
+# Line to uncomment in case you convert it to add-on.
+# addonHandler.initTranslation()
+
+
+# Maximum length of the reference names displayed in the menu.
+MAX_REFERENCE_NAME_LENGTH = 40
+
+
+def isMultiLine(text):
+	return '\n' in diffEngine.textWithNoTailingNL(text)
+
+def diffText(text1, text2, byCharacter, backend, checkpoint=None):
+	"""Diff two texts and return a DiffPager on the diff with the title of the message to display it.
+	Single lines are diffed word by word (or character by character); multi-line texts are first diffed line by
+	line, the changed lines being then diffed word by word (or character by character) page by page. The word (or
+	character) diff is computed by backend.
+	Only the first page of the diff is computed.
+	This function is run in the worker thread.
+	"""
+	if isMultiLine(text1) or isMultiLine(text2):
+		lines1 = diffEngine.splitLines(text1)
+		lines2 = diffEngine.splitLines(text2)
+		pager = diffPager.DiffPager(
+			lambda checkpoint: diffEngine.lineDiffOpcodes(lines1, lines2, checkpoint),
+			lambda opcode, checkpoint: diffEngine.renderLineHunk(
+				lines1,
+				lines2,
+				opcode,
+				byCharacter,
+				checkpoint,
+				refine=backend.wordDiff,
+			),
+			retainedSize=len(text1) + len(text2),
+		)
+		title = "Character difference between two texts" if byCharacter else "Word difference between two texts"
+	else:
+		diff = backend.wordDiff(text1, text2, byCharacter, checkpoint)
+		pager = diffPager.DiffPager(lambda checkpoint: [diff] if diff else [])
+		title = "Character difference between two lines" if byCharacter else "Word difference between two lines"
+	pager.getPage(0, checkpoint)
+	return pager, title
+
+def makeReferenceName(text):
+	"""Build a name for a reference from the beginning of its first non-blank line."""
+	name = next((line.strip() for line in text.split('\n') if line.strip()), _('blank'))
+	if len(name) > MAX_REFERENCE_NAME_LENGTH:
+		name = name[:MAX_REFERENCE_NAME_LENGTH] + '...'
+	return name
+
+
+class GlobalPlugin(globalPluginHandler.GlobalPlugin):
+	
+	def __init__(self):
+		super().__init__()
+		self.worker = diffWorker.DiffWorker(core.callLater, lambda: ui.message(_('Comparing...')))
+		self.references = diffStore.ReferenceStore()
+		self.diffCache = diffStore.DiffCache()
+		# The key, pager and title of the last diff displayed, and the number of the page displayed.
+		self.lastDiff = None
+		self.curPage = 0
+	
+	def terminate(self):
+		self.worker.cancel()
+		super().terminate()
+	
+	@staticmethod
+	def getCurrentLine():
+		obj = api.getFocusObject()
+		if obj.treeInterceptor is not None:
+			obj = obj.treeInterceptor
+		ti = obj.makeTextInfo(textInfos.POSITION_CARET)
+		ti.collapse()
+		ti.expand(textInfos.UNIT_LINE)
+		return ti.text
+	
+	@staticmethod
+	def getSelectionInfo():
+		"""Return a TextInfo covering the selection, or None if nothing is selected.
+		Its text is only read when needed, in the worker thread, since a selection may be large.
+		"""
+		obj = api.getFocusObject()
+		if obj.treeInterceptor is not None:
+			obj = obj.treeInterceptor
+		try:
+			ti = obj.makeTextInfo(textInfos.POSITION_SELECTION)
+		except (RuntimeError, NotImplementedError):
+			return None
+		if ti.isCollapsed:
+			return None
+		return ti
+	
+	@staticmethod
+	def getDocumentInfo():
+		"""Return a TextInfo covering the whole document, or None if the focused object has no text."""
+		obj = api.getFocusObject()
+		if obj.treeInterceptor is not None:
+			obj = obj.treeInterceptor
+		try:
+			return obj.makeTextInfo(textInfos.POSITION_ALL)
+		except (RuntimeError, NotImplementedError):
+			return None
+	
+	@script(
+		description=_('Displays a menu to save the selection (or the current line if nothing is selected) as reference for the diff, or to diff it with the previously saved reference. While a comparison is running, cancels it.'),
+		gesture = "kb:nvda+alt+d",
+	)
+	def script_diffMaker(self, gesture):	
+		if self.worker.cancel():
+			self.actionMessage(_('Comparison cancelled'))
+			return
+		selectionInfo = self.getSelectionInfo()
+		line = self.getCurrentLine() if selectionInfo is None else None
+		docInfo = self.getDocumentInfo()
+		wx.CallLater(0, lambda: self.popupMenu(selectionInfo, line, docInfo))
+		
+	def popupMenu(self, selectionInfo, line, docInfo):
+		"""Display the menu; the text used is the one of selectionInfo if it is not None, else line."""
+		if selectionInfo is not None:
+			withText = lambda onText: self.onCaptureText(selectionInfo, onText)
+		else:
+			withText = lambda onText: onText(line)
+		self.menu = wx.Menu()
+		item = self.menu.Append(
+			wx.ID_ANY,
+			_("Define the &reference"),
+			_("Define the reference"),
+		)
+		self.menu.Bind(wx.EVT_MENU, lambda evt: withText(self.onDefineRef), item)
+		item = self.menu.Append(
+			wx.ID_ANY,
+			_("Compare with reference by &character"),
+			_("Compare with reference by character "),
+		)
+		self.menu.Bind(wx.EVT_MENU, lambda evt: withText(lambda text: self.onCompare(text, byCharacter=True)), item)
+		item = self.menu.Append(	
+			wx.ID_ANY,
+			_("Compare with reference by &word"),
+			_("Compare with reference by word"),
+		)
+		self.menu.Bind(wx.EVT_MENU, lambda evt: withText(lambda text: self.onCompare(text, byCharacter=False)), item)
+		if docInfo is not None:
+			# The text of the document is only read if one of these items is chosen.
+			docMenu = wx.Menu()
+			item = docMenu.Append(wx.ID_ANY, _("Define the &reference"))
+			docMenu.Bind(wx.EVT_MENU, lambda evt: self.onCaptureText(docInfo, self.onDefineRef), item)
+			item = docMenu.Append(wx.ID_ANY, _("Compare with reference by &character"))
+			docMenu.Bind(
+				wx.EVT_MENU,
+				lambda evt: self.onCaptureText(docInfo, lambda text: self.onCompare(text, byCharacter=True)),
+				item,
+			)
+			item = docMenu.Append(wx.ID_ANY, _("Compare with reference by &word"))
+			docMenu.Bind(
+				wx.EVT_MENU,
+				lambda evt: self.onCaptureText(docInfo, lambda text: self.onCompare(text, byCharacter=False)),
+				item,
+			)
+			self.menu.AppendSubMenu(docMenu, _("Whole &document"))
+		if len(self.references) > 1:
+			refMenu = wx.Menu()
+			for n, ref in enumerate(reversed(list(self.references))):
+				item = refMenu.AppendRadioItem(wx.ID_ANY, f"&{n + 1} {ref.name}")
+				item.Check(ref.hash == self.references.activeHash)
+				refMenu.Bind(wx.EVT_MENU, lambda evt, refHash=ref.hash: self.onSelectRef(refHash), item)
+			self.menu.AppendSubMenu(refMenu, _("&Active reference"))
+		# The pager of the last diff is not read while a page is being loaded in the worker thread.
+		if self.lastDiff is not None and not self.worker.isRunning():
+			pager = self.lastDiff[1]
+			if pager.hasPage(self.curPage + 1):
+				item = self.menu.Append(wx.ID_ANY, _("Show &next page of the last diff"))
+				self.menu.Bind(wx.EVT_MENU, lambda evt: self.onShowPage(self.curPage + 1), item)
+			if self.curPage > 0:
+				item = self.menu.Append(wx.ID_ANY, _("Show &previous page of the last diff"))
+				self.menu.Bind(wx.EVT_MENU, lambda evt: self.onShowPage(self.curPage - 1), item)
+		gui.mainFrame.prePopup()
+		gui.mainFrame.sysTrayIcon.PopupMenu(self.menu)
+		gui.mainFrame.postPopup()
+		
+	def onCaptureText(self, rangeInfo, onText):
+		"""Read the text of rangeInfo (the selection or the whole document) in the worker thread, then call onText
+		with it on the main thread. As a comparison, the capture reports its progress and can be cancelled.
+		"""
+		if self.worker.isRunning():
+			msg = _('A comparison is already running')
+			core.callLater(1, lambda: self.actionMessage(msg))
+			return
+		self.worker.start(textCapture.captureText, (rangeInfo,), onText, self.onDiffError)
+	
+	def onCompare(self, text, byCharacter):
+		ref = self.references.active
+		if ref is None:
+			msg = _('No text previously saved')
+			core.callLater(1, lambda: self.actionMessage(msg))
+			return
+		mode = 'char' if byCharacter else 'word'
+		backend = diffBackends.getBackend(mode)
+		if self.worker.isRunning():
+			msg = _('A comparison is already running')
+			core.callLater(1, lambda: self.actionMessage(msg))
+			return
+		key = self.diffCache.makeKey(ref.hash, text, f'{mode}:{backend.name}')
+		result = self.diffCache.get(key)
+		if result is not None:
+			core.callLater(1, self.onDiffResult, result, key)
+			return
+		self.worker.start(
+			diffText,
+			(ref.text, text, byCharacter, backend),
+			lambda result: self.onDiffResult(result, key),
+			self.onDiffError,
+		)
+	
+	def onDiffResult(self, result, key):
+		pager, title = result
+		self.diffCache.put(key, pager, title)
+		if pager.isEmpty:
+			self.actionMessage(_('No difference'))
+			return
+		self.lastDiff = (key, pager, title)
+		self.showPage(0)
+	
+	def onShowPage(self, n):
+		key, pager, title = self.lastDiff
+		if self.worker.isRunning():
+			msg = _('A comparison is already running')
+			core.callLater(1, lambda: self.actionMessage(msg))
+			return
+		if n < pager.loadedPageCount:
+			core.callLater(1, self.showPage, n)
+			return
+		self.worker.start(pager.getPage, (n,), lambda page: self.onPageLoaded(n), self.onDiffError)
+	
+	def onPageLoaded(self, n):
+		key, pager, title = self.lastDiff
+		# Update the size of the cached diff.
+		self.diffCache.put(key, pager, title)
+		if n >= pager.loadedPageCount:
+			self.actionMessage(_('No more page'))
+			return
+		self.showPage(n)
+	
+	def showPage(self, n):
+		key, pager, title = self.lastDiff
+		self.curPage = n
+		if n > 0 or pager.hasPage(1):
+			title = f"{title} - page {n + 1}"
+		ui.browseableMessage(diffPager.renderPage(pager, n), title, isHtml=True)
+	
+	def onDiffError(self, error):
+		log.error('Error during the comparison', exc_info=error)
+		self.actionMessage(_('Error during the comparison'))
+	
+	def onDefineRef(self, text):
+		self.references.add(makeReferenceName(text), text)
+		msg = _('Text saved for diff')
+		core.callLater(1, lambda: self.actionMessage(msg))
+	
+	def onSelectRef(self, refHash):
+		self.references.activeHash = refHash
+		msg = _('Reference selected: {name}').format(name=self.references.active.name)
+		core.callLater(1, lambda: self.actionMessage(msg))
+	
+	@staticmethod
+	def actionMessage(msg):
+		speech.cancelSpeech()
+		ui.message(msg)
+		
+				
@@ -0,0 +1,93 @@
+# DiffMaker: provide the result of a diff in a browseable message.
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Registry of the backends computing the word (or character) diffs.
+All backends return the diff in the porcelain format of git (see diffEngine).
+The available backends are myers (diffEngine's port of git's algorithm), difflib and git; there is no native
+(compiled) backend, so that the plugin can be copied as is in NVDA's scratchpad.
+The backend used for each comparison mode can be modified in BACKEND_FOR_MODE, e.g. from NVDA's Python console.
+This module does not depend on NVDA.
+"""
+
+import difflib
+import shutil
+
+from . import diffEngine
+
+
+class DiffBackend:
+	"""Base class of the diff backends."""
+
+	#: The name used to register and select the backend.
+	name = None
+	#: A short description of the backend.
+	description = None
+
+	def isAvailable(self):
+		return True
+
+	def wordDiff(self, text1, text2, byCharacter, checkpoint=None):
+		"""Compute the word (or character) diff between two texts; see diffEngine.wordDiff."""
+		raise NotImplementedError
+
+
+class MyersBackend(DiffBackend):
+	name = 'myers'
+	description = "Python port of git's diff algorithm; same output as the git backend"
+
+	def wordDiff(self, text1, text2, byCharacter, checkpoint=None):
+		return diffEngine.wordDiff(text1, text2, byCharacter, checkpoint)
+
+
+class DifflibBackend(DiffBackend):
+	name = 'difflib'
+	description = "Python's difflib; faster on large texts but the diff is not always minimal"
+
+	def wordDiff(self, text1, text2, byCharacter, checkpoint=None):
+		return diffEngine.wordDiff(text1, text2, byCharacter, checkpoint, sequenceDiff=self._diffWords)
+
+	@staticmethod
+	def _diffWords(words1, words2, checkpoint):
+		if checkpoint:
+			checkpoint()
+		return difflib.SequenceMatcher(None, words1, words2, autojunk=False).get_opcodes()
+
+
+class GitBackend(DiffBackend):
+	name = 'git'
+	description = "External git command; needs Git in the PATH"
+
+	def isAvailable(self):
+		return shutil.which('git') is not None
+
+	def wordDiff(self, text1, text2, byCharacter, checkpoint=None):
+		return diffEngine.gitWordDiff(text1, text2, byCharacter, checkpoint)
+
+
+backends = {}
+
+
+def registerBackend(backend):
+	backends[backend.name] = backend
+
+
+for _backendCls in (MyersBackend, DifflibBackend, GitBackend):
+	registerBackend(_backendCls())
+del _backendCls
+
+# The name of the backend used for each comparison mode.
+BACKEND_FOR_MODE = {
+	'word': MyersBackend.name,
+	'char': MyersBackend.name,
+}
+
+
+def getBackend(mode):
+	"""Return the backend to use for the comparison mode ("word" or "char").
+	Falls back to the Myers backend if the configured one is unknown or unavailable.
+	"""
+	backend = backends.get(BACKEND_FOR_MODE.get(mode))
+	if backend is None or not backend.isAvailable():
+		backend = backends[MyersBackend.name]
+	return backend
@@ -0,0 +1,807 @@
+# DiffMaker: provide the result of a diff in a browseable message.
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Pure Python word / character diff engine.
+This module does not depend on NVDA so that it can be imported and benchmarked outside of NVDA.
+Its output is the one of `git diff -U0 --word-diff=porcelain --minimal` (with `--word-diff-regex=.` when diffing
+by character), once the diff header has been removed: myersDiff is a port of the algorithm of xdiff, git's diff
+library, including the heuristics that git uses for the word diff, and wordDiff renders the result as git does.
+"""
+
+from collections import Counter
+import os
+import re
+import subprocess
+import tempfile
+
+
+# Word regexps equivalent to git's default one and to `--word-diff-regex=.`; git only considers space, tab and new
+# line characters as word separators.
+RE_WORD = re.compile(r'[^ \t\n\r]+')
+RE_CHARACTER = re.compile(r'.')
+
+# Maximum size (in characters) of a changed hunk of lines to be diffed word by word (or character by character).
+# Larger hunks are only reported line by line, so that computation time and memory remain bounded.
+MAX_REFINED_HUNK_LENGTH = 20000
+
+RE_DIFF_HEADER = re.compile(r"^diff .*?\n@@ [^\n]*\n", re.DOTALL)
+
+# Parameters of xdiff's algorithm, with the same values as in git.
+# Number of matches of an element above which it may be discarded if it lies among discarded elements.
+MAX_EQ_LIMIT = 1024
+# Number of elements scanned on each side of an element to decide whether it lies among discarded elements.
+SIMSCAN_WINDOW = 100
+# Proportion of discarded elements, among the scanned ones, for an element to be discarded.
+KPDIS_RUN = 4
+# Minimum cost above which the search of the middle snake is stopped, if the diff need not be minimal.
+MAX_COST_MIN = 256
+# Cost above which a long enough snake is used as split point, if the diff need not be minimal.
+HEUR_MIN_COST = 256
+SNAKE_CNT = 20
+K_HEUR = 4
+# Upper bound of the positions in xdiff, used as sentinel.
+LINE_MAX = 2 ** 63 - 1
+# git removes the common end of the texts by blocks of this size (in bytes) before diffing them.
+TAIL_BLOCK_SIZE = 1024
+
+# Parameters of xdiff's indent heuristic, used by git to slide the groups of changed lines.
+MAX_INDENT = 200
+MAX_BLANKS = 20
+START_OF_FILE_PENALTY = 1
+END_OF_FILE_PENALTY = 21
+TOTAL_BLANK_WEIGHT = -30
+POST_BLANK_WEIGHT = 6
+RELATIVE_INDENT_PENALTY = -4
+RELATIVE_INDENT_WITH_BLANK_PENALTY = 10
+RELATIVE_OUTDENT_PENALTY = 24
+RELATIVE_OUTDENT_WITH_BLANK_PENALTY = 17
+RELATIVE_DEDENT_PENALTY = 23
+RELATIVE_DEDENT_WITH_BLANK_PENALTY = 17
+INDENT_WEIGHT = 60
+INDENT_HEURISTIC_MAX_SLIDING = 100
+
+
+def textWithNoTailingNL(text):
+	if text and text[-1] == '\n':
+		text = text[:-1]
+	return text
+
+
+def tokenize(text, byCharacter):
+	"""Split text into words (or characters).
+	Returns the list of the words and the list of their (begin, end) offsets in text.
+	"""
+	regexp = RE_CHARACTER if byCharacter else RE_WORD
+	words = []
+	spans = []
+	for m in regexp.finditer(text):
+		words.append(m.group())
+		spans.append(m.span())
+	return words, spans
+
+
+def _bogoSqrt(n):
+	"""Rough square root used by xdiff to bound the cost of the diff."""
+	i = 1
+	while n > 0:
+		n >>= 2
+		i <<= 1
+	return i
+
+
+def myersDiff(a, b, checkpoint=None, minimal=False, indentHeuristic=False):
+	"""Compute a diff between the sequences a and b as xdiff, git's diff library, does, so that the result is the
+	same as git's one.
+	The elements which have no match in the other sequence are discarded first; the diff of the remaining ones is
+	then computed with the linear space variant of Myers' O(ND) algorithm. Unless minimal is True, elements with many
+	matches lying among discarded elements are also discarded, and the search is stopped when its cost becomes too
+	high, as git does without --minimal (git always does so for the word diff).
+	The groups of changes are finally slid as git does; if indentHeuristic is True, a and b must be lists of lines,
+	whose indentation is used to choose where to slide the groups, as git does by default for the line diff.
+	Returns a list of opcodes (tag, i1, i2, j1, j2) as difflib.SequenceMatcher.get_opcodes does, except that
+	"equal" opcodes are omitted and that changes are only reported as "delete", "insert" or "replace".
+	checkpoint, if provided, is a callable without parameter called regularly during the computation; it may raise
+	an exception to abort the computation, e.g. when the user cancels it.
+	"""
+	n = len(a)
+	m = len(b)
+	# Elements are compared through integer ids, which is faster than comparing strings.
+	ids = {}
+	ha = [ids.setdefault(x, len(ids)) for x in a]
+	hb = [ids.setdefault(x, len(ids)) for x in b]
+	del ids
+	# As in xdiff, the lists of changed flags have an extra element which is never set: it is read as a sentinel
+	# at both ends, the index -1 being the last element.
+	changedA = bytearray(n + 1)
+	changedB = bytearray(m + 1)
+	# Common prefix and suffix.
+	lim = min(n, m)
+	start = 0
+	while start < lim and ha[start] == hb[start]:
+		start += 1
+	end = 0
+	while end < lim - start and ha[n - 1 - end] == hb[m - 1 - end]:
+		end += 1
+	countsA = Counter(ha)
+	countsB = Counter(hb)
+	indexesA = _discardElements(ha, start, n - end, countsB, changedA, minimal)
+	indexesB = _discardElements(hb, start, m - end, countsA, changedB, minimal)
+	_compareElements(
+		[ha[i] for i in indexesA], indexesA, changedA,
+		[hb[j] for j in indexesB], indexesB, changedB,
+		minimal, checkpoint,
+	)
+	_compactChanges(ha, changedA, changedB, a if indentHeuristic else None)
+	_compactChanges(hb, changedB, changedA, b if indentHeuristic else None)
+	return _changesToOpcodes(changedA, changedB)
+
+
+def _discardElements(seq, start, end, otherCounts, changed, minimal):
+	"""Return the indexes of the elements of seq[start:end] to be diffed and mark the other ones as changed.
+	As in xdiff, elements with no match in the other sequence are discarded, as well as, unless minimal is True,
+	elements with many matches lying among discarded elements.
+	"""
+	limit = min(_bogoSqrt(len(seq)), MAX_EQ_LIMIT)
+	# 0: no match, 1: some matches, 2: many matches.
+	matches = bytearray(len(seq))
+	for i in range(start, end):
+		count = otherCounts[seq[i]]
+		if count == 0:
+			matches[i] = 0
+		elif count >= limit and not minimal:
+			matches[i] = 2
+		else:
+			matches[i] = 1
+	indexes = []
+	# Last elements with no match and with some matches, to call _isAmongDiscarded only when it may return True.
+	lastNoMatch = lastMatch = -1
+	for i in range(start, end):
+		match = matches[i]
+		if match == 1 or (match == 2 and not (
+			lastNoMatch > lastMatch
+			and lastNoMatch >= i - SIMSCAN_WINDOW
+			and _isAmongDiscarded(matches, i, start, end - 1)
+		)):
+			indexes.append(i)
+		else:
+			changed[i] = 1
+		if match == 0:
+			lastNoMatch = i
+		elif match == 1:
+			lastMatch = i
+	return indexes
+
+
+def _isAmongDiscarded(matches, i, s, e):
+	"""Return whether the element i, which has many matches, lies among discarded elements (xdl_clean_mmatch).
+	s and e are the indexes of the first and last elements which may be scanned.
+	"""
+	s = max(s, i - SIMSCAN_WINDOW)
+	e = min(e, i + SIMSCAN_WINDOW)
+	discarded0 = 0
+	multiMatches0 = 1
+	r = 1
+	while i - r >= s:
+		if matches[i - r] == 0:
+			discarded0 += 1
+		elif matches[i - r] == 2:
+			multiMatches0 += 1
+		else:
+			break
+		r += 1
+	if discarded0 == 0:
+		return False
+	discarded1 = 0
+	multiMatches1 = 1
+	r = 1
+	while i + r <= e:
+		if matches[i + r] == 0:
+			discarded1 += 1
+		elif matches[i + r] == 2:
+			multiMatches1 += 1
+		else:
+			break
+		r += 1
+	if discarded1 == 0:
+		return False
+	discarded1 += discarded0
+	multiMatches1 += multiMatches0
+	return multiMatches1 * KPDIS_RUN < multiMatches1 + discarded1
+
+
+def _compareElements(ha, indexesA, changedA, hb, indexesB, changedB, minimal, checkpoint):
+	"""Mark the changed elements among the ones which have not been discarded (xdl_recs_cmp).
+	ha and hb are the ids of these elements and indexesA and indexesB their indexes in the full sequences.
+	"""
+	n = len(ha)
+	m = len(hb)
+	nDiagonals = n + m + 3
+	maxCost = max(_bogoSqrt(nDiagonals), MAX_COST_MIN)
+	# Furthest reaching paths of the forward and backward searches, indexed by diagonal; negative diagonals are
+	# stored at the end of the lists, where negative indexes read them.
+	forward = [0] * nDiagonals
+	backward = [0] * nDiagonals
+	# Sub-problems are handled with an explicit stack rather than with recursion to support long sequences.
+	stack = [(0, n, 0, m, minimal)]
+	while stack:
+		if checkpoint:
+			checkpoint()
+		off1, lim1, off2, lim2, needMin = stack.pop()
+		while off1 < lim1 and off2 < lim2 and ha[off1] == hb[off2]:
+			off1 += 1
+			off2 += 1
+		while off1 < lim1 and off2 < lim2 and ha[lim1 - 1] == hb[lim2 - 1]:
+			lim1 -= 1
+			lim2 -= 1
+		if off1 == lim1:
+			for j in range(off2, lim2):
+				changedB[indexesB[j]] = 1
+		elif off2 == lim2:
+			for i in range(off1, lim1):
+				changedA[indexesA[i]] = 1
+		else:
+			i1, i2, minLow, minHigh = _split(
+				ha, off1, lim1, hb, off2, lim2, forward, backward, needMin, maxCost, checkpoint
+			)
+			stack.append((i1, lim1, i2, lim2, minHigh))
+			stack.append((off1, i1, off2, i2, minLow))
+
+
+def _split(ha, off1, lim1, hb, off2, lim2, forward, backward, needMin, maxCost, checkpoint):
+	"""Find the point where to split the diff of ha[off1:lim1] and hb[off2:lim2] (xdl_split).
+	Returns the (i1, i2) position of this point and whether each of the two resulting sub-diffs must be minimal.
+	"""
+	dMin = off1 - lim2
+	dMax = lim1 - off2
+	forwardMid = off1 - off2
+	backwardMid = lim1 - lim2
+	odd = (forwardMid - backwardMid) & 1
+	forwardMin = forwardMax = forwardMid
+	backwardMin = backwardMax = backwardMid
+	forward[forwardMid] = off1
+	backward[backwardMid] = lim1
+	snakeCount = SNAKE_CNT
+	cost = 0
+	while True:
+		cost += 1
+		if checkpoint:
+			checkpoint()
+		gotSnake = False
+		# Extend the forward paths by one edit.
+		if forwardMin > dMin:
+			forwardMin -= 1
+			forward[forwardMin - 1] = -1
+		else:
+			forwardMin += 1
+		if forwardMax < dMax:
+			forwardMax += 1
+			forward[forwardMax + 1] = -1
+		else:
+			forwardMax -= 1
+		for d in range(forwardMax, forwardMin - 1, -2):
+			i1 = forward[d - 1]
+			if i1 >= forward[d + 1]:
+				i1 += 1
+			else:
+				i1 = forward[d + 1]
+			i2 = i1 - d
+			if i1 < lim1 and i2 < lim2 and ha[i1] == hb[i2]:
+				prev1 = i1
+				i1 += 1
+				i2 += 1
+				while i1 < lim1 and i2 < lim2 and ha[i1] == hb[i2]:
+					i1 += 1
+					i2 += 1
+				if i1 - prev1 > snakeCount:
+					gotSnake = True
+			forward[d] = i1
+			if odd and backwardMin <= d <= backwardMax and backward[d] <= i1:
+				return i1, i2, True, True
+		# Extend the backward paths by one edit.
+		if backwardMin > dMin:
+			backwardMin -= 1
+			backward[backwardMin - 1] = LINE_MAX
+		else:
+			backwardMin += 1
+		if backwardMax < dMax:
+			backwardMax += 1
+			backward[backwardMax + 1] = LINE_MAX
+		else:
+			backwardMax -= 1
+		for d in range(backwardMax, backwardMin - 1, -2):
+			i1 = backward[d - 1]
+			if i1 >= backward[d + 1]:
+				i1 = backward[d + 1] - 1
+			i2 = i1 - d
+			if i1 > off1 and i2 > off2 and ha[i1 - 1] == hb[i2 - 1]:
+				prev1 = i1
+				i1 -= 1
+				i2 -= 1
+				while i1 > off1 and i2 > off2 and ha[i1 - 1] == hb[i2 - 1]:
+					i1 -= 1
+					i2 -= 1
+				if prev1 - i1 > snakeCount:
+					gotSnake = True
+			backward[d] = i1
+			if not odd and forwardMin <= d <= forwardMax and i1 <= forward[d]:
+				return i1, i2, True, True
+		if needMin:
+			continue
+		if gotSnake and cost > HEUR_MIN_COST:
+			# Split on the furthest reaching path ending with a long enough snake.
+			best = 0
+			for d in range(forwardMax, forwardMin - 1, -2):
+				dd = abs(d - forwardMid)
+				i1 = forward[d]
+				i2 = i1 - d
+				v = (i1 - off1) + (i2 - off2) - dd
+				if (
+					v > K_HEUR * cost and v > best
+					and off1 + SNAKE_CNT <= i1 < lim1 and off2 + SNAKE_CNT <= i2 < lim2
+				):
+					k = 1
+					while ha[i1 - k] == hb[i2 - k]:
+						if k == SNAKE_CNT:
+							best = v
+							split = (i1, i2)
+							break
+						k += 1
+			if best > 0:
+				return split[0], split[1], True, False
+			best = 0
+			for d in range(backwardMax, backwardMin - 1, -2):
+				dd = abs(d - backwardMid)
+				i1 = backward[d]
+				i2 = i1 - d
+				v = (lim1 - i1) + (lim2 - i2) - dd
+				if (
+					v > K_HEUR * cost and v > best
+					and off1 < i1 <= lim1 - SNAKE_CNT and off2 < i2 <= lim2 - SNAKE_CNT
+				):
+					k = 0
+					while ha[i1 + k] == hb[i2 + k]:
+						if k == SNAKE_CNT - 1:
+							best = v
+							split = (i1, i2)
+							break
+						k += 1
+			if best > 0:
+				return split[0], split[1], False, True
+		if cost >= maxCost:
+			# Too costly: split on the furthest reaching path, forward or backward.
+			forwardBest = forwardBest1 = -1
+			for d in range(forwardMax, forwardMin - 1, -2):
+				i1 = min(forward[d], lim1)
+				i2 = i1 - d
+				if lim2 < i2:
+					i1 = lim2 + d
+					i2 = lim2
+				if forwardBest < i1 + i2:
+					forwardBest = i1 + i2
+					forwardBest1 = i1
+			backwardBest = backwardBest1 = LINE_MAX
+			for d in range(backwardMax, backwardMin - 1, -2):
+				i1 = max(off1, backward[d])
+				i2 = i1 - d
+				if i2 < off2:
+					i1 = off2 + d
+					i2 = off2
+				if i1 + i2 < backwardBest:
+					backwardBest = i1 + i2
+					backwardBest1 = i1
+			if (lim1 + lim2) - backwardBest < forwardBest - (off1 + off2):
+				return forwardBest1, forwardBest - forwardBest1, True, False
+			return backwardBest1, backwardBest - backwardBest1, False, True
+
+
+def _makeOpcode(i1, i2, j1, j2):
+	if i1 == i2:
+		tag = 'insert'
+	elif j1 == j2:
+		tag = 'delete'
+	else:
+		tag = 'replace'
+	return (tag, i1, i2, j1, j2)
+
+
+def _changesToOpcodes(changedA, changedB):
+	"""Convert the lists of changed flags of both sequences (with their sentinel) into opcodes."""
+	opcodes = []
+	n = len(changedA) - 1
+	m = len(changedB) - 1
+	i = j = 0
+	while i < n or j < m:
+		if i < n and j < m and not changedA[i] and not changedB[j]:
+			i += 1
+			j += 1
+			continue
+		i2 = i
+		while changedA[i2]:
+			i2 += 1
+		j2 = j
+		while changedB[j2]:
+			j2 += 1
+		opcodes.append(_makeOpcode(i, i2, j, j2))
+		i = i2
+		j = j2
+	return opcodes
+
+
+def _getIndent(line):
+	"""Return the indentation width of line, or -1 if it is blank, as xdiff's indent heuristic does."""
+	indent = 0
+	for c in line:
+		if c == ' ':
+			indent += 1
+		elif c == '\t':
+			indent += 8 - indent % 8
+		elif c not in '\n\r':
+			return indent
+		if indent >= MAX_INDENT:
+			return MAX_INDENT
+	return -1
+
+
+def _measureSplit(lines, split):
+	"""Return the (end of file, indent, blanks before, indent before, blanks after, indent after) of the split
+	before the line split.
+	"""
+	if split >= len(lines):
+		endOfFile = True
+		indent = -1
+	else:
+		endOfFile = False
+		indent = _getIndent(lines[split])
+	preBlank = 0
+	preIndent = -1
+	for i in range(split - 1, -1, -1):
+		preIndent = _getIndent(lines[i])
+		if preIndent != -1:
+			break
+		preBlank += 1
+		if preBlank == MAX_BLANKS:
+			preIndent = 0
+			break
+	postBlank = 0
+	postIndent = -1
+	for i in range(split + 1, len(lines)):
+		postIndent = _getIndent(lines[i])
+		if postIndent != -1:
+			break
+		postBlank += 1
+		if postBlank == MAX_BLANKS:
+			postIndent = 0
+			break
+	return endOfFile, indent, preBlank, preIndent, postBlank, postIndent
+
+
+def _scoreSplit(lines, split):
+	"""Return the (effective indent, penalty) of the split before the line split, lower being better."""
+	endOfFile, indent, preBlank, preIndent, postBlank, postIndent = _measureSplit(lines, split)
+	penalty = 0
+	if preIndent == -1 and preBlank == 0:
+		penalty += START_OF_FILE_PENALTY
+	if endOfFile:
+		penalty += END_OF_FILE_PENALTY
+	postBlank = 1 + postBlank if indent == -1 else 0
+	totalBlank = preBlank + postBlank
+	penalty += TOTAL_BLANK_WEIGHT * totalBlank
+	penalty += POST_BLANK_WEIGHT * postBlank
+	if indent == -1:
+		indent = postIndent
+	anyBlanks = totalBlank != 0
+	if indent == -1 or preIndent == -1 or indent == preIndent:
+		pass
+	elif indent > preIndent:
+		penalty += RELATIVE_INDENT_WITH_BLANK_PENALTY if anyBlanks else RELATIVE_INDENT_PENALTY
+	elif postIndent != -1 and postIndent > indent:
+		penalty += RELATIVE_OUTDENT_WITH_BLANK_PENALTY if anyBlanks else RELATIVE_OUTDENT_PENALTY
+	else:
+		penalty += RELATIVE_DEDENT_WITH_BLANK_PENALTY if anyBlanks else RELATIVE_DEDENT_PENALTY
+	return indent, penalty
+
+
+def _compareScores(score1, score2):
+	indent1, penalty1 = score1
+	indent2, penalty2 = score2
+	return INDENT_WEIGHT * ((indent1 > indent2) - (indent1 < indent2)) + (penalty1 - penalty2)
+
+
+def _compactChanges(seq, changed, otherChanged, lines=None):
+	"""Slide the groups of changed elements of seq as git does (xdl_change_compact).
+	Groups are merged when possible, then aligned with a group of changes in the other sequence or else moved as
+	far down as possible or, if lines is provided, to the position where the indentation of the lines suggests
+	that the group is a block.
+	Groups are (start, end) ranges separated by exactly one unchanged element, which may thus be empty.
+	"""
+	n = len(seq)
+	start = end = 0
+	while changed[end]:
+		end += 1
+	otherStart = otherEnd = 0
+	while otherChanged[otherEnd]:
+		otherEnd += 1
+	while True:
+		if end != start:
+			while True:
+				groupSize = end - start
+				endMatchingOther = -1
+				# Slide up as far as possible, merging with the preceding groups.
+				while start > 0 and seq[start - 1] == seq[end - 1]:
+					start -= 1
+					end -= 1
+					changed[start] = 1
+					changed[end] = 0
+					while changed[start - 1]:
+						start -= 1
+					otherEnd = otherStart - 1
+					otherStart = otherEnd
+					while otherChanged[otherStart - 1]:
+						otherStart -= 1
+				earliestEnd = end
+				if otherEnd > otherStart:
+					endMatchingOther = end
+				# Slide down as far as possible, merging with the following groups.
+				while end < n and seq[start] == seq[end]:
+					changed[start] = 0
+					changed[end] = 1
+					start += 1
+					end += 1
+					while changed[end]:
+						end += 1
+					otherStart = otherEnd = otherEnd + 1
+					while otherChanged[otherEnd]:
+						otherEnd += 1
+					if otherEnd > otherStart:
+						endMatchingOther = end
+				if groupSize == end - start:
+					break
+			if end == earliestEnd:
+				shift = end
+			elif endMatchingOther != -1:
+				shift = endMatchingOther
+			elif lines is not None:
+				shift = None
+				bestScore = None
+				for split in range(max(earliestEnd, end - groupSize - 1, end - INDENT_HEURISTIC_MAX_SLIDING), end + 1):
+					indent1, penalty1 = _scoreSplit(lines, split)
+					indent2, penalty2 = _scoreSplit(lines, split - groupSize)
+					score = (indent1 + indent2, penalty1 + penalty2)
+					if shift is None or _compareScores(score, bestScore) <= 0:
+						bestScore = score
+						shift = split
+			else:
+				shift = end
+			while end > shift:
+				start -= 1
+				end -= 1
+				changed[start] = 1
+				changed[end] = 0
+				while changed[start - 1]:
+					start -= 1
+				otherEnd = otherStart - 1
+				otherStart = otherEnd
+				while otherChanged[otherStart - 1]:
+					otherStart -= 1
+		if end == n:
+			return
+		start = end = end + 1
+		while changed[end]:
+			end += 1
+		otherStart = otherEnd = otherEnd + 1
+		while otherChanged[otherEnd]:
+			otherEnd += 1
+
+
+def _countTrimmedTail(seq1, seq2):
+	"""Return the number of elements at the end of seq1 and seq2 which git removes before diffing them.
+	git removes the common end of the two texts by blocks of TAIL_BLOCK_SIZE bytes, the last line cut being kept;
+	texts are seen as their elements each followed by a new line, as git sees the lines of a text and the words of
+	a word diff.
+	"""
+	n = len(seq1)
+	m = len(seq2)
+	k = 0
+	while k < n and k < m and seq1[n - 1 - k] == seq2[m - 1 - k]:
+		k += 1
+	sizes1 = [len(x.encode('utf8', 'surrogatepass')) + 1 for x in seq1]
+	size2 = sum(len(x.encode('utf8', 'surrogatepass')) + 1 for x in seq2)
+	common = sum(sizes1[n - k:])
+	if k < n and k < m:
+		# The common end of the first differing elements is also removed.
+		x1 = seq1[n - 1 - k].encode('utf8', 'surrogatepass')
+		x2 = seq2[m - 1 - k].encode('utf8', 'surrogatepass')
+		p = 0
+		while p < len(x1) and p < len(x2) and x1[-1 - p] == x2[-1 - p]:
+			p += 1
+		common += p + 1
+	trimmed = min(common, sum(sizes1), size2) // TAIL_BLOCK_SIZE * TAIL_BLOCK_SIZE
+	count = 0
+	size = 0
+	for i in range(n - 1, -1, -1):
+		size += sizes1[i]
+		if size >= trimmed:
+			break
+		count += 1
+	return count
+
+
+def _diffAsGit(seq1, seq2, checkpoint, minimal, indentHeuristic=False):
+	"""Return the opcodes of the diff of seq1 and seq2 computed as git does, once their common end is trimmed."""
+	count = _countTrimmedTail(seq1, seq2)
+	if count:
+		seq1 = seq1[:len(seq1) - count]
+		seq2 = seq2[:len(seq2) - count]
+	return myersDiff(seq1, seq2, checkpoint, minimal, indentHeuristic)
+
+
+def _writePorcelain(out, prefix, text):
+	"""Write text in porcelain format, i.e. with prefix at the beginning of each line and a "~" line
+	for each new line character.
+	"""
+	for i, line in enumerate(text.split('\n')):
+		if i:
+			out.append('~')
+		if line:
+			out.append(prefix + line)
+
+
+def wordDiff(text1, text2, byCharacter, checkpoint=None, sequenceDiff=None):
+	"""Compute the word (or character) diff between text1 and text2 as git does.
+	Returns the diff in porcelain format or an empty string if there is no difference; as in git, a change of
+	blanks only is reported as a diff with context lines only.
+	If text2 is empty, i.e. has not even an empty line, text1 is reported as removed as a whole, as git does.
+	sequenceDiff is the function diffing the lists of words, with the signature of myersDiff; by default, the
+	words are diffed as git does.
+	See myersDiff for checkpoint.
+	"""
+	# An empty text has no line, unlike a text made of an empty line.
+	if textWithNoTailingNL(text1) == textWithNoTailingNL(text2) and bool(text1) == bool(text2):
+		return ''
+	out = []
+	if not text2:
+		_writePorcelain(out, '-', textWithNoTailingNL(text1))
+		out.append('~')
+		return '\n'.join(out) + '\n'
+	text1 = textWithNoTailingNL(text1)
+	text2 = textWithNoTailingNL(text2)
+	words1, spans1 = tokenize(text1, byCharacter)
+	words2, spans2 = tokenize(text2, byCharacter)
+	if sequenceDiff is None:
+		opcodes = _diffAsGit(words1, words2, checkpoint, minimal=False)
+	else:
+		opcodes = sequenceDiff(words1, words2, checkpoint)
+	return renderPorcelain(text1, spans1, text2, spans2, opcodes)
+
+
+def renderPorcelain(text1, spans1, text2, spans2, opcodes):
+	"""Render the opcodes of a word diff in porcelain format, as git does.
+	spans1 and spans2 are the word offsets returned by tokenize; "equal" opcodes are ignored.
+	The texts are expected to differ: if there is no opcode, their common text is written as context.
+	"""
+	out = []
+	# Position in text2 up to which the text has already been written.
+	curPlus = 0
+	for tag, i1, i2, j1, j2 in opcodes:
+		if tag == 'equal':
+			continue
+		if j1 < j2:
+			plusBegin = spans2[j1][0]
+			plusEnd = spans2[j2 - 1][1]
+		else:
+			# Pure deletion: the context ends after the preceding word, as git does.
+			plusBegin = plusEnd = spans2[j1 - 1][1] if j1 else 0
+		if curPlus < plusBegin:
+			_writePorcelain(out, ' ', text2[curPlus:plusBegin])
+		if i1 < i2:
+			_writePorcelain(out, '-', text1[spans1[i1][0]:spans1[i2 - 1][1]])
+		if j1 < j2:
+			_writePorcelain(out, '+', text2[plusBegin:plusEnd])
+		curPlus = plusEnd
+	if curPlus < len(text2):
+		_writePorcelain(out, ' ', text2[curPlus:])
+	out.append('~')
+	return '\n'.join(out) + '\n'
+
+
+def _hunkHeader(i1, i2, j1, j2):
+	"""Return the header of a hunk in the same format as git with no context line (-U0)."""
+	def lineRange(lo, hi):
+		count = hi - lo
+		if count == 1:
+			return str(lo + 1)
+		if count == 0:
+			return f'{lo},0'
+		return f'{lo + 1},{count}'
+	return f'@@ -{lineRange(i1, i2)} +{lineRange(j1, j2)} @@\n'
+
+
+def splitLines(text):
+	"""Return the list of the lines of text; an empty text has no line."""
+	return textWithNoTailingNL(text).split('\n') if text else []
+
+
+def lineDiffOpcodes(lines1, lines2, checkpoint=None):
+	"""Compute the diff between two lists of lines as `git diff --minimal` does and return its opcodes.
+	See myersDiff for checkpoint.
+	"""
+	return _diffAsGit(lines1, lines2, checkpoint, minimal=True, indentHeuristic=True)
+
+
+def renderLineHunk(lines1, lines2, opcode, byCharacter, checkpoint=None, refine=None):
+	"""Render the hunk of a line diff opcode in porcelain format, with its header.
+	The lines of the hunk are diffed word by word (or character by character), provided they are not larger than
+	MAX_REFINED_HUNK_LENGTH; otherwise they are only reported line by line.
+	refine is the function used for this word diff, with the signature of wordDiff, which is the default.
+	See myersDiff for checkpoint.
+	"""
+	if refine is None:
+		refine = wordDiff
+	tag, i1, i2, j1, j2 = opcode
+	# As in git, each line of the hunk ends with a new line, and removed lines are diffed with no text at all.
+	oldText = ''.join(line + '\n' for line in lines1[i1:i2])
+	newText = ''.join(line + '\n' for line in lines2[j1:j2])
+	if tag == 'replace' and len(oldText) + len(newText) > MAX_REFINED_HUNK_LENGTH:
+		out = []
+		for line in lines1[i1:i2]:
+			out.extend(('-' + line, '~'))
+		for line in lines2[j1:j2]:
+			out.extend(('+' + line, '~'))
+		hunk = '\n'.join(out) + '\n'
+	else:
+		hunk = refine(oldText, newText, byCharacter, checkpoint)
+	return _hunkHeader(i1, i2, j1, j2) + hunk
+
+
+def iterLineDiffHunks(text1, text2, byCharacter, checkpoint=None, refine=None):
+	"""Compute the diff between the lines of text1 and text2 and yield the hunks one by one in porcelain format.
+	The line diff is computed first; then only the lines of the changed hunks are diffed word by word (or character
+	by character), see renderLineHunk.
+	See myersDiff for checkpoint.
+	"""
+	lines1 = splitLines(text1)
+	lines2 = splitLines(text2)
+	for opcode in lineDiffOpcodes(lines1, lines2, checkpoint):
+		yield renderLineHunk(lines1, lines2, opcode, byCharacter, checkpoint, refine)
+
+
+def lineDiff(text1, text2, byCharacter, checkpoint=None, refine=None):
+	"""Compute the diff between two multi-line texts.
+	Returns the diff in porcelain format or an empty string if there is no difference.
+	See iterLineDiffHunks for checkpoint and refine.
+	"""
+	return ''.join(iterLineDiffHunks(text1, text2, byCharacter, checkpoint, refine))
+
+
+def gitWordDiff(text1, text2, byCharacter, checkpoint=None):
+	"""Compute the word (or character) diff between text1 and text2 by running `git diff`.
+	Returns the diff in porcelain format or an empty string if there is no difference.
+	checkpoint is only called before running git, since the git process cannot be interrupted.
+	"""
+	if checkpoint:
+		checkpoint()
+	with tempfile.TemporaryDirectory() as d:
+		pathF1 = os.path.join(d, 'f1.txt')
+		pathF2 = os.path.join(d, 'f2.txt')
+		with open(pathF1, 'w', encoding='utf8') as f1:
+			f1.write(text1)
+		with open(pathF2, 'w', encoding='utf8') as f2:
+			f2.write(text2)
+		cmdParams = ['git', 'diff', '-U0', '--word-diff=porcelain']
+		if byCharacter:
+			cmdParams.append('--word-diff-regex=.')
+		cmdParams.extend(['--minimal', '--no-index', '--', pathF1, pathF2])
+		out = subprocess.run(
+			cmdParams,
+			stdin=subprocess.DEVNULL,
+			capture_output=True,
+			encoding='utf8',
+			# With a UTF-8 locale, `--word-diff-regex=.` matches characters rather than bytes.
+			env=dict(os.environ, LC_ALL='C.UTF-8'),
+		)
+	if out.returncode == 0:
+		return ''
+	if out.returncode != 1:
+		raise RuntimeError('Error when executing the following command:\n{cmd}\n{err}'.format(cmd=cmdParams, err=out.stderr))
+	return re.sub(RE_DIFF_HEADER, '', out.stdout)
@@ -0,0 +1,116 @@
+# DiffMaker: provide the result of a diff in a browseable message.
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Split a diff into pages which are computed and rendered on demand.
+This module does not depend on NVDA.
+"""
+
+import html
+
+
+# Maximum size (in characters) of a page. A page contains at least one hunk, even if it is larger.
+PAGE_SIZE = 50000
+
+
+class DiffPager:
+	"""Group the hunks of a diff into pages.
+	The items of the diff (e.g. the opcodes of a line diff) are computed when the first page is requested; each item
+	is then rendered into a hunk (e.g. by diffing its lines word by word) only when a page that needs it is
+	requested, so that a large diff is never rendered nor held in memory all at once.
+	If the computation of a page is interrupted (e.g. by a cancellation), the page being built is discarded; the next
+	request resumes from the last hunk of the previous page.
+	"""
+
+	def __init__(self, computeItems, renderItem=None, pageSize=PAGE_SIZE, retainedSize=0):
+		"""
+		@param computeItems: a function taking a checkpoint as parameter and returning the list of the items.
+		@param renderItem: a function taking an item and a checkpoint as parameters and returning its hunk; by
+			default, the items are the hunks.
+		@param retainedSize: the size (in characters) of the data used by computeItems and renderItem, which is
+			retained until all the hunks have been rendered.
+		"""
+		self._computeItems = computeItems
+		self._renderItem = renderItem
+		self._items = None
+		# Index of the first item not yet rendered.
+		self._nextItem = 0
+		self.pageSize = pageSize
+		self._retainedSize = retainedSize
+		self._pages = []
+		self._size = 0
+		# True once all the hunks have been rendered.
+		self.isComplete = False
+
+	def __len__(self):
+		"""The total size of the pages loaded so far and of the data retained to load the next ones."""
+		if self.isComplete:
+			return self._size
+		return self._size + self._retainedSize
+
+	@property
+	def loadedPageCount(self):
+		return len(self._pages)
+
+	@property
+	def isEmpty(self):
+		"""True if there is no difference at all; only relevant once the first page has been requested."""
+		return self.isComplete and not self._pages
+
+	def hasPage(self, n):
+		return n >= 0 and (n < len(self._pages) or not self.isComplete)
+
+	def getPage(self, n, checkpoint=None):
+		"""Return the list of the hunks of page n (starting at 0), or None if there is no such page.
+		Pages are loaded up to page n if needed; see diffEngine.myersDiff for checkpoint.
+		"""
+		if n < 0:
+			return None
+		while len(self._pages) <= n and not self.isComplete:
+			self._loadPage(checkpoint)
+		if n < len(self._pages):
+			return self._pages[n]
+		return None
+
+	def _loadPage(self, checkpoint):
+		if self._items is None:
+			self._items = self._computeItems(checkpoint)
+		page = []
+		size = 0
+		i = self._nextItem
+		while size < self.pageSize and i < len(self._items):
+			if self._renderItem is None:
+				hunk = self._items[i]
+			else:
+				hunk = self._renderItem(self._items[i], checkpoint)
+			i += 1
+			page.append(hunk)
+			size += len(hunk)
+		# The state is only updated once the page is complete, so that an interrupted load can be resumed.
+		if page:
+			self._pages.append(page)
+			self._size += size
+		self._nextItem = i
+		if i == len(self._items):
+			self.isComplete = True
+			# Release the data used to compute the diff.
+			self._computeItems = self._renderItem = self._items = None
+
+
+def renderPage(pager, n):
+	"""Render the page n of a pager as HTML.
+	Each hunk with a header is rendered with a heading so that browse mode quick navigation by heading jumps from
+	one change to the next or previous one.
+	"""
+	parts = []
+	for hunk in pager.getPage(n):
+		if hunk.startswith('@@'):
+			header, hunk = hunk.split('\n', 1)
+			parts.append(f'<h2>{html.escape(header)}</h2>')
+		parts.append(f'<pre>{html.escape(hunk)}</pre>')
+	if n > 0 or pager.hasPage(n + 1):
+		if pager.isComplete:
+			parts.append(f'<p>Page {n + 1} of {pager.loadedPageCount}</p>')
+		else:
+			parts.append(f'<p>Page {n + 1}; the diff continues on the next page.</p>')
+	return '\n'.join(parts)
@@ -0,0 +1,133 @@
+# DiffMaker: provide the result of a diff in a browseable message.
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Storage of the reference texts and cache of the diff results.
+This module does not depend on NVDA.
+"""
+
+from collections import OrderedDict, namedtuple
+import hashlib
+
+
+# Maximum number of references kept in the store.
+MAX_REFERENCES = 9
+# Maximum total size (in characters) of the references kept in the store.
+MAX_REFERENCES_SIZE = 5000000
+# Maximum total size (in characters) of the diffs kept in the cache.
+MAX_CACHE_SIZE = 5000000
+
+
+def textHash(text):
+	return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).digest()
+
+
+Reference = namedtuple('Reference', ('name', 'text', 'hash'))
+
+
+class ReferenceStore:
+	"""Store several reference texts, keyed by the hash of their text.
+	The name of a reference is only a label; a number is appended to it if another reference has the same name.
+	One of the references is the active one, i.e. the one used for comparisons. The store is bounded both by the
+	number of references and by their total length, as DiffCache; when it is full, adding a reference removes the
+	oldest ones. The reference just added is always kept, even if it is larger than maxSize.
+	"""
+
+	def __init__(self, maxReferences=MAX_REFERENCES, maxSize=MAX_REFERENCES_SIZE):
+		self.maxReferences = maxReferences
+		self.maxSize = maxSize
+		self.size = 0
+		self._references = OrderedDict()
+		#: The hash of the active reference, or None if no reference has been defined.
+		self.activeHash = None
+
+	def __len__(self):
+		return len(self._references)
+
+	def __iter__(self):
+		return iter(self._references.values())
+
+	def add(self, name, text):
+		"""Add the reference text with the label name, make it the active one and return it.
+		If the text is already stored, it is moved to the end and its name is updated.
+		"""
+		refHash = textHash(text)
+		old = self._references.pop(refHash, None)
+		if old is not None:
+			self.size -= len(old.text)
+		names = {ref.name for ref in self._references.values()}
+		uniqueName = name
+		n = 2
+		while uniqueName in names:
+			uniqueName = f'{name} ({n})'
+			n += 1
+		ref = self._references[refHash] = Reference(uniqueName, text, refHash)
+		self.size += len(text)
+		while len(self._references) > 1 and (
+			len(self._references) > self.maxReferences or self.size > self.maxSize
+		):
+			evicted = self._references.popitem(last=False)[1]
+			self.size -= len(evicted.text)
+		self.activeHash = refHash
+		return ref
+
+	def get(self, refHash):
+		return self._references[refHash]
+
+	def remove(self, refHash):
+		self.size -= len(self._references.pop(refHash).text)
+		if self.activeHash == refHash:
+			self.activeHash = next(reversed(self._references), None)
+
+	@property
+	def active(self):
+		"""The active reference or None if no reference has been defined."""
+		if self.activeHash is None:
+			return None
+		return self._references[self.activeHash]
+
+
+class DiffCache:
+	"""A LRU cache of the diff results, keyed by (reference hash, text hash, mode).
+	The cache size is bounded by the total length of the diffs it contains. Since a diff (e.g. a DiffPager) may grow
+	after it has been cached, its length is recorded each time it is put; put must be called again after it has grown.
+	"""
+
+	def __init__(self, maxSize=MAX_CACHE_SIZE):
+		self.maxSize = maxSize
+		self.size = 0
+		self._entries = OrderedDict()
+
+	def __len__(self):
+		return len(self._entries)
+
+	@staticmethod
+	def makeKey(refHash, text, mode):
+		return (refHash, textHash(text), mode)
+
+	def get(self, key):
+		"""Return the cached result for key or None if it is not in the cache."""
+		try:
+			self._entries.move_to_end(key)
+		except KeyError:
+			return None
+		diff, title, size = self._entries[key]
+		return diff, title
+
+	def put(self, key, diff, title):
+		"""Cache the diff and the title of the message to display it, or update the size of a diff already cached."""
+		old = self._entries.pop(key, None)
+		if old is not None:
+			self.size -= old[2]
+		size = len(diff)
+		if size > self.maxSize:
+			return
+		self._entries[key] = (diff, title, size)
+		self.size += size
+		while self.size > self.maxSize:
+			evictedDiff, evictedTitle, evictedSize = self._entries.popitem(last=False)[1]
+			self.size -= evictedSize
+
+	def clear(self):
+		self._entries.clear()
+		self.size = 0
@@ -0,0 +1,122 @@
+# DiffMaker: provide the result of a diff in a browseable message.
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Run the diff computations in a background thread.
+This module does not import NVDA modules: the functions used to call code on the main thread and to report
+messages are provided by the caller (e.g. core.callLater and ui.message in NVDA), so that stand-ins can be used to
+test the worker outside of NVDA.
+"""
+
+import threading
+import time
+
+
+# Delay (in seconds) after which a comparison is considered long and a progress message is reported,
+# and interval between two progress messages.
+PROGRESS_INTERVAL = 2.0
+
+
+class CancelledError(Exception):
+	"""Raised in the worker thread to abort a computation cancelled by the user."""
+
+
+class DiffWorker:
+	"""Run one computation at a time in a background thread.
+	The computation function is called with a checkpoint keyword argument; it should call this checkpoint
+	regularly to allow cancellation and progress reporting (see diffEngine.myersDiff).
+	"""
+
+	def __init__(self, callLater, onProgress, progressInterval=PROGRESS_INTERVAL):
+		"""
+		@param callLater: a function with the signature of core.callLater(delay, callable, *args), used to run
+			the callbacks on the main thread.
+		@param onProgress: a function without parameter reporting to the user that a comparison is in progress.
+			It is called on the main thread, through callLater.
+		"""
+		self._callLater = callLater
+		self._onProgress = onProgress
+		self._progressInterval = progressInterval
+		# The cancel event of the current job, until its result is delivered on the main thread or it is cancelled.
+		self._cancelEvent = None
+		# The thread of the last cancelled job, which may still be running until its next checkpoint.
+		self._cancelledThread = None
+		self._thread = None
+
+	def isRunning(self):
+		"""Return whether a job is running or its result is waiting to be delivered on the main thread.
+		A cancelled job is still considered as running until its thread terminates, so that the next job does not
+		run in parallel with it. A new job can be started from the callbacks of the previous one.
+		"""
+		return self._cancelEvent is not None or (
+			self._cancelledThread is not None and self._cancelledThread.is_alive()
+		)
+
+	def start(self, func, args, onResult, onError=None):
+		"""Start func(*args, checkpoint=...) in a background thread.
+		onResult is called on the main thread with the return value of func once it has completed; onError is
+		called on the main thread with the exception if func fails. Nothing is called if the job is cancelled.
+		"""
+		if self.isRunning():
+			raise RuntimeError('A comparison is already running')
+		cancelEvent = threading.Event()
+		self._cancelEvent = cancelEvent
+		self._thread = threading.Thread(
+			target=self._run,
+			args=(func, args, onResult, onError, cancelEvent),
+			name='diffMakerWorker',
+			daemon=True,
+		)
+		self._thread.start()
+
+	def cancel(self):
+		"""Request the cancellation of the running job, if any; its callbacks are not called, even if its result
+		has already been posted to the main thread.
+		Must be called on the main thread. Returns True if a job was running and not yet cancelled.
+		"""
+		if self._cancelEvent is None:
+			return False
+		self._cancelEvent.set()
+		self._cancelEvent = None
+		self._cancelledThread = self._thread
+		return True
+
+	def join(self, timeout=None):
+		"""Wait for the running job to terminate; mainly intended for tests."""
+		thread = self._thread
+		if thread is not None:
+			thread.join(timeout)
+
+	def _run(self, func, args, onResult, onError, cancelEvent):
+		nextProgressTime = time.monotonic() + self._progressInterval
+
+		def checkpoint():
+			nonlocal nextProgressTime
+			if cancelEvent.is_set():
+				raise CancelledError
+			now = time.monotonic()
+			if now >= nextProgressTime:
+				nextProgressTime = now + self._progressInterval
+				self._callLater(0, self._deliver, cancelEvent, lambda value: self._onProgress(), None, False)
+
+		try:
+			result = func(*args, checkpoint=checkpoint)
+		except CancelledError:
+			return
+		except Exception as e:
+			if not cancelEvent.is_set():
+				self._callLater(0, self._deliver, cancelEvent, onError, e)
+			return
+		if not cancelEvent.is_set():
+			self._callLater(0, self._deliver, cancelEvent, onResult, result)
+
+	def _deliver(self, cancelEvent, callback, value, isLast=True):
+		"""Call callback(value) on the main thread, unless the job has been cancelled since the value was posted.
+		isLast is False for progress reports, after which the job is still running.
+		"""
+		if cancelEvent is not self._cancelEvent:
+			return
+		if isLast:
+			self._cancelEvent = None
+		if callback is not None:
+			callback(value)
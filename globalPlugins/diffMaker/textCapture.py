@@ -0,0 +1,46 @@
+# DiffMaker: provide the result of a diff in a browseable message.
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Capture the text of large ranges (whole document, long selection) in bounded chunks.
+Getting the text of a large TextInfo at once may be slow or fail with some implementations, while expanding it
+line by line costs one cross-process call per line. Here the range is read by chunks of CHUNK_SIZE lines.
+This module does not import NVDA modules so that it can be benchmarked with a fake TextInfo.
+"""
+
+
+# Same values as textInfos.UNIT_LINE and textInfos.UNIT_CHARACTER.
+UNIT_LINE = "line"
+UNIT_CHARACTER = "character"
+
+# Number of units read at once.
+CHUNK_SIZE = 500
+
+
+def iterTextChunks(rangeInfo, unit=UNIT_LINE, chunkSize=CHUNK_SIZE, checkpoint=None):
+	"""Yield the text of rangeInfo chunk by chunk, each chunk spanning at most chunkSize units.
+	checkpoint, if provided, is called before reading each chunk; see diffEngine.myersDiff.
+	"""
+	chunk = rangeInfo.copy()
+	chunk.collapse()
+	while True:
+		if checkpoint:
+			checkpoint()
+		moved = chunk.move(unit, chunkSize, endPoint="end")
+		isLast = moved == 0 or chunk.compareEndPoints(rangeInfo, "endToEnd") >= 0
+		if isLast:
+			chunk.setEndPoint(rangeInfo, "endToEnd")
+		text = chunk.text
+		if text:
+			yield text
+		if isLast:
+			return
+		chunk.collapse(end=True)
+
+
+def captureText(rangeInfo, unit=UNIT_LINE, chunkSize=CHUNK_SIZE, checkpoint=None):
+	"""Return the text of rangeInfo, read chunk by chunk.
+	The chunks are joined into a single string, since the diff needs the whole text.
+	See iterTextChunks for checkpoint.
+	"""
+	return ''.join(iterTextChunks(rangeInfo, unit, chunkSize, checkpoint))
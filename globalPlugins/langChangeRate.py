@@ -6,20 +6,30 @@
 """A quick and dirty script allowing to modify the speech rate when a language other than the default language is detected.
 To configure the modification factor, e.g. -40%, type in the console:
 `config.conf['paramChangeUponLangChange']['rateChange'] = -40`
+Rate, pitch and volume offsets can also be defined per language or dialect; each parameter not defined for a dialect
+falls back to the one of the language root, then to rateChange for the rate and to 0 for pitch and volume, e.g.:
+`config.conf['paramChangeUponLangChange']['profiles'] = "en: rate=-20 pitch=5; en_GB: rate=-10; de: volume=-10"`
+The language of untagged text can also be detected (see _langDetect.py, which needs to be copied next to this file);
+use the script "Toggle language detection", to which no gesture is assigned by default.
+The configuration values are cached; they are read again when the configuration profile changes or is reset, and
+at most SETTINGS_MAX_AGE seconds after they have been read.
 Not tested with rate boost on.
 """
 
+import functools
+import time
 import globalPluginHandler
 import config
+import ui
 from scriptHandler import script
 from types import MethodType
 from logHandler import log
 import speech
 try:
-	from speech.commands import LangChangeCommand, RateCommand
+	from speech.commands import LangChangeCommand, RateCommand, PitchCommand, VolumeCommand
 except ImportError:
 	# For older versions such as NVDA 2019.2.1
-	from speech import LangChangeCommand, RateCommand
+	from speech import LangChangeCommand, RateCommand, PitchCommand, VolumeCommand
 # from speech.types import SpeechSequence
 # from speech.priorities import Spri
 
@@ -29,35 +39,188 @@ try:
 except AttributeError:
 	incompatible = True
 	log.debugWarning('GlobalPlugin LangChangeRate incompatible: No speech._manager.speak')
+
+# Maximum time during which the cached configuration values are used, in seconds; changes not notified by NVDA
+# (e.g. from the Python console or the settings dialog) are thus taken into account after this delay.
+SETTINGS_MAX_AGE = 1.0
+
+
+def normalizeLanguage(language):
+	return language.lower().replace('-', '_')
+
+
+@functools.lru_cache(maxsize=128)
+def getLanguageRoot(language):
+	return language.split('_')[0]
+
+
+def parseProfiles(text):
+	"""Parse the profiles configuration value, e.g. "en: rate=-20; en_GB: rate=-10 pitch=5; de: volume=-10".
+	Returns a dictionary: normalized language -> (rate, pitch, volume) offsets; each offset is None if not specified.
+	"""
+	profiles = {}
+	for entry in text.split(';'):
+		if not entry.strip():
+			continue
+		try:
+			language, params = entry.split(':', 1)
+			offsets = {'rate': None, 'pitch': None, 'volume': None}
+			for param in params.split():
+				name, value = param.split('=')
+				if name not in offsets:
+					raise ValueError(f'Unknown parameter {name}')
+				offsets[name] = int(value)
+		except ValueError:
+			log.error(f'Invalid language profile in paramChangeUponLangChange: {entry!r}')
+			continue
+		profiles[normalizeLanguage(language.strip())] = (offsets['rate'], offsets['pitch'], offsets['volume'])
+	return profiles
+
+
+class LangChangeTable:
+	"""The commands to insert after a LangChangeCommand, compiled from the configuration for a default language.
+	The profiles are parsed once when the configuration is read; then each language is resolved the first time it is
+	met, so that next resolutions are a single dict lookup.
+	"""
+
+	def __init__(self, settings, defaultLanguage):
+		autoDialectSwitching, rateChange, profilesText = settings
+		self.settings = settings
+		self.defaultLanguage = defaultLanguage
+		self.autoDialectSwitching = autoDialectSwitching
+		self.rateChange = rateChange
+		self.profiles = parseProfiles(profilesText)
+		# Pitch and volume commands are only inserted if they are used by a profile.
+		self.hasPitch = any(offsets[1] for offsets in self.profiles.values())
+		self.hasVolume = any(offsets[2] for offsets in self.profiles.values())
+		self.defaultLanguageRoot = getLanguageRoot(defaultLanguage)
+		#: Language of a LangChangeCommand -> (language, tuple of commands)
+		self.sequences = {}
+
+	def getOffsets(self, language):
+		"""Return the (rate, pitch, volume) offsets of language; each one is taken from the profile of the dialect,
+		then from the one of the language root, then from the global default.
+		"""
+		language = normalizeLanguage(language)
+		noProfile = (None, None, None)
+		dialectOffsets = self.profiles.get(language, noProfile)
+		rootOffsets = self.profiles.get(getLanguageRoot(language), noProfile)
+		defaults = (self.rateChange, 0, 0)
+		return tuple(
+			next(offset for offset in (dialectOffset, rootOffset, default) if offset is not None)
+			for dialectOffset, rootOffset, default in zip(dialectOffsets, rootOffsets, defaults)
+		)
+
+	def resolve(self, language):
+		"""Compute, store and return the (language, commands) for the language of a LangChangeCommand."""
+		curLanguage = language
+		if not curLanguage or (
+			not self.autoDialectSwitching and getLanguageRoot(curLanguage) == self.defaultLanguageRoot
+		):
+			curLanguage = self.defaultLanguage
+		commands = [LangChangeCommand(curLanguage)]
+		if curLanguage != self.defaultLanguage:
+			rate, pitch, volume = self.getOffsets(curLanguage)
+			commands.append(RateCommand(offset=rate))
+			if self.hasPitch:
+				commands.append(PitchCommand(offset=pitch))
+			if self.hasVolume:
+				commands.append(VolumeCommand(offset=volume))
+		else:
+			commands.append(RateCommand())
+			if self.hasPitch:
+				commands.append(PitchCommand())
+			if self.hasVolume:
+				commands.append(VolumeCommand())
+		entry = self.sequences[language] = (curLanguage, tuple(commands))
+		return entry
+
+
+# The current LangChangeTable and the time when the configuration has been read.
+_table = None
+_tableTime = 0
+
+
+def getLangChangeTable(defaultLanguage):
+	"""Return the LangChangeTable for defaultLanguage, compiled again only if the configuration or the default
+	language has changed.
+	"""
+	global _table, _tableTime
+	now = time.monotonic()
+	if _table is not None and now - _tableTime <= SETTINGS_MAX_AGE and _table.defaultLanguage == defaultLanguage:
+		return _table
+	section = config.conf['paramChangeUponLangChange']
+	settings = (
+		config.conf['speech']['autoDialectSwitching'],
+		section['rateChange'],
+		section['profiles'],
+	)
+	if _table is None or _table.settings != settings or _table.defaultLanguage != defaultLanguage:
+		_table = LangChangeTable(settings, defaultLanguage)
+	_tableTime = now
+	return _table
+
+
+# The LanguageDetector if language detection is enabled, else None.
+detector = None
+
+
+def createDetector():
+	"""Return a new LanguageDetector, or None if _langDetect.py is not installed.
+	_langDetect is only imported here, so that this plugin can be used without it while detection is disabled.
+	"""
+	try:
+		from . import _langDetect
+	except ImportError:
+		log.error('Language detection unavailable: _langDetect.py not found next to langChangeRate.py')
+		return None
+	return _langDetect.LanguageDetector()
+
+
+def invalidateSettings(*args, **kwargs):
+	global _table, detector
+	_table = None
+	if config.conf['paramChangeUponLangChange']['detectLanguage']:
+		if detector is None:
+			detector = createDetector()
+	else:
+		detector = None
+
+
 # def speakNew(self, speechSequence: SpeechSequence, priority: Spri):
 def speakNew(self, speechSequence, priority):
-	autoDialectSwitching = config.conf['speech']['autoDialectSwitching']
-	curLanguage = defaultLanguage = speech.getCurrentLanguage()
+	# Most sequences do not contain any language change; they are passed as is.
+	# Most items are strings, for which the type check is cheaper than isinstance.
+	for item in speechSequence:
+		if type(item) is not str and isinstance(item, LangChangeCommand):
+			defaultLanguage = speech.getCurrentLanguage()
+			break
+	else:
+		if detector is None:
+			return originalSpeak(speechSequence, priority)
+		# Untagged sequence: the language changes are detected, if any.
+		defaultLanguage = speech.getCurrentLanguage()
+		annotated = detector.annotate(speechSequence, defaultLanguage, LangChangeCommand)
+		if annotated is speechSequence:
+			return originalSpeak(speechSequence, priority)
+		speechSequence = annotated
+	table = getLangChangeTable(defaultLanguage)
+	sequences = table.sequences
 	prevLanguage = None
-	defaultLanguageRoot = defaultLanguage.split('_')[0]
 	seq = []
 	for item in speechSequence:
 		seq.append(item)
 		if isinstance(item, LangChangeCommand):
-			curLanguage = item.lang
-			if not curLanguage or (not autoDialectSwitching and curLanguage.split('_')[0] == defaultLanguageRoot):
-				curLanguage=defaultLanguage
+			entry = sequences.get(item.lang)
+			if entry is None:
+				entry = table.resolve(item.lang)
+			curLanguage, commands = entry
 			if curLanguage != prevLanguage:
-				seq.extend(getLangChangeSequence(curLanguage, defaultLanguage))
+				seq.extend(commands)
 				prevLanguage = curLanguage
 	return originalSpeak(seq, priority)
 
 
-def getLangChangeSequence(curLanguage, defaultLanguage):
-	seq = []
-	seq.append(LangChangeCommand(curLanguage))
-	if curLanguage != defaultLanguage:
-		seq.append(RateCommand(offset=config.conf['paramChangeUponLangChange']['rateChange']))
-	else:
-		seq.append(RateCommand())
-	return seq
-
-
 def disableIfIncompatible(c):
 	if incompatible:
 		return globalPluginHandler.GlobalPlugin
@@ -72,11 +235,37 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		super(GlobalPlugin, self).__init__(*args, **kwargs)
 		confspec = {
 			'rateChange': 'integer(default=-30,min=-100,max=100)',
+			'profiles': 'string(default="")',
+			'detectLanguage': 'boolean(default=False)',
 		}
 		config.conf.spec['paramChangeUponLangChange'] = confspec
+		invalidateSettings()
+		config.post_configProfileSwitch.register(invalidateSettings)
+		config.post_configReset.register(invalidateSettings)
 				
 		speech._manager.speak = MethodType(speakNew, speech._manager)
+
+	@script(
+		# Translators: Describes the command to toggle the detection of the language of untagged text.
+		description = _("Toggle language detection"),
+	)
+	def script_toggleLanguageDetection(self, gesture):
+		section = config.conf['paramChangeUponLangChange']
+		section['detectLanguage'] = not section['detectLanguage']
+		invalidateSettings()
+		if section['detectLanguage'] and detector is None:
+			section['detectLanguage'] = False
+			# Translators: Reported when the language detection cannot be enabled because its module is missing.
+			ui.message(_("Language detection unavailable"))
+		elif section['detectLanguage']:
+			# Translators: Reported when the detection of the language of untagged text is enabled.
+			ui.message(_("Language detection on"))
+		else:
+			# Translators: Reported when the detection of the language of untagged text is disabled.
+			ui.message(_("Language detection off"))
 		
 	def terminate(self):
+		config.post_configProfileSwitch.unregister(invalidateSettings)
+		config.post_configReset.unregister(invalidateSettings)
 		speech._manager.speak = originalSpeak
 		
@@ -0,0 +1,129 @@
+# Tests of diffMaker's diff engine
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Regression tests checking that diffMaker's Python diff engine gives the same output as `git diff`.
+The tests comparing with git are skipped if Git is not in the PATH.
+"""
+
+import os
+import random
+import re
+import shutil
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'globalPlugins', 'diffMaker'))
+import diffEngine  # noqa: E402
+
+SEED = 0
+# Characters of the generated texts: separators of git's words and other blanks which are not.
+ALPHABET = 'aabbcde  \t\v\xa0é'
+LINES = ['', 'if x:', '\tfoo()', '\tbar()', '\t\tbaz = 1', 'return x', '    spam', '}']
+
+RE_FUNCNAME = re.compile(r'^(@@ [^@]* @@).*$', re.MULTILINE)
+
+
+def makeText(rnd, size):
+	return ''.join(rnd.choice(ALPHABET) for _ in range(size))
+
+
+def modifyText(rnd, text, nChanges):
+	chars = list(text)
+	for _ in range(nChanges):
+		i = rnd.randrange(len(chars) + 1)
+		r = rnd.random()
+		if r < 0.3 and i < len(chars):
+			del chars[i]
+		elif r < 0.6 and i < len(chars):
+			chars[i] = rnd.choice(ALPHABET)
+		else:
+			chars.insert(i, rnd.choice(ALPHABET))
+	return ''.join(chars)
+
+
+def makeLines(rnd, size):
+	return [rnd.choice(LINES) for _ in range(size)]
+
+
+def modifyLines(rnd, lines, nChanges):
+	lines = list(lines)
+	for _ in range(nChanges):
+		i = rnd.randrange(len(lines) + 1)
+		if rnd.random() < 0.5 and i < len(lines):
+			del lines[i]
+		else:
+			lines.insert(i, rnd.choice(LINES))
+	return lines
+
+
+@unittest.skipIf(shutil.which('git') is None, "Git is not in the PATH")
+class TestSameAsGit(unittest.TestCase):
+
+	def assertSameWordDiff(self, text1, text2):
+		for byCharacter in (False, True):
+			with self.subTest(text1=text1, text2=text2, byCharacter=byCharacter):
+				self.assertEqual(
+					diffEngine.wordDiff(text1, text2, byCharacter),
+					diffEngine.gitWordDiff(text1, text2, byCharacter),
+				)
+
+	def test_blankChanges(self):
+		self.assertSameWordDiff('  foo\n', 'foo\n')
+		self.assertSameWordDiff('foo bar\n', 'foo  bar\n')
+		self.assertSameWordDiff('foo\tbar\n', 'foo bar \n')
+
+	def test_nonSeparatorBlanks(self):
+		self.assertSameWordDiff('foo\vbar baz\n', 'foo bar\xa0baz\n')
+
+	def test_emptyTexts(self):
+		self.assertSameWordDiff('', 'foo bar\n')
+		self.assertSameWordDiff('  foo  bar \n', '')
+		self.assertSameWordDiff('x\n', '  foo  bar \n')
+		self.assertSameWordDiff('foo', 'bar')
+
+	def test_randomLines(self):
+		rnd = random.Random(SEED)
+		for size in (10, 100, 1000):
+			for _ in range(20):
+				text = makeText(rnd, size)
+				self.assertSameWordDiff(text + '\n', modifyText(rnd, text, 1 + size // 20) + '\n')
+
+	def test_longLines(self):
+		# Long lines trigger the heuristics bounding the cost of the diff, and the trimming of the common end.
+		rnd = random.Random(SEED)
+		for size in (2000, 10000):
+			text = makeText(rnd, size)
+			self.assertSameWordDiff(text + '\n', modifyText(rnd, text, size // 10) + '\n')
+			self.assertSameWordDiff(text + '\n', modifyText(rnd, text[:size // 2], 5) + text[size // 2:] + '\n')
+
+	def test_multipleLines(self):
+		rnd = random.Random(SEED)
+		for size in (5, 50, 500):
+			for _ in range(10):
+				lines = makeLines(rnd, size)
+				text1 = '\n'.join(lines) + '\n'
+				text2 = '\n'.join(modifyLines(rnd, lines, 1 + size // 10)) + '\n'
+				for byCharacter in (False, True):
+					with self.subTest(text1=text1, text2=text2, byCharacter=byCharacter):
+						result = diffEngine.lineDiff(text1, text2, byCharacter)
+						# gitWordDiff removes the header of the first hunk, and git reports the function name in
+						# the header of the other hunks.
+						expected = diffEngine.gitWordDiff(text1, text2, byCharacter)
+						self.assertEqual(result.partition('\n')[2] if result else '', RE_FUNCNAME.sub(r'\1', expected))
+
+
+class TestWordDiff(unittest.TestCase):
+
+	def test_noDifference(self):
+		self.assertEqual(diffEngine.wordDiff('foo bar\n', 'foo bar', False), '')
+
+	def test_blankChange(self):
+		self.assertEqual(diffEngine.wordDiff('  foo\n', 'foo\n', False), ' foo\n~\n')
+
+	def test_removedText(self):
+		self.assertEqual(diffEngine.wordDiff('  foo  bar \n', '', False), '-  foo  bar \n~\n')
+
+
+if __name__ == '__main__':
+	unittest.main()
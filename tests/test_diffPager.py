@@ -0,0 +1,81 @@
+# Tests of diffMaker's pager
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Tests of the paging of diffMaker's diffs."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'globalPlugins', 'diffMaker'))
+import diffEngine  # noqa: E402
+import diffPager  # noqa: E402
+import diffWorker  # noqa: E402
+
+
+def makePager(text1, text2, pageSize, checkpoints=None):
+	lines1 = diffEngine.splitLines(text1)
+	lines2 = diffEngine.splitLines(text2)
+
+	def renderItem(opcode, checkpoint):
+		if checkpoint:
+			checkpoint()
+		return diffEngine.renderLineHunk(lines1, lines2, opcode, False, checkpoint)
+
+	return diffPager.DiffPager(
+		lambda checkpoint: diffEngine.lineDiffOpcodes(lines1, lines2, checkpoint),
+		renderItem,
+		pageSize=pageSize,
+		retainedSize=len(text1) + len(text2),
+	)
+
+
+class TestDiffPager(unittest.TestCase):
+
+	def setUp(self):
+		self.text1 = ''.join(f'line {i}\n' for i in range(100))
+		self.text2 = ''.join(f'line {i}\n' if i % 10 else f'changed {i}\n' for i in range(100))
+		self.expected = diffEngine.lineDiff(self.text1, self.text2, False)
+
+	def getAllHunks(self, pager):
+		hunks = []
+		n = 0
+		while pager.hasPage(n):
+			hunks.extend(pager.getPage(n) or [])
+			n += 1
+		return hunks
+
+	def test_pages(self):
+		pager = makePager(self.text1, self.text2, pageSize=50)
+		self.assertEqual(''.join(self.getAllHunks(pager)), self.expected)
+		self.assertGreater(pager.loadedPageCount, 1)
+
+	def test_resumeAfterCancel(self):
+		pager = makePager(self.text1, self.text2, pageSize=50)
+		pager.getPage(0)
+		calls = 0
+
+		def checkpoint():
+			nonlocal calls
+			calls += 1
+			if calls == 2:
+				raise diffWorker.CancelledError
+
+		with self.assertRaises(diffWorker.CancelledError):
+			pager.getPage(1, checkpoint)
+		self.assertEqual(pager.loadedPageCount, 1)
+		self.assertEqual(''.join(self.getAllHunks(pager)), self.expected)
+
+	def test_retainedSize(self):
+		pager = makePager(self.text1, self.text2, pageSize=50)
+		pager.getPage(0)
+		firstPageSize = sum(len(hunk) for hunk in pager.getPage(0))
+		self.assertEqual(len(pager), firstPageSize + len(self.text1) + len(self.text2))
+		self.getAllHunks(pager)
+		self.assertTrue(pager.isComplete)
+		self.assertEqual(len(pager), len(self.expected))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,94 @@
+# Tests of diffMaker's reference store
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Tests of the storage of diffMaker's references."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'globalPlugins', 'diffMaker'))
+import diffPager  # noqa: E402
+import diffStore  # noqa: E402
+
+
+class TestReferenceStore(unittest.TestCase):
+
+	def test_sameName(self):
+		store = diffStore.ReferenceStore()
+		first = store.add('Chapter 1...', 'Chapter 1, first version')
+		second = store.add('Chapter 1...', 'Chapter 1, second version')
+		self.assertEqual(len(store), 2)
+		self.assertEqual([ref.name for ref in store], ['Chapter 1...', 'Chapter 1... (2)'])
+		self.assertEqual(store.get(first.hash).text, 'Chapter 1, first version')
+		self.assertIs(store.active, second)
+
+	def test_sameText(self):
+		store = diffStore.ReferenceStore()
+		store.add('a', 'text')
+		store.add('b', 'other text')
+		ref = store.add('c', 'text')
+		self.assertEqual([r.name for r in store], ['b', 'c'])
+		self.assertEqual(store.activeHash, ref.hash)
+
+	def test_oldestRemoved(self):
+		store = diffStore.ReferenceStore(maxReferences=2)
+		first = store.add('same', '1')
+		store.add('same', '2')
+		store.add('same', '3')
+		self.assertEqual(len(store), 2)
+		self.assertNotIn(first.hash, [ref.hash for ref in store])
+
+	def test_sizeLimit(self):
+		store = diffStore.ReferenceStore(maxSize=1000)
+		store.add('a', 'a' * 400)
+		store.add('b', 'b' * 400)
+		self.assertEqual(store.size, 800)
+		store.add('c', 'c' * 400)
+		self.assertEqual([ref.name for ref in store], ['b', 'c'])
+		self.assertEqual(store.size, 800)
+		# A reference larger than the limit is kept alone.
+		big = store.add('big', 'x' * 2000)
+		self.assertEqual(list(store), [big])
+		self.assertEqual(store.size, 2000)
+		store.remove(big.hash)
+		self.assertEqual(store.size, 0)
+		self.assertIsNone(store.active)
+
+
+class TestDiffCache(unittest.TestCase):
+
+	def test_pagerGrowsAfterPut(self):
+		cache = diffStore.DiffCache(maxSize=1000)
+		small = diffPager.DiffPager(lambda checkpoint: ['x' * 100])
+		small.getPage(0)
+		cache.put('small', small, 'title')
+		pager = diffPager.DiffPager(lambda checkpoint: ['x' * 200] * 10, pageSize=200)
+		pager.getPage(0)
+		cache.put('key', pager, 'title')
+		self.assertEqual(cache.size, 300)
+		pager.getPage(9)
+		self.assertEqual(len(pager), 2000)
+		# The size recorded when the pager was cached is still the one accounted for.
+		self.assertEqual(cache.size, 300)
+		# Putting the grown pager again updates its size; it is now too large to be cached.
+		cache.put('key', pager, 'title')
+		self.assertIsNone(cache.get('key'))
+		self.assertEqual(cache.size, 100)
+		self.assertEqual(cache.get('small'), (small, 'title'))
+
+	def test_evictionUsesRecordedSize(self):
+		cache = diffStore.DiffCache(maxSize=1000)
+		pager = diffPager.DiffPager(lambda checkpoint: ['x' * 200] * 4, pageSize=200)
+		pager.getPage(0)
+		cache.put('old', pager, 'title')
+		pager.getPage(3)
+		cache.put('new', 'y' * 900, 'title')
+		self.assertIsNone(cache.get('old'))
+		self.assertEqual(len(cache), 1)
+		self.assertEqual(cache.size, 900)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,108 @@
+# Tests of diffMaker's background worker
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Tests of the cancellation of diffMaker's worker, with the stand-ins of NVDA's core and ui modules."""
+
+import os
+import sys
+import threading
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'workScripts'))
+sys.path.insert(0, os.path.join(ROOT, 'globalPlugins', 'diffMaker'))
+import nvdaStandIns  # noqa: E402
+import diffWorker  # noqa: E402
+
+TIMEOUT = 10
+
+
+class TestCancel(unittest.TestCase):
+
+	def setUp(self):
+		nvdaStandIns.install()
+		self.core = sys.modules['core']
+		self.results = []
+		self.errors = []
+		self.progress = []
+		self.worker = diffWorker.DiffWorker(
+			self.core.callLater,
+			lambda: self.progress.append(True),
+			progressInterval=0,
+		)
+
+	def start(self, func, args=()):
+		self.worker.start(func, args, self.results.append, self.errors.append)
+
+	def test_result(self):
+		self.start(lambda x, checkpoint: x * 2, (21,))
+		self.worker.join(TIMEOUT)
+		self.assertTrue(self.worker.isRunning())
+		self.core.runPendingCalls()
+		self.assertEqual(self.results, [42])
+		self.assertFalse(self.worker.isRunning())
+		self.assertFalse(self.worker.cancel())
+
+	def test_cancelDuringComputation(self):
+		started = threading.Event()
+
+		def loop(checkpoint):
+			started.set()
+			while True:
+				checkpoint()
+
+		self.start(loop)
+		self.assertTrue(started.wait(TIMEOUT))
+		self.assertTrue(self.worker.cancel())
+		self.worker.join(TIMEOUT)
+		self.assertFalse(self.worker.isRunning())
+		self.core.runPendingCalls()
+		self.assertEqual(self.results, [])
+		self.assertEqual(self.errors, [])
+		self.assertEqual(self.progress, [])
+
+	def test_cancelAfterResultPosted(self):
+		self.start(lambda checkpoint: 'result')
+		self.worker.join(TIMEOUT)
+		# The result has been posted to the main thread, but not yet delivered.
+		self.assertTrue(self.worker.cancel())
+		self.core.runPendingCalls()
+		self.assertEqual(self.results, [])
+		self.assertFalse(self.worker.isRunning())
+
+	def test_cancelAfterErrorPosted(self):
+		def fail(checkpoint):
+			raise ValueError
+
+		self.start(fail)
+		self.worker.join(TIMEOUT)
+		self.assertTrue(self.worker.cancel())
+		self.core.runPendingCalls()
+		self.assertEqual(self.errors, [])
+
+	def test_newJobAfterCancel(self):
+		self.start(lambda checkpoint: 'first')
+		self.worker.join(TIMEOUT)
+		self.worker.cancel()
+		self.start(lambda checkpoint: 'second')
+		self.worker.join(TIMEOUT)
+		self.core.runPendingCalls()
+		self.assertEqual(self.results, ['second'])
+
+	def test_newJobFromCallback(self):
+		# E.g. the capture of a document is followed by its comparison.
+		self.worker.start(
+			lambda checkpoint: 'text',
+			(),
+			lambda text: self.start(lambda checkpoint: text.upper()),
+		)
+		self.worker.join(TIMEOUT)
+		self.core.runPendingCalls()
+		self.worker.join(TIMEOUT)
+		self.core.runPendingCalls()
+		self.assertEqual(self.results, ['TEXT'])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,79 @@
+# Tests of langChangeRate
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Tests of the resolution of the language profiles of langChangeRate, with the stand-ins of NVDA's modules."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'workScripts'))
+import nvdaStandIns  # noqa: E402
+
+nvdaStandIns.install()
+langChangeRate = nvdaStandIns.loadPlugin('langChangeRate')
+
+
+class TestLangChangeTable(unittest.TestCase):
+
+	def makeTable(self, profiles, rateChange=-30):
+		return langChangeRate.LangChangeTable((True, rateChange, profiles), 'fr_FR')
+
+	def test_partialDialectProfile(self):
+		table = self.makeTable("en: rate=-20 pitch=5; en_GB: pitch=10")
+		# Rate from the language root, pitch from the dialect, volume from the global default.
+		self.assertEqual(table.getOffsets('en_GB'), (-20, 10, 0))
+		self.assertEqual(table.getOffsets('en-gb'), (-20, 10, 0))
+		self.assertEqual(table.getOffsets('en_US'), (-20, 5, 0))
+		self.assertEqual(table.getOffsets('en'), (-20, 5, 0))
+
+	def test_noProfile(self):
+		table = self.makeTable("de: volume=-10")
+		self.assertEqual(table.getOffsets('it'), (-30, 0, 0))
+		self.assertEqual(table.getOffsets('de_AT'), (-30, 0, -10))
+		self.assertFalse(table.hasPitch)
+		self.assertTrue(table.hasVolume)
+
+	def test_invalidProfileIgnored(self):
+		table = self.makeTable("en: speed=3; de: rate=-10")
+		self.assertEqual(table.getOffsets('en'), (-30, 0, 0))
+		self.assertEqual(table.getOffsets('de'), (-10, 0, 0))
+
+
+class TestLanguageDetection(unittest.TestCase):
+
+	def setUp(self):
+		self.plugin = langChangeRate.GlobalPlugin()
+
+	def tearDown(self):
+		self.plugin.terminate()
+		langChangeRate.config.conf['paramChangeUponLangChange']['detectLanguage'] = False
+		langChangeRate.invalidateSettings()
+
+	def test_toggle(self):
+		self.plugin.script_toggleLanguageDetection(None)
+		self.assertIsNotNone(langChangeRate.detector)
+		self.plugin.script_toggleLanguageDetection(None)
+		self.assertIsNone(langChangeRate.detector)
+
+	def test_detectorModuleMissing(self):
+		# A None entry in sys.modules makes the import fail, as if _langDetect.py had not been copied.
+		package = sys.modules['globalPlugins']
+		savedModule = sys.modules.get('globalPlugins._langDetect')
+		savedAttribute = package.__dict__.pop('_langDetect', None)
+		sys.modules['globalPlugins._langDetect'] = None
+		try:
+			self.plugin.script_toggleLanguageDetection(None)
+		finally:
+			del sys.modules['globalPlugins._langDetect']
+			if savedModule is not None:
+				sys.modules['globalPlugins._langDetect'] = savedModule
+			if savedAttribute is not None:
+				package._langDetect = savedAttribute
+		self.assertIsNone(langChangeRate.detector)
+		self.assertFalse(langChangeRate.config.conf['paramChangeUponLangChange']['detectLanguage'])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,134 @@
+# Benchmark of diffMaker's backends
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to compare the latency and the output of diffMaker's diff backends.
+The corpus is made of real-world line pairs: the lines removed and added at the same place in the history of a
+Git repository (this repo by default, or the one whose path is passed as first argument).
+For each backend and each mode (word or character), the script prints:
+- the median and 95th percentile of the latency;
+- the number of pairs for which the output is valid, i.e. allows to rebuild both lines;
+- the number of pairs for which the output is identical to the one of the reference backend (git if available).
+
+The script does not depend on NVDA.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+import types
+
+# Import diffMaker's modules without executing the package's __init__, which depends on NVDA.
+_pluginDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'globalPlugins', 'diffMaker')
+_package = types.ModuleType('diffMaker')
+_package.__path__ = [_pluginDir]
+sys.modules['diffMaker'] = _package
+from diffMaker import diffBackends  # noqa: E402
+
+MAX_PAIRS = 200
+
+
+def getLinePairs(repoPath, maxPairs=MAX_PAIRS):
+	"""Extract pairs of (removed line, added line) from the history of a Git repository."""
+	out = subprocess.run(
+		['git', '-C', repoPath, 'log', '-p', '-U0', '--no-color', '--format='],
+		capture_output=True,
+		encoding='utf8',
+		errors='replace',
+	).stdout
+	pairs = []
+	seen = set()
+	removed = []
+	added = []
+
+	def flush():
+		for pair in zip(removed, added):
+			if pair[0] != pair[1] and pair not in seen:
+				seen.add(pair)
+				pairs.append(pair)
+		removed.clear()
+		added.clear()
+
+	for line in out.split('\n'):
+		if line.startswith('---') or line.startswith('+++'):
+			flush()
+		elif line.startswith('-'):
+			if added:
+				flush()
+			removed.append(line[1:])
+		elif line.startswith('+'):
+			added.append(line[1:])
+		else:
+			flush()
+		if len(pairs) >= maxPairs:
+			break
+	flush()
+	return pairs[:maxPairs]
+
+
+def rebuildTexts(diff):
+	"""Rebuild the old and the new text from a diff in porcelain format."""
+	old = []
+	new = []
+	for line in diff.split('\n')[:-1]:
+		if line == '~':
+			old.append('\n')
+			new.append('\n')
+			continue
+		prefix, content = line[0], line[1:]
+		if prefix in ' -':
+			old.append(content)
+		if prefix in ' +':
+			new.append(content)
+	return ''.join(old), ''.join(new)
+
+
+def isValid(diff, text1, text2, byCharacter):
+	if not diff:
+		return text1 == text2
+	old, new = rebuildTexts(diff)
+	if new != text2 + '\n':
+		return False
+	if byCharacter:
+		return old == text1 + '\n'
+	# In word mode, the blanks of the context come from the new text and git does not separate a deleted word from
+	# the preceding one; thus only non-blank characters can be compared.
+	return ''.join(old.split()) == ''.join(text1.split())
+
+
+def main():
+	repoPath = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+	pairs = getLinePairs(repoPath)
+	print(f'{len(pairs)} line pairs from {os.path.abspath(repoPath)}')
+	backends = [b for b in diffBackends.backends.values() if b.isAvailable()]
+	reference = diffBackends.backends['git']
+	if not reference.isAvailable():
+		reference = diffBackends.backends['myers']
+	print(f'Reference backend: {reference.name}')
+	print(f'{"backend":>8} {"mode":>5} {"median (ms)":>12} {"p95 (ms)":>9} {"valid":>9} {"identical":>10}')
+	for byCharacter in (False, True):
+		refOutputs = [reference.wordDiff(t1, t2, byCharacter) for t1, t2 in pairs]
+		for backend in backends:
+			times = []
+			nValid = 0
+			nIdentical = 0
+			for (text1, text2), refOutput in zip(pairs, refOutputs):
+				t0 = time.perf_counter()
+				diff = backend.wordDiff(text1, text2, byCharacter)
+				times.append(time.perf_counter() - t0)
+				nValid += isValid(diff, text1, text2, byCharacter)
+				nIdentical += diff == refOutput
+			times.sort()
+			print('{name:>8} {mode:>5} {median:>12.3f} {p95:>9.3f} {valid:>9} {identical:>10}'.format(
+				name=backend.name,
+				mode='char' if byCharacter else 'word',
+				median=statistics.median(times) * 1000,
+				p95=times[int(len(times) * 0.95)] * 1000 if times else 0,
+				valid=f'{nValid}/{len(pairs)}',
+				identical=f'{nIdentical}/{len(pairs)}',
+			))
+
+
+main()
@@ -0,0 +1,95 @@
+# Benchmark of diffMaker
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to compare the latency of diffMaker's Python diff engine with the one of the former `git diff` call.
+Line pairs of 80, 1k and 10k characters are generated with a fixed random seed; the second line of each pair is a
+copy of the first one with some words modified, inserted or removed.
+For each size and each mode (word or character), the median time of both implementations is printed, as well as
+the number of pairs for which both outputs are identical.
+
+The script does not depend on NVDA; it can be executed from the root of this repo with Git in the PATH.
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'globalPlugins', 'diffMaker'))
+import diffEngine  # noqa: E402
+
+SIZES = [80, 1000, 10000]
+N_PAIRS = 10
+# Proportion of the words modified in the second line of a pair.
+CHANGE_RATE = 0.05
+SEED = 0
+
+VOCABULARY = (
+	"the quick brown fox jumps over lazy dog NVDA screen reader speech braille synthesizer "
+	"review cursor caret focus object document line word character punctuation symbol level"
+).split()
+
+
+def makeLine(rnd, size):
+	words = []
+	length = 0
+	while length < size:
+		word = rnd.choice(VOCABULARY)
+		words.append(word)
+		length += len(word) + 1
+	return ' '.join(words)[:size]
+
+
+def modifyLine(rnd, line):
+	words = line.split(' ')
+	result = []
+	for word in words:
+		r = rnd.random()
+		if r < CHANGE_RATE / 3:
+			continue  # Removed word
+		elif r < 2 * CHANGE_RATE / 3:
+			result.append(rnd.choice(VOCABULARY))  # Modified word
+		elif r < CHANGE_RATE:
+			result.extend([word, rnd.choice(VOCABULARY)])  # Inserted word
+		else:
+			result.append(word)
+	return ' '.join(result)
+
+
+def timeIt(func, *args):
+	t0 = time.perf_counter()
+	res = func(*args)
+	return time.perf_counter() - t0, res
+
+
+def main():
+	rnd = random.Random(SEED)
+	print(f'{"size":>6} {"mode":>5} {"python (ms)":>12} {"git (ms)":>10} {"identical":>10}')
+	for size in SIZES:
+		pairs = []
+		for _ in range(N_PAIRS):
+			line = makeLine(rnd, size)
+			pairs.append((line, modifyLine(rnd, line)))
+		for byCharacter in (False, True):
+			pyTimes = []
+			gitTimes = []
+			nIdentical = 0
+			for text1, text2 in pairs:
+				t, pyRes = timeIt(diffEngine.wordDiff, text1, text2, byCharacter)
+				pyTimes.append(t)
+				t, gitRes = timeIt(diffEngine.gitWordDiff, text1, text2, byCharacter)
+				gitTimes.append(t)
+				nIdentical += pyRes == gitRes
+			print('{size:>6} {mode:>5} {py:>12.2f} {git:>10.2f} {same:>7}/{n}'.format(
+				size=size,
+				mode='char' if byCharacter else 'word',
+				py=statistics.median(pyTimes) * 1000,
+				git=statistics.median(gitTimes) * 1000,
+				same=nIdentical,
+				n=N_PAIRS,
+			))
+
+
+main()
@@ -0,0 +1,57 @@
+# Benchmark of langChangeRate
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to measure the overhead of langChangeRate's speakNew per utterance, compared with calling the original
+speak method of the speech manager directly.
+The plugin is loaded outside NVDA with the stand-ins of nvdaStandIns.py; the stand-in speech manager does nothing,
+so that only the processing of the sequences is measured.
+"""
+
+import time
+
+import nvdaStandIns
+
+ITERATIONS = 200000
+REPEAT = 5
+
+
+def main():
+	speech = nvdaStandIns.install()
+	langChangeRate = nvdaStandIns.loadPlugin('langChangeRate')
+	plugin = langChangeRate.GlobalPlugin()
+	manager = speech._manager
+	LangChangeCommand = nvdaStandIns.LangChangeCommand
+	sequences = {
+		'plain text': ['Bonjour,', 'voici une phrase ordinaire sans changement de langue.'],
+		'long plain text': ['Un mot.'] * 50,
+		'language changes': [
+			'Le titre est',
+			LangChangeCommand('en_US'),
+			'The quick brown fox',
+			LangChangeCommand(None),
+			'et la suite.',
+		],
+	}
+	print(f'{"sequence":>18} {"direct (ns)":>12} {"speakNew (ns)":>14} {"overhead (ns)":>14}')
+	for name, seq in sequences.items():
+		times = {}
+		for label, speak in (('direct', langChangeRate.originalSpeak), ('speakNew', manager.speak)):
+			best = None
+			for r in range(REPEAT):
+				t0 = time.perf_counter()
+				for i in range(ITERATIONS):
+					speak(seq, 0)
+				t = (time.perf_counter() - t0) / ITERATIONS
+				best = t if best is None else min(best, t)
+			times[label] = best * 1e9
+		print('{name:>18} {direct:>12.0f} {new:>14.0f} {overhead:>14.0f}'.format(
+			name=name,
+			direct=times['direct'],
+			new=times['speakNew'],
+			overhead=times['speakNew'] - times['direct'],
+		))
+	plugin.terminate()
+
+
+main()
@@ -0,0 +1,192 @@
+# Benchmark of the language detection of langChangeRate
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to measure the accuracy and the latency of the language detector used by langChangeRate
+(globalPlugins/_langDetect.py) on a small labelled corpus of sentences which are not in its training texts.
+Each sentence is spoken with another default language, so that it should be reported in its own language;
+sentences in the default language (French) should not be annotated at all.
+The latency is measured per utterance, i.e. per call to LanguageDetector.annotate.
+"""
+
+import statistics
+import sys
+import time
+
+import nvdaStandIns
+
+sys.path.insert(0, nvdaStandIns.PLUGINS_FOLDER)
+import _langDetect  # noqa: E402
+
+DEFAULT_LANGUAGE = 'fr_FR'
+REPEAT = 200
+
+CORPUS = {
+	'en': [
+		"I forgot my umbrella on the bus yesterday evening.",
+		"Could you send me the address of the restaurant where we are meeting tonight?",
+		"The library will be closed for two weeks during the summer holidays.",
+		"My brother has been working as a nurse in the hospital for ten years.",
+		"Press the button twice to turn off the device.",
+		"We were surprised by how quickly the snow melted after the storm.",
+		"Nobody knows exactly why the old bridge was never repaired.",
+		"Her new song is much better than anything she has released before.",
+	],
+	'fr': [
+		"J'ai oublié mon parapluie dans le bus hier soir.",
+		"Pourriez-vous m'envoyer l'adresse du restaurant où nous nous retrouvons ce soir ?",
+		"La bibliothèque sera fermée pendant deux semaines au mois d'août.",
+		"Mon frère travaille comme infirmier à l'hôpital depuis dix ans.",
+		"Appuyez deux fois sur le bouton pour éteindre l'appareil.",
+		"Nous avons été surpris de voir la neige fondre si vite après la tempête.",
+		"Personne ne sait vraiment pourquoi le vieux pont n'a jamais été réparé.",
+		"Sa nouvelle chanson est bien meilleure que tout ce qu'elle a publié avant.",
+	],
+	'de': [
+		"Ich habe gestern Abend meinen Regenschirm im Bus vergessen.",
+		"Könnten Sie mir die Adresse des Restaurants schicken, in dem wir uns heute treffen?",
+		"Die Bibliothek wird in den Sommerferien zwei Wochen lang geschlossen sein.",
+		"Mein Bruder arbeitet seit zehn Jahren als Krankenpfleger im Krankenhaus.",
+		"Drücken Sie zweimal auf die Taste, um das Gerät auszuschalten.",
+		"Wir waren überrascht, wie schnell der Schnee nach dem Sturm geschmolzen ist.",
+		"Niemand weiß genau, warum die alte Brücke nie repariert wurde.",
+		"Ihr neues Lied ist viel besser als alles, was sie vorher veröffentlicht hat.",
+	],
+	'es': [
+		"Ayer por la noche olvidé mi paraguas en el autobús.",
+		"¿Podría enviarme la dirección del restaurante donde nos vemos esta noche?",
+		"La biblioteca estará cerrada durante dos semanas en las vacaciones de verano.",
+		"Mi hermano trabaja como enfermero en el hospital desde hace diez años.",
+		"Pulse el botón dos veces para apagar el aparato.",
+		"Nos sorprendió lo rápido que se derritió la nieve después de la tormenta.",
+		"Nadie sabe exactamente por qué nunca repararon el puente viejo.",
+		"Su nueva canción es mucho mejor que todo lo que ha publicado antes.",
+	],
+	'it': [
+		"Ieri sera ho dimenticato l'ombrello sull'autobus.",
+		"Potrebbe mandarmi l'indirizzo del ristorante dove ci vediamo stasera?",
+		"La biblioteca resterà chiusa per due settimane durante le vacanze estive.",
+		"Mio fratello lavora come infermiere in ospedale da dieci anni.",
+		"Premere due volte il pulsante per spegnere il dispositivo.",
+		"Siamo rimasti sorpresi dalla velocità con cui la neve si è sciolta dopo la tempesta.",
+		"Nessuno sa esattamente perché il vecchio ponte non sia mai stato riparato.",
+		"La sua nuova canzone è molto più bella di tutto quello che ha pubblicato prima.",
+	],
+	'pt': [
+		"Ontem à noite esqueci-me do guarda-chuva no autocarro.",
+		"Podia enviar-me a morada do restaurante onde nos encontramos esta noite?",
+		"A biblioteca vai estar fechada durante duas semanas nas férias de verão.",
+		"O meu irmão trabalha como enfermeiro no hospital há dez anos.",
+		"Carregue duas vezes no botão para desligar o aparelho.",
+		"Ficámos surpreendidos com a rapidez com que a neve derreteu depois da tempestade.",
+		"Ninguém sabe exatamente porque é que a ponte velha nunca foi reparada.",
+		"A sua nova canção é muito melhor do que tudo o que ela publicou antes.",
+	],
+	'nl': [
+		"Ik ben gisteravond mijn paraplu in de bus vergeten.",
+		"Kun je me het adres sturen van het restaurant waar we vanavond afspreken?",
+		"De bibliotheek is tijdens de zomervakantie twee weken gesloten.",
+		"Mijn broer werkt al tien jaar als verpleger in het ziekenhuis.",
+		"Druk twee keer op de knop om het apparaat uit te zetten.",
+		"We waren verbaasd hoe snel de sneeuw na de storm gesmolten was.",
+		"Niemand weet precies waarom de oude brug nooit is gerepareerd.",
+		"Haar nieuwe lied is veel beter dan alles wat ze eerder heeft uitgebracht.",
+	],
+	'ru': [
+		"Вчера вечером я забыл зонтик в автобусе.",
+		"Библиотека будет закрыта две недели во время летних каникул.",
+	],
+	'el': [
+		"Χθες το βράδυ ξέχασα την ομπρέλα μου στο λεωφορείο.",
+	],
+	'ar': [
+		"نسيت مظلتي في الحافلة مساء أمس.",
+	],
+	'he': [
+		"שכחתי את המטרייה שלי באוטובוס אתמול בערב.",
+	],
+	'zh': [
+		"我昨天晚上把雨伞忘在公共汽车上了。",
+	],
+	'ja': [
+		"昨日の夜、バスに傘を忘れました。",
+	],
+	'ko': [
+		"어제 저녁에 버스에 우산을 두고 내렸어요.",
+	],
+}
+
+# Utterances mixing the default language with another one: (sequence, expected languages in order).
+MIXED = [
+	(
+		["Le titre de ce livre est : The Old Man and the Sea, a short novel written in Cuba."],
+		[None, 'en'],
+	),
+	(
+		["Il m'a répondu en allemand : Ich habe leider keine Zeit, wir sehen uns morgen.", "Puis il est parti."],
+		[None, 'de', None],
+	),
+	(
+		["Le mot russe", "здравствуйте", "veut dire bonjour."],
+		[None, 'ru', None],
+	),
+]
+
+
+def getLanguages(sequence):
+	"""Return the languages of the LangChangeCommands of an annotated sequence, with None for the beginning."""
+	languages = [None]
+	for item in sequence:
+		if isinstance(item, nvdaStandIns.LangChangeCommand) and item.lang != languages[-1]:
+			languages.append(item.lang)
+	return languages
+
+
+def measure(detector, sequence):
+	"""Return the result of the annotation of sequence and its latencies in microseconds."""
+	times = []
+	for i in range(REPEAT):
+		t0 = time.perf_counter()
+		result = detector.annotate(sequence, DEFAULT_LANGUAGE, nvdaStandIns.LangChangeCommand)
+		times.append((time.perf_counter() - t0) * 1e6)
+	return result, times
+
+
+def main():
+	t0 = time.perf_counter()
+	detector = _langDetect.LanguageDetector()
+	buildTime = (time.perf_counter() - t0) * 1e3
+	model = detector.model
+	print(f'Model: {len(model.table)} trigrams for {len(model.languages)} languages, built in {buildTime:.1f} ms')
+	defaultRoot = DEFAULT_LANGUAGE.split('_')[0]
+	allTimes = []
+	totalOk = totalCount = 0
+	print(f'{"language":>8} {"accuracy":>9}')
+	for language, sentences in CORPUS.items():
+		expected = [None] if language == defaultRoot else [None, language]
+		ok = 0
+		for sentence in sentences:
+			result, times = measure(detector, [sentence])
+			allTimes.extend(times)
+			if getLanguages(result) == expected:
+				ok += 1
+			else:
+				print(f'  Error: {sentence!r} -> {getLanguages(result)[1:]}')
+		totalOk += ok
+		totalCount += len(sentences)
+		print(f'{language:>8} {ok:>4}/{len(sentences):<4}')
+	for sequence, expected in MIXED:
+		result, times = measure(detector, sequence)
+		allTimes.extend(times)
+		totalCount += 1
+		if getLanguages(result) == expected:
+			totalOk += 1
+		else:
+			print(f'  Error: {sequence!r} -> {getLanguages(result)}')
+	print(f'{"mixed":>8} {len(MIXED):>9} utterances')
+	print(f'Overall accuracy: {totalOk}/{totalCount} ({100 * totalOk / totalCount:.0f}%)')
+	quantiles = statistics.quantiles(allTimes, n=100)
+	print(f'Latency per utterance: p50 {quantiles[49]:.1f} us, p99 {quantiles[98]:.1f} us, max {max(allTimes):.1f} us')
+
+
+main()
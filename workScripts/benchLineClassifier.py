@@ -0,0 +1,111 @@
+# Benchmark of structDiff's line classifier
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to check that the fast line classifier of the md format (MarkdownFormat.parseLine) returns the same
+structures as the whole RE_LINE regexp (MarkdownFormat.parseLineRegex), and to measure the speedup.
+The results are compared on the md files found in the SRT checkout folder (if any), on a synthetic document and on
+random lines built from the characters significant for the classification. The speed is measured on the documents
+only, random lines being much shorter than real ones.
+"""
+
+import glob
+import os
+import random
+import sys
+import time
+
+import structDiff
+
+RANDOM_LINE_COUNT = 200000
+REPEAT = 5
+# Characters used to build random lines.
+ALPHABET = ' \t#*1.|<{}!-KC:ab>`[]()\xa0'
+KC_LINES = [
+	'<!-- KC:title: NVDA NVDA_VERSION Commands Quick Reference -->',
+	'<!-- KC:beginInclude -->',
+	'<!-- KC:endInclude -->',
+	'<!-- KC:settingsSection: || Name | Desktop key | Laptop key | Description | -->',
+	'<!-- KC:setting -->',
+	'<!-- KC:setting --> ',
+	' <!-- KC:setting -->',
+	'<!-- KC:title: NVDA NVDA_VERSION A->B -->',
+]
+
+
+SYNTHETIC_BLOCK = [
+	'## Section {i} {{#Section{i}}}\n',
+	'\n',
+	'This section describes the feature number {i}, which can be configured in [the settings](#Settings{i}).\n',
+	'The default value is `{i}`.\n',
+	'\n',
+	'* The first option of the feature {i}.\n',
+	'  * A sub-item with more details about the option.\n',
+	'1. A numbered step.\n',
+	'\n',
+	'| Name | Desktop key | Laptop key | Description |\n',
+	'|---|---|---|---|\n',
+	'| Feature {i} | `NVDA+{i}` | `NVDA+shift+{i}` | Toggles the feature {i} |\n',
+	'\n',
+	'<!-- KC:setting -->\n',
+	'\n',
+	'##### Option {i} {{#Option{i}}}\n',
+	'\n',
+]
+SYNTHETIC_BLOCK_COUNT = 2000
+
+
+def getDocumentLines(checkoutFolder):
+	lines = []
+	for path in sorted(glob.glob(os.path.join(checkoutFolder, '**', '*.md'), recursive=True)):
+		with open(path, encoding='utf8') as f:
+			lines.extend(f)
+	for i in range(SYNTHETIC_BLOCK_COUNT):
+		lines.extend(line.format(i=i) for line in SYNTHETIC_BLOCK)
+	return lines
+
+
+def getRandomLines():
+	lines = list(KC_LINES)
+	rnd = random.Random(0)
+	for n in range(RANDOM_LINE_COUNT):
+		line = ''.join(rnd.choice(ALPHABET) for i in range(rnd.randrange(12)))
+		# Make some lines look like real ones.
+		prefix = rnd.choice(['', '', '## ', '* ', '1. ', '| ', '<!-- KC:', '  '])
+		lines.append(prefix + line + rnd.choice(['', '\n']))
+	return lines
+
+
+def timeParser(parseLine, lines):
+	best = None
+	for i in range(REPEAT):
+		t0 = time.perf_counter()
+		for line in lines:
+			parseLine(line)
+		t = time.perf_counter() - t0
+		best = t if best is None else min(best, t)
+	return best
+
+
+def main():
+	checkoutFolder = sys.argv[1] if len(sys.argv) > 1 else structDiff.CHECKOUT_FOLDER_NAME
+	docFormat = structDiff.FORMATS['md']
+	lines = getDocumentLines(checkoutFolder)
+	nDiffs = 0
+	for line in lines + getRandomLines():
+		expected = docFormat.parseLineRegex(line)
+		res = docFormat.parseLine(line)
+		if res != expected:
+			nDiffs += 1
+			if nDiffs <= 10:
+				print(f'Different result for {line!r}:\n  regexp = {expected}\n  fast = {res}')
+	print(f'{nDiffs} different result(s)')
+	tRegex = timeParser(docFormat.parseLineRegex, lines)
+	tFast = timeParser(docFormat.parseLine, lines)
+	print(f'{"classifier":>10} {"time (s)":>9} {"lines/s":>10}')
+	print(f'{"regexp":>10} {tRegex:>9.3f} {len(lines) / tRegex:>10.0f}')
+	print(f'{"fast":>10} {tFast:>9.3f} {len(lines) / tFast:>10.0f}')
+	print(f'Speedup: {tRegex / tFast:.2f}')
+
+
+main()
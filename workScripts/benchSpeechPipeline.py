@@ -0,0 +1,268 @@
+# Benchmark of the speech pipeline with the speech patching plugins
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A headless harness to measure the latency added by the global plugins which patch NVDA's speech pipeline:
+- langChangeRate, which wraps speech._manager.speak: the time to first speech is measured for each recorded speech
+sequence, i.e. the time from the call to speak until the synth receives the sequence;
+- configDuringSayAll, which replaces scriptHandler.willSayAllResume: for each recorded gesture executed during say
+all, the time to decide whether say all resumes is measured (also with 1000 more registered scripts), and, when it
+resumes, the time from the gesture until the synth receives the next say all chunk;
+- configDuringSayAll changing the rate during say all, in the default mode, where say all is cancelled and restarted
+from the cursor, and in gap-free mode: the silence (time from the cancellation of speech until the synth receives
+speech again, 0 if speech is not cancelled), the number of chunks spoken twice and whether the new value is announced
+before the queued chunks are reported. The silence measured here does not include the time the synth needs to start
+speaking again after a cancellation.
+Each plugin is run alone with the stand-ins of nvdaStandIns.py and a fake synth timestamping each call, and compared
+with the same recording replayed without any plugin; the p50 and p99 latencies and their difference (overhead) are
+reported, so that regressions show up.
+
+The recording can be given in a JSON file (see RECORDING for its structure):
+python benchSpeechPipeline.py -r recording.json
+In speech sequences, strings are spoken text and objects are commands, e.g. {"lang": "en"} for a LangChangeCommand.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import nvdaStandIns
+
+REPEAT = 2000
+
+RECORDING = {
+	'speech': [
+		["Bonjour"],
+		["Fichier", "menu", "alt+f"],
+		["Le titre de la page est", {"lang": "en"}, "Welcome to our website", {"lang": None}, "et la suite."],
+		["Un paragraphe ordinaire, assez long, comme on en lit beaucoup lors de la lecture d'un document."],
+		["Citation :", {"lang": "de_DE"}, "Ich bin ein Berliner.", {"lang": "en_GB"}, "Thank you.", {"lang": None}],
+		["Ligne", "1", "colonne", "12"],
+		["Le livre s'appelle : The Old Man and the Sea, a short novel written by Ernest Hemingway in Cuba."],
+		["Le mot russe", "здравствуйте", "veut dire bonjour."],
+	],
+	# sayAllMode is the mode of the running say all: 0 for the caret, 1 for the review cursor.
+	'gestures': [
+		{"script": "increaseSynthSetting", "sayAllMode": 0},
+		{"script": "nextSynthSetting", "sayAllMode": 0},
+		{"script": "decreaseSynthSetting", "sayAllMode": 1},
+		{"script": "cycleSpeechSymbolLevel", "sayAllMode": 0},
+		{"script": "toggleReportCLDR", "sayAllMode": 1},
+		{"script": "previousSynthSetting", "sayAllMode": 0},
+		{"script": "reportCurrentFocus", "sayAllMode": 0},
+		{"script": "increaseSynthSetting", "sayAllMode": 0, "wasInSayAll": False},
+	],
+}
+
+# The chunk of text spoken when say all resumes.
+SAY_ALL_CHUNK = ["La lecture continue avec la phrase suivante du document."]
+
+# The chunks queued by say all when the rate is changed; the first one is being spoken.
+SAY_ALL_CHUNKS = [f"Phrase {i} du document, lue pendant la lecture continue." for i in range(8)]
+
+COMMANDS = {
+	'lang': nvdaStandIns.LangChangeCommand,
+	'rate': lambda offset: nvdaStandIns.RateCommand(offset=offset),
+	'pitch': lambda offset: nvdaStandIns.PitchCommand(offset=offset),
+	'volume': lambda offset: nvdaStandIns.VolumeCommand(offset=offset),
+}
+
+
+def decodeSequence(items):
+	seq = []
+	for item in items:
+		if isinstance(item, str):
+			seq.append(item)
+		else:
+			(name, value), = item.items()
+			seq.append(COMMANDS[name](value))
+	return seq
+
+
+def setUpLangChangeRate(detectLanguage=False):
+	plugin = nvdaStandIns.loadPlugin('langChangeRate').GlobalPlugin()
+	if detectLanguage:
+		plugin.script_toggleLanguageDetection(None)
+	return plugin
+
+
+def setUpConfigDuringSayAll(extraScripts=0):
+	"""Create configDuringSayAll's plugin, with extraScripts more registered scripts than the default ones."""
+	plugin = nvdaStandIns.loadPlugin('configDuringSayAll').GlobalPlugin()
+	if extraScripts:
+		section = sys.modules['config'].conf['configDuringSayAll']
+		section['scripts'] += ''.join(f', appModules.app{i}.AppModule.script{i}' for i in range(extraScripts))
+	return plugin
+
+
+def measureSpeech(sequences, setUp, repeat):
+	"""Return the list of the times to first speech in us of sequences, with the plugin created by setUp if any."""
+	synth = nvdaStandIns.TimestampingSynth()
+	speech = nvdaStandIns.install(synth)
+	plugin = setUp() if setUp else None
+	manager = speech._manager
+	latencies = []
+	try:
+		for r in range(repeat):
+			for seq in sequences:
+				t0 = time.perf_counter_ns()
+				manager.speak(seq, 0)
+				latencies.append((synth.calls[-1][0] - t0) / 1000)
+				synth.clear()
+	finally:
+		if plugin:
+			plugin.terminate()
+	return latencies
+
+
+def measureGestures(gestures, setUp, repeat):
+	"""Replay gestures with the plugin created by setUp if any, and return:
+	- the list of the times in us to decide whether say all resumes (scriptHandler.willSayAllResume);
+	- the list of the times in us from the gesture until the synth receives the next say all chunk, for the
+	gestures for which say all resumes;
+	- the number of gestures of the recording for which say all resumes.
+	"""
+	synth = nvdaStandIns.TimestampingSynth()
+	speech = nvdaStandIns.install(synth)
+	plugin = setUp() if setUp else None
+	manager = speech._manager
+	sayAllHandler = speech.sayAll.SayAllHandler
+	scriptHandler = sys.modules['scriptHandler']
+	commands = sys.modules['globalCommands'].commands
+	decisions = []
+	resumptions = []
+	try:
+		for r in range(repeat):
+			for g in gestures:
+				sayAllHandler.lastSayAllMode = g['sayAllMode']
+				gesture = nvdaStandIns.InputGesture(getattr(commands, 'script_' + g['script']), g.get('wasInSayAll', True))
+				t0 = time.perf_counter_ns()
+				resume = scriptHandler.willSayAllResume(gesture)
+				decisions.append((time.perf_counter_ns() - t0) / 1000)
+				gesture.script(gesture)
+				if resume:
+					manager.speak(SAY_ALL_CHUNK, 0)
+					resumptions.append((synth.calls[-1][0] - t0) / 1000)
+					synth.clear()
+	finally:
+		if plugin:
+			plugin.terminate()
+	return decisions, resumptions, len(resumptions) // repeat
+
+
+def measureReconfiguration(gapFree, repeat):
+	"""Replay a change of the rate during say all with configDuringSayAll and return the list of the silences in us,
+	the list of the times in us to execute the gesture, the number of chunks spoken twice per change and the
+	proportion of changes whose message reaches the synth before the queued chunks.
+	"""
+	synth = nvdaStandIns.TimestampingSynth()
+	speech = nvdaStandIns.install(synth)
+	plugin = setUpConfigDuringSayAll()
+	sys.modules['config'].conf['configDuringSayAll']['gapFree'] = gapFree
+	manager = speech._manager
+	pending = manager._priQueues[0].pendingSequences
+	sayAllHandler = speech.sayAll.SayAllHandler
+
+	def reader(mode):
+		# Say all restarts from the cursor, i.e. from the beginning of the chunk being spoken.
+		manager.speak([SAY_ALL_CHUNKS[0]], 0)
+		pending.extend([chunk] for chunk in SAY_ALL_CHUNKS[1:])
+
+	sayAllHandler.reader = reader
+	commands = sys.modules['globalCommands'].commands
+	silences = []
+	durations = []
+	repeated = announced = 0
+	try:
+		for r in range(repeat):
+			sayAllHandler.readText(sayAllHandler.CURSOR_CARET)
+			synth.clear()
+			synth.speak([SAY_ALL_CHUNKS[0]])
+			pending[:] = [[chunk] for chunk in SAY_ALL_CHUNKS[1:]]
+			gesture = nvdaStandIns.KeyboardInputGesture(commands.script_increaseSynthSetting)
+			t0 = time.perf_counter_ns()
+			nvdaStandIns.executeGesture(gesture)
+			durations.append((time.perf_counter_ns() - t0) / 1000)
+			if synth.cancels:
+				cancelTime = synth.cancels[0]
+				spoken = [(t, seq) for t, seq in synth.calls if t >= cancelTime]
+				silences.append((spoken[0][0] - cancelTime) / 1000 if spoken else 0)
+				repeated += sum(1 for t, seq in spoken if seq == [SAY_ALL_CHUNKS[0]])
+			else:
+				silences.append(0)
+			message = [f'rate {synth.rate}']
+			announced += any(seq == message for t, seq in synth.calls)
+	finally:
+		plugin.terminate()
+	return silences, durations, repeated / repeat, announced / repeat
+
+
+def getQuantiles(latencies):
+	quantiles = statistics.quantiles(latencies, n=100)
+	return quantiles[49], quantiles[98]
+
+
+def printResult(name, baseline, latencies):
+	base50, base99 = getQuantiles(baseline)
+	p50, p99 = getQuantiles(latencies)
+	print(f'{name:>28} {p50:>9.2f} {p99:>9.2f} {p50 - base50:>13.2f} {p99 - base99:>13.2f}')
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Measure the latency added by the speech patching plugins.")
+	parser.add_argument('-r', '--recording', help="JSON file of the speech sequences and gestures to replay (default: built-in recording)")
+	parser.add_argument('-n', '--repeat', type=int, default=REPEAT, help=f"number of replays of the recording (default: {REPEAT})")
+	args = parser.parse_args()
+	if args.recording:
+		with open(args.recording, encoding='utf8') as f:
+			recording = json.load(f)
+	else:
+		recording = RECORDING
+	sequences = [decodeSequence(items) for items in recording['speech']]
+	gestures = recording['gestures']
+	print(f'{len(sequences)} speech sequences and {len(gestures)} gestures replayed {args.repeat} times; times in us')
+	print(f'{"":>28} {"p50":>9} {"p99":>9} {"p50 overhead":>13} {"p99 overhead":>13}')
+
+	print('Time to first speech')
+	baseline = measureSpeech(sequences, None, args.repeat)
+	printResult('no plugin', baseline, baseline)
+	printResult('langChangeRate', baseline, measureSpeech(sequences, setUpLangChangeRate, args.repeat))
+	printResult(
+		'langChangeRate (detection)',
+		baseline,
+		measureSpeech(sequences, lambda: setUpLangChangeRate(detectLanguage=True), args.repeat),
+	)
+
+	print('Say all resumption decision')
+	baseline, baseResumptions, baseResumed = measureGestures(gestures, None, args.repeat)
+	decisions, resumptions, resumed = measureGestures(gestures, setUpConfigDuringSayAll, args.repeat)
+	printResult('no plugin', baseline, baseline)
+	printResult('configDuringSayAll', baseline, decisions)
+	printResult(
+		'configDuringSayAll (+1000)',
+		baseline,
+		measureGestures(gestures, lambda: setUpConfigDuringSayAll(extraScripts=1000), args.repeat)[0],
+	)
+	print(f'Gestures resuming say all: {baseResumed} without plugin, {resumed} with configDuringSayAll')
+	if resumptions:
+		# The overhead is relative to the time to speak the say all chunk directly.
+		print('Gesture to say all speech')
+		printResult('configDuringSayAll', measureSpeech([SAY_ALL_CHUNK], None, args.repeat), resumptions)
+
+	print('Rate change during say all')
+	print(f'{"":>28} {"silence p50":>12} {"silence p99":>12} {"gesture p50":>12} {"gesture p99":>12} {"repeated":>9} {"announced":>9}')
+	for name, gapFree in (('restart', False), ('gap-free', True)):
+		silences, durations, repeated, announced = measureReconfiguration(gapFree, args.repeat)
+		print('{name:>28} {s50:>12.2f} {s99:>12.2f} {d50:>12.2f} {d99:>12.2f} {repeated:>9.1f} {announced:>9.1f}'.format(
+			name=name,
+			s50=getQuantiles(silences)[0],
+			s99=getQuantiles(silences)[1],
+			d50=getQuantiles(durations)[0],
+			d99=getQuantiles(durations)[1],
+			repeated=repeated,
+			announced=announced,
+		))
+
+main()
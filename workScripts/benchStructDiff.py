@@ -0,0 +1,83 @@
+# Benchmark of structDiff
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to measure the throughput of structDiff, in lines per second, for each format.
+Synthetic English and locale documents are generated in a temporary folder; the locale document has a few
+structural errors, inserted and deleted lines. The check is timed without cache (every line is parsed) and with a
+warm cache (the line structures are read from the cache).
+"""
+
+import os
+import tempfile
+import time
+
+import structDiff
+
+LINE_COUNTS = [1000, 10000, 100000]
+
+# Blocks of lines of a synthetic document for each format.
+BLOCKS = {
+	'md': [
+		'## Section {i} {{#section{i}}}\n',
+		'\n',
+		'Some text about section {i}, see [section](#section{i}) and `code`.\n',
+		'* A bullet item {i}\n',
+		'* Another bullet item {i}\n',
+		'\n',
+		'| Name | Value {i} |\n',
+		'|---|---|\n',
+		'<!-- KC:setting -->\n',
+		'\n',
+	],
+	't2t': [
+		'++ Section {i} ++[section{i}]\n',
+		'\n',
+		'Some text about section {i}.\n',
+		'- A bullet item {i}\n',
+		'- Another bullet item {i}\n',
+		'\n',
+		'|| Name | Value {i} |\n',
+		'| a | b |\n',
+		'\n',
+		'\n',
+	],
+}
+
+
+def makeDocuments(formatName, lineCount):
+	"""Return the lines of the English and locale documents."""
+	block = BLOCKS[formatName]
+	enLines = [block[n % len(block)].format(i=n // len(block)) for n in range(lineCount)]
+	locLines = [line.replace('Some text', 'Du texte') for line in enLines]
+	for n in range(len(block) * 7, lineCount, len(block) * 97):
+		# A deleted line, an extra line and a structural error.
+		del locLines[n]
+		locLines.insert(n + 3, 'Extra line\n')
+		locLines[n + 5] = '#' + locLines[n + 5]
+	return enLines, locLines
+
+
+def main():
+	print(f'{"format":>6} {"lines":>7} {"cache":>6} {"errors":>7} {"time (s)":>9} {"lines/s":>10}')
+	with tempfile.TemporaryDirectory() as folder:
+		for formatName, docFormat in structDiff.FORMATS.items():
+			for lineCount in LINE_COUNTS:
+				enFile = os.path.join(folder, f'en{docFormat.extension}')
+				locFile = os.path.join(folder, f'loc{docFormat.extension}')
+				enLines, locLines = makeDocuments(formatName, lineCount)
+				with open(enFile, 'w', encoding='utf8') as f:
+					f.writelines(enLines)
+				with open(locFile, 'w', encoding='utf8') as f:
+					f.writelines(locLines)
+				cache = structDiff.StructureCache(os.path.join(folder, 'cache.pickle'), docFormat.parseLine)
+				# First run fills the cache, second run uses it.
+				for cacheLabel, runCache in (('no', None), ('cold', cache), ('warm', cache)):
+					t0 = time.perf_counter()
+					nErrors = sum(1 for e in structDiff.structDiff(enFile, locFile, docFormat, runCache))
+					t = time.perf_counter() - t0
+					nLines = len(enLines) + len(locLines)
+					print(f'{formatName:>6} {lineCount:>7} {cacheLabel:>6} {nErrors:>7} {t:>9.3f} {nLines / t:>10.0f}')
+
+
+main()
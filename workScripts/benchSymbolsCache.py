@@ -0,0 +1,76 @@
+# Benchmark of the compiled symbol dictionaries
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to compare the cold load time of symbol dictionaries parsed from their text form, as NVDA does, with
+their load from the compiled form of symbolsCache.py, for dictionaries of 250, 5000 and 50000 symbols.
+The dictionaries are made of the symbols of symbols-fr.dic followed by generated symbols (CJK ideographs).
+Each load starts from the files and creates new objects; the files themselves are in the cache of the OS.
+For the compiled form, the time of the first lookup and of the decoding of all the symbols are also reported, since
+the symbols are decoded lazily.
+"""
+
+import os
+import tempfile
+import time
+
+import symbolsCache
+
+SIZES = [250, 5000, 50000]
+REPEAT = 20
+
+
+def makeDictionary(path, size):
+	with open(symbolsCache.DEFAULT_FILES[0], encoding='utf_8_sig') as f:
+		lines = [line.rstrip('\n') for line in f if line.strip() and line.strip() != 'symbols:'][:size]
+	codePoints = list(range(0x4E00, 0xA000)) + list(range(0x20000, 0x2A6E0))
+	for cp in codePoints[:size - len(lines)]:
+		lines.append(f'{chr(cp)}\tidéogramme {cp:x}\tchar\tnorep')
+	with open(path, 'w', encoding='utf8') as f:
+		f.write('symbols:\n')
+		f.write('\n'.join(lines))
+		f.write('\n')
+
+
+def parseText(path):
+	with open(path, 'rb') as f:
+		source = f.read()
+	return symbolsCache.parseSymbols(source.decode('utf_8_sig', errors='replace'))
+
+
+def bestTime(func, *args):
+	best = None
+	for r in range(REPEAT):
+		t0 = time.perf_counter()
+		result = func(*args)
+		t = time.perf_counter() - t0
+		best = t if best is None else min(best, t)
+	return best * 1000, result
+
+
+def main():
+	print(f'{"symbols":>8} {"text (ms)":>10} {"compiled (ms)":>14} {"speedup":>8} {"1st lookup (ms)":>16} {"decode all (ms)":>16} {"size":>12}')
+	with tempfile.TemporaryDirectory() as folder:
+		for size in SIZES:
+			path = os.path.join(folder, f'symbols-{size}.dic')
+			makeDictionary(path, size)
+			symbolsCache.compileSymbols(path)
+			textTime, (complexSymbols, symbols, invalidLines) = bestTime(parseText, path)
+			compiledTime, table = bestTime(symbolsCache.loadSymbols, path)
+			if list(table) != list(symbols.values()):
+				raise RuntimeError(f'The compiled dictionary of {size} symbols differs from the text one')
+			identifier = list(symbols)[-1]
+			lookupTime, symbol = bestTime(lambda: symbolsCache.loadSymbols(path).get(identifier))
+			decodeTime, allSymbols = bestTime(lambda: list(symbolsCache.loadSymbols(path)))
+			print('{size:>8} {text:>10.2f} {compiled:>14.2f} {speedup:>7.1f}x {lookup:>16.2f} {decode:>16.2f} {fileSize:>12}'.format(
+				size=size,
+				text=textTime,
+				compiled=compiledTime,
+				speedup=textTime / compiledTime,
+				lookup=lookupTime,
+				decode=decodeTime,
+				fileSize=f'{os.path.getsize(path)} -> {os.path.getsize(symbolsCache.getCompiledPath(path))}',
+			))
+
+
+main()
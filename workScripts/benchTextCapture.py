@@ -0,0 +1,153 @@
+# Benchmark of diffMaker's text capture
+# Copyright (C) 2022 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to measure the throughput of diffMaker's chunked text capture without NVDA.
+A fake TextInfo backend working on a string is used; each call to one of its methods waits for CALL_LATENCY
+seconds to simulate the cost of a cross-process call.
+The chunked capture of textCapture is compared with the capture of the document line by line, i.e. by expanding
+a TextInfo to each line as GlobalPlugin.getCurrentLine does.
+"""
+
+import bisect
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'globalPlugins', 'diffMaker'))
+import textCapture  # noqa: E402
+
+# Simulated duration of a cross-process call, in seconds.
+CALL_LATENCY = 0.0001
+LINE_COUNTS = [1000, 5000, 20000]
+
+
+class FakeTextInfo:
+	"""A minimal offset based TextInfo on a string, supporting the line and character units."""
+
+	callCount = 0
+
+	def __init__(self, text, lineStarts, start, end):
+		self._text = text
+		# Offsets of the line boundaries, including the end of the text.
+		self._lineStarts = lineStarts
+		self._start = start
+		self._end = end
+
+	@classmethod
+	def fromText(cls, text):
+		lineStarts = [0]
+		pos = text.find('\n')
+		while pos != -1:
+			lineStarts.append(pos + 1)
+			pos = text.find('\n', pos + 1)
+		if lineStarts[-1] != len(text):
+			lineStarts.append(len(text))
+		return cls(text, lineStarts, 0, len(text))
+
+	@classmethod
+	def _call(cls):
+		cls.callCount += 1
+		t = time.perf_counter() + CALL_LATENCY
+		while time.perf_counter() < t:
+			pass
+
+	def copy(self):
+		return FakeTextInfo(self._text, self._lineStarts, self._start, self._end)
+
+	@property
+	def isCollapsed(self):
+		return self._start == self._end
+
+	@property
+	def text(self):
+		self._call()
+		return self._text[self._start:self._end]
+
+	def collapse(self, end=False):
+		if end:
+			self._start = self._end
+		else:
+			self._end = self._start
+
+	def expand(self, unit):
+		self._call()
+		if unit == textCapture.UNIT_LINE:
+			i = bisect.bisect_right(self._lineStarts, self._start) - 1
+			self._start = self._lineStarts[i]
+			self._end = self._lineStarts[min(i + 1, len(self._lineStarts) - 1)]
+		elif unit == textCapture.UNIT_CHARACTER:
+			self._end = min(self._start + 1, len(self._text))
+		else:
+			raise NotImplementedError(unit)
+
+	def move(self, unit, direction, endPoint=None):
+		self._call()
+		pos = self._end if endPoint == "end" else self._start
+		if unit == textCapture.UNIT_LINE:
+			i = bisect.bisect_right(self._lineStarts, pos) - 1
+			newI = max(0, min(i + direction, len(self._lineStarts) - 1))
+			moved = newI - i
+			newPos = self._lineStarts[newI]
+		elif unit == textCapture.UNIT_CHARACTER:
+			newPos = max(0, min(pos + direction, len(self._text)))
+			moved = newPos - pos
+		else:
+			raise NotImplementedError(unit)
+		if endPoint == "end":
+			self._end = newPos
+			self._start = min(self._start, newPos)
+		elif endPoint == "start":
+			self._start = newPos
+			self._end = max(self._end, newPos)
+		else:
+			self._start = self._end = newPos
+		return moved
+
+	def compareEndPoints(self, other, which):
+		self._call()
+		selfPos = self._start if which.startswith('start') else self._end
+		otherPos = other._start if which.endswith('ToStart') else other._end
+		return (selfPos > otherPos) - (selfPos < otherPos)
+
+	def setEndPoint(self, other, which):
+		self._call()
+		otherPos = other._start if which.endswith('ToStart') else other._end
+		if which.startswith('start'):
+			self._start = otherPos
+		else:
+			self._end = otherPos
+
+
+def captureLineByLine(rangeInfo):
+	"""Capture the text by expanding the TextInfo on each line, one line after the other."""
+	lines = []
+	ti = rangeInfo.copy()
+	ti.collapse()
+	while True:
+		line = ti.copy()
+		line.expand(textCapture.UNIT_LINE)
+		lines.append(line.text)
+		if ti.move(textCapture.UNIT_LINE, 1) == 0 or ti.compareEndPoints(rangeInfo, "startToEnd") >= 0:
+			break
+	return ''.join(lines)
+
+
+def main():
+	print(f'{"lines":>6} {"method":>13} {"calls":>7} {"time (s)":>9} {"lines/s":>10}')
+	for lineCount in LINE_COUNTS:
+		text = ''.join(f'Line {i} of the fake document, with a few words.\n' for i in range(lineCount))
+		for name, capture in (
+			('line by line', captureLineByLine),
+			('chunked', textCapture.captureText),
+		):
+			FakeTextInfo.callCount = 0
+			info = FakeTextInfo.fromText(text)
+			t0 = time.perf_counter()
+			res = capture(info)
+			t = time.perf_counter() - t0
+			assert res == text, f'Wrong text captured by {name}'
+			print(f'{lineCount:>6} {name:>13} {FakeTextInfo.callCount:>7} {t:>9.3f} {lineCount / t:>10.0f}')
+
+
+main()
@@ -0,0 +1,309 @@
+# Gesture index
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""An index of the keyboard gestures defined in NVDA's source code and of the shortcuts listed in the documentation.
+The gestures are extracted from the syntax tree of the Python files, which allows to find:
+- the gestures of the @script decorator (gesture="kb:..." and gestures=["kb:...", ...]);
+- the __gestures dictionaries of the classes, even on several lines;
+- the gestures bound with bindGesture or bindGestures;
+- the other gesture strings, e.g. in tables used to bind the gestures dynamically (commandTable in
+appModules/matlab.py); the script is then the other string of the same tuple, if any.
+
+The gestures and the shortcuts of the documentation are stored with their file and line in an SQLite database.
+Only the files modified since the previous update are parsed again.
+This module is used by undocumentedShortcuts.py.
+"""
+
+import ast
+from concurrent.futures import ProcessPoolExecutor
+import os
+import re
+import sqlite3
+
+# Default path of the SQLite database.
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.gestureIndex.sqlite')
+# To be incremented when the schema of the database or the extraction of the gestures changes.
+INDEX_VERSION = 1
+
+# A regexp matching a keyboard gesture identifier, e.g. "kb:NVDA+f1" or "kb(laptop):NVDA+control+f1".
+RE_KB_GESTURE = re.compile(r'^kb(?:\((?P<layout>desktop|laptop)\))?:(?P<shortcut>.+)$', re.I)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files(
+	path TEXT PRIMARY KEY,
+	kind TEXT NOT NULL,
+	mtime INTEGER NOT NULL,
+	size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gestures(
+	shortcut TEXT NOT NULL,
+	layout TEXT,
+	path TEXT NOT NULL,
+	line INTEGER NOT NULL,
+	script TEXT,
+	className TEXT
+);
+CREATE INDEX IF NOT EXISTS gesturesShortcut ON gestures(shortcut);
+CREATE INDEX IF NOT EXISTS gesturesPath ON gestures(path);
+CREATE INDEX IF NOT EXISTS gesturesScript ON gestures(script);
+CREATE TABLE IF NOT EXISTS docShortcuts(
+	shortcut TEXT NOT NULL,
+	path TEXT NOT NULL,
+	line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS docShortcutsShortcut ON docShortcuts(shortcut);
+CREATE INDEX IF NOT EXISTS docShortcutsPath ON docShortcuts(path);
+"""
+
+
+def parseGesture(text):
+	"""Return the (shortcut, layout) of a keyboard gesture identifier, or None if it is not a keyboard gesture.
+	The shortcut is lowercased, e.g. "nvda+f1"; layout is "desktop", "laptop" or None.
+	"""
+	m = RE_KB_GESTURE.match(text)
+	if not m:
+		return None
+	return m['shortcut'].lower(), m['layout'] and m['layout'].lower()
+
+def _getName(node):
+	if isinstance(node, ast.Name):
+		return node.id
+	if isinstance(node, ast.Attribute):
+		return node.attr
+	return None
+
+def _isString(node):
+	return isinstance(node, ast.Constant) and isinstance(node.value, str)
+
+
+class GestureExtractor(ast.NodeVisitor):
+	"""Collect the keyboard gestures of a syntax tree as (shortcut, layout, line, script, class name) tuples."""
+
+	def __init__(self):
+		self.gestures = []
+		self._classStack = []
+		# The string nodes already processed, not to be processed again by visit_Constant.
+		self._done = set()
+		# Child node -> parent node, for the tuples of gestures and scripts.
+		self._parents = {}
+
+	def extract(self, tree):
+		for parent in ast.walk(tree):
+			for child in ast.iter_child_nodes(parent):
+				self._parents[child] = parent
+		self.visit(tree)
+		return self.gestures
+
+	def _add(self, node, script):
+		if not _isString(node) or node in self._done:
+			return
+		self._done.add(node)
+		gesture = parseGesture(node.value)
+		if gesture is None:
+			return
+		className = self._classStack[-1] if self._classStack else None
+		self.gestures.append((gesture[0], gesture[1], node.lineno, script, className))
+
+	def _addDict(self, node):
+		for key, value in zip(node.keys, node.values):
+			script = value.value if _isString(value) else None
+			self._add(key, script)
+
+	def visit_ClassDef(self, node):
+		self._classStack.append(node.name)
+		self.generic_visit(node)
+		self._classStack.pop()
+
+	def visit_FunctionDef(self, node):
+		script = node.name[len('script_'):] if node.name.startswith('script_') else node.name
+		for decorator in node.decorator_list:
+			if isinstance(decorator, ast.Call) and _getName(decorator.func) == 'script':
+				for keyword in decorator.keywords:
+					if keyword.arg == 'gesture':
+						self._add(keyword.value, script)
+					elif keyword.arg == 'gestures' and isinstance(keyword.value, (ast.List, ast.Tuple, ast.Set)):
+						for elt in keyword.value.elts:
+							self._add(elt, script)
+		self.generic_visit(node)
+
+	visit_AsyncFunctionDef = visit_FunctionDef
+
+	def visit_Assign(self, node):
+		if (
+			isinstance(node.value, ast.Dict)
+			and any((_getName(target) or '').endswith('__gestures') for target in node.targets)
+		):
+			self._addDict(node.value)
+		self.generic_visit(node)
+
+	def visit_Call(self, node):
+		name = _getName(node.func)
+		if name == 'bindGesture' and len(node.args) >= 2:
+			self._add(node.args[0], node.args[1].value if _isString(node.args[1]) else None)
+		elif name == 'bindGestures' and node.args and isinstance(node.args[0], ast.Dict):
+			self._addDict(node.args[0])
+		self.generic_visit(node)
+
+	def visit_Constant(self, node):
+		if node in self._done or not _isString(node) or not node.value[:2].lower() == 'kb':
+			return
+		# A gesture defined elsewhere, e.g. in a table of (gesture, script) tuples.
+		script = None
+		parent = self._parents.get(node)
+		if isinstance(parent, ast.Tuple):
+			for elt in parent.elts:
+				if elt is not node and _isString(elt) and parseGesture(elt.value) is None:
+					script = elt.value
+					break
+		self._add(node, script)
+
+
+def extractGestures(path):
+	"""Return the list of the gestures of a Python file (see GestureExtractor), or None if it cannot be parsed."""
+	with open(path, 'rb') as f:
+		source = f.read()
+	# Cheap prefilter: a file without "kb" has no keyboard gesture.
+	if b'kb' not in source.lower():
+		return []
+	try:
+		tree = ast.parse(source, filename=path)
+	except (SyntaxError, ValueError):
+		return None
+	return GestureExtractor().extract(tree)
+
+def extractDocShortcuts(path, reShortcut):
+	"""Return the list of the (shortcut, line) found in a documentation file with the reShortcut regexp."""
+	shortcuts = []
+	with open(path, encoding='utf8') as f:
+		for lineNum, line in enumerate(f, 1):
+			for shortcut in reShortcut.findall(line):
+				shortcuts.append((shortcut.lower(), lineNum))
+	return shortcuts
+
+
+class GestureIndex:
+	"""The SQLite database of the gestures of the source code and of the shortcuts of the documentation."""
+
+	def __init__(self, path=INDEX_FILE):
+		self.path = path
+		self.connection = sqlite3.connect(path)
+		version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+		if version != INDEX_VERSION:
+			with self.connection:
+				for table in ('files', 'gestures', 'docShortcuts'):
+					self.connection.execute(f'DROP TABLE IF EXISTS {table}')
+				self.connection.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+		self.connection.executescript(SCHEMA)
+		#: Source files which could not be parsed during the last update.
+		self.failures = []
+
+	def close(self):
+		self.connection.close()
+
+	def _getModifiedFiles(self, kind, paths, removeUnlisted=True):
+		"""Return the list of the (path, mtime, size) of paths which are new or modified since the last update,
+		and remove from the index the files of this kind which are not in paths anymore (or which do not exist
+		anymore if removeUnlisted is False).
+		"""
+		known = {
+			path: (mtime, size)
+			for path, mtime, size in self.connection.execute('SELECT path, mtime, size FROM files WHERE kind = ?', (kind,))
+		}
+		modified = []
+		for path in paths:
+			st = os.stat(path)
+			key = (st.st_mtime_ns, st.st_size)
+			if known.pop(path, None) != key:
+				modified.append((path, key[0], key[1]))
+		for path in known:
+			if removeUnlisted or not os.path.exists(path):
+				self._removeFile(path)
+		return modified
+
+	def _removeFile(self, path):
+		self.connection.execute('DELETE FROM files WHERE path = ?', (path,))
+		self.connection.execute('DELETE FROM gestures WHERE path = ?', (path,))
+		self.connection.execute('DELETE FROM docShortcuts WHERE path = ?', (path,))
+
+	def _setFile(self, kind, path, mtime, size):
+		self._removeFile(path)
+		self.connection.execute('INSERT INTO files VALUES (?, ?, ?, ?)', (path, kind, mtime, size))
+
+	def updateSource(self, paths, jobs=None):
+		"""Update the gestures of the Python files paths; the modified files are parsed in a pool of processes.
+		Returns the number of files parsed.
+		"""
+		self.failures = []
+		with self.connection:
+			modified = self._getModifiedFiles('source', paths)
+			if not modified:
+				return 0
+			with ProcessPoolExecutor(max_workers=jobs) as executor:
+				results = executor.map(extractGestures, [path for path, mtime, size in modified], chunksize=32)
+				for (path, mtime, size), gestures in zip(modified, results):
+					self._setFile('source', path, mtime, size)
+					if gestures is None:
+						self.failures.append(path)
+						continue
+					self.connection.executemany(
+						'INSERT INTO gestures VALUES (?, ?, ?, ?, ?, ?)',
+						[(shortcut, layout, path, line, script, className) for shortcut, layout, line, script, className in gestures],
+					)
+		return len(modified)
+
+	def updateDoc(self, paths, reShortcut, jobs=None):
+		"""Update the shortcuts of the documentation files paths, found with the reShortcut regexp.
+		The modified files are parsed in a pool of processes. Returns the number of files parsed.
+		"""
+		with self.connection:
+			# The documentation files of the other languages are kept, e.g. for a later check of all the languages.
+			modified = self._getModifiedFiles('doc', paths, removeUnlisted=False)
+			if not modified:
+				return 0
+			with ProcessPoolExecutor(max_workers=jobs) as executor:
+				results = executor.map(
+					extractDocShortcuts,
+					[path for path, mtime, size in modified],
+					[reShortcut] * len(modified),
+				)
+				for (path, mtime, size), shortcuts in zip(modified, results):
+					self._setFile('doc', path, mtime, size)
+					self.connection.executemany(
+						'INSERT INTO docShortcuts VALUES (?, ?, ?)',
+						[(shortcut, path, line) for shortcut, line in shortcuts],
+					)
+		return len(modified)
+
+	def getSourceShortcuts(self):
+		return {row[0] for row in self.connection.execute('SELECT DISTINCT shortcut FROM gestures')}
+
+	def getDocShortcuts(self, path=None):
+		if path is None:
+			rows = self.connection.execute('SELECT DISTINCT shortcut FROM docShortcuts')
+		else:
+			rows = self.connection.execute('SELECT DISTINCT shortcut FROM docShortcuts WHERE path = ?', (path,))
+		return {row[0] for row in rows}
+
+	def findInSource(self, shortcut=None, script=None):
+		"""Return the (shortcut, layout, path, line, script, class name) of the gestures of the source code
+		matching shortcut or script (doc to code lookup).
+		"""
+		if shortcut is not None:
+			rows = self.connection.execute('SELECT * FROM gestures WHERE shortcut = ? ORDER BY path, line', (shortcut.lower(),))
+		else:
+			rows = self.connection.execute('SELECT * FROM gestures WHERE script = ? ORDER BY path, line', (script,))
+		return rows.fetchall()
+
+	def findInDoc(self, shortcut=None, script=None):
+		"""Return the (shortcut, path, line) where a shortcut, or the shortcuts of a script, are documented
+		(code to doc lookup).
+		"""
+		if shortcut is not None:
+			rows = self.connection.execute('SELECT * FROM docShortcuts WHERE shortcut = ? ORDER BY path, line', (shortcut.lower(),))
+		else:
+			rows = self.connection.execute(
+				'SELECT * FROM docShortcuts WHERE shortcut IN (SELECT shortcut FROM gestures WHERE script = ?) ORDER BY path, line',
+				(script,),
+			)
+		return rows.fetchall()
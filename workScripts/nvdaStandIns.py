@@ -0,0 +1,434 @@
+# Stand-ins for NVDA modules
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Minimal stand-ins for the NVDA modules used by the speech related global plugins of this repo and by diffMaker's
+worker, so that they can be loaded, benchmarked and tested outside NVDA, e.g. on Linux.
+Only the names used by the plugins are provided. Call install() before loading a plugin with loadPlugin().
+TimestampingSynth records the time of each sequence it receives, to measure the latency until speech.
+Calls scheduled with core.callLater are run by core.runPendingCalls, which plays the role of NVDA's main loop.
+"""
+
+import builtins
+import enum
+import heapq
+import importlib.util
+import itertools
+import os
+import re
+import sys
+import time
+import types
+
+PLUGINS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'globalPlugins')
+
+
+class Action:
+	"""Stand-in for extensionPoints.Action."""
+
+	def __init__(self):
+		self.handlers = []
+
+	def register(self, handler):
+		self.handlers.append(handler)
+
+	def unregister(self, handler):
+		self.handlers.remove(handler)
+
+	def notify(self, **kwargs):
+		for handler in list(self.handlers):
+			handler(**kwargs)
+
+
+class SpeechCommand:
+	pass
+
+
+class LangChangeCommand(SpeechCommand):
+
+	def __init__(self, lang):
+		self.lang = lang
+
+	def __repr__(self):
+		return f'LangChangeCommand({self.lang!r})'
+
+	def __eq__(self, other):
+		return type(self) is type(other) and self.lang == other.lang
+
+
+class _ParamCommand(SpeechCommand):
+
+	def __init__(self, offset=0, multiplier=1):
+		self.offset = offset
+		self.multiplier = multiplier
+
+	def __repr__(self):
+		return f'{type(self).__name__}(offset={self.offset}, multiplier={self.multiplier})'
+
+	def __eq__(self, other):
+		return type(self) is type(other) and (self.offset, self.multiplier) == (other.offset, other.multiplier)
+
+
+class RateCommand(_ParamCommand):
+	pass
+
+
+class PitchCommand(_ParamCommand):
+	pass
+
+
+class VolumeCommand(_ParamCommand):
+	pass
+
+
+class TimestampingSynth:
+	"""A fake synth which records the (time in ns, sequence) of each call to speak and the time of each call to
+	cancel.
+	"""
+
+	def __init__(self):
+		self.calls = []
+		self.cancels = []
+		self.rate = 50
+		self.pitch = 50
+		self.volume = 100
+
+	def speak(self, speechSequence):
+		self.calls.append((time.perf_counter_ns(), speechSequence))
+
+	def cancel(self):
+		self.cancels.append(time.perf_counter_ns())
+
+	def clear(self):
+		self.calls.clear()
+		self.cancels.clear()
+
+
+class MainLoop:
+	"""Stand-in for NVDA's main loop: the calls scheduled with core.callLater are only run by runPendingCalls, in the
+	order of their due time, as they would be on NVDA's main thread.
+	"""
+
+	def __init__(self):
+		self._pending = []
+		self._counter = itertools.count()
+
+	def callLater(self, delay, callable, *args, **kwargs):
+		"""Stand-in for core.callLater; delay is in ms."""
+		heapq.heappush(self._pending, (time.monotonic() + delay / 1000, next(self._counter), callable, args, kwargs))
+
+	def runPendingCalls(self):
+		"""Run the scheduled calls, including the ones scheduled meanwhile, whatever their delay.
+		Returns the number of calls run.
+		"""
+		count = 0
+		while self._pending:
+			due, n, callable, args, kwargs = heapq.heappop(self._pending)
+			callable(*args, **kwargs)
+			count += 1
+		return count
+
+
+class Spri(enum.IntEnum):
+	"""Stand-in for speech.priorities.Spri."""
+	NORMAL = 0
+	NEXT = 1
+	NOW = 2
+
+
+class _ManagerPriorityQueue:
+
+	def __init__(self):
+		self.pendingSequences = []
+
+
+class SpeechManager:
+	"""Stand-in for speech.manager.SpeechManager; speak sends the sequence to the synth, if any.
+	The sequences queued and not yet spoken, e.g. by say all, can be put in _priQueues[Spri.NORMAL].pendingSequences;
+	a sequence spoken with the normal priority is then queued after them, as in NVDA.
+	"""
+
+	def __init__(self, synth=None):
+		self.synth = synth
+		self._priQueues = {Spri.NORMAL: _ManagerPriorityQueue()}
+
+	def speak(self, speechSequence, priority):
+		pending = self._priQueues[Spri.NORMAL].pendingSequences
+		if priority == Spri.NORMAL and pending:
+			pending.append(speechSequence)
+		elif self.synth is not None:
+			self.synth.speak(speechSequence)
+
+	def cancel(self):
+		for queue in self._priQueues.values():
+			queue.pendingSequences.clear()
+		if self.synth is not None:
+			self.synth.cancel()
+
+
+_RE_SPEC_DEFAULT = re.compile(r"""^(?P<type>\w+)\(.*?default=(?P<default>"[^"]*"|'[^']*'|[^,)]*)""")
+
+
+def _getSpecDefault(spec):
+	"""Return the default value of a configobj validator specification such as "integer(default=-30,min=-100)"."""
+	m = _RE_SPEC_DEFAULT.match(spec)
+	if not m:
+		return None
+	value = m['default'].strip().strip('"\'')
+	if m['type'] == 'integer':
+		return int(value)
+	if m['type'] == 'float':
+		return float(value)
+	if m['type'] == 'boolean':
+		return value.lower() in ('true', '1', 'yes', 'on')
+	return value
+
+
+class _Spec(dict):
+	"""Stand-in for config.conf.spec: a section added to the spec is added to the configuration with its defaults."""
+
+	def __init__(self, conf):
+		super().__init__()
+		self._conf = conf
+
+	def __setitem__(self, key, value):
+		super().__setitem__(key, value)
+		self._conf.setdefault(key, self._getDefaults(value))
+
+	def _getDefaults(self, spec):
+		if isinstance(spec, dict):
+			return {k: self._getDefaults(v) for k, v in spec.items()}
+		return _getSpecDefault(spec)
+
+
+class ConfigManager(dict):
+	"""Stand-in for config.conf: nested dictionaries with a spec attribute."""
+
+	def __init__(self):
+		super().__init__()
+		self.spec = _Spec(self)
+		self['speech'] = {'autoDialectSwitching': False}
+		self['keyboard'] = {'allowSkimReadingInSayAll': True}
+
+
+class SayAllHandler:
+	"""Stand-in for speech.sayAll.SayAllHandler; lastSayAllMode is the mode of the current say all.
+	readText calls reader(mode), if any, to speak the text from the cursor.
+	"""
+	CURSOR_CARET = 0
+	CURSOR_REVIEW = 1
+
+	def __init__(self):
+		self.lastSayAllMode = None
+		self.running = False
+		self.reader = None
+
+	def isRunning(self):
+		return self.running
+
+	def stop(self):
+		self.running = False
+
+	def readText(self, mode):
+		self.lastSayAllMode = mode
+		self.running = True
+		if self.reader is not None:
+			self.reader(mode)
+
+
+class SettingsRing:
+	"""Stand-in for synthSettingsRing.SynthSettingsRing, on the rate, pitch and volume settings."""
+
+	class _Setting:
+		def __init__(self, id):
+			self.setting = types.SimpleNamespace(id=id)
+
+	def __init__(self):
+		self.settings = [self._Setting(id) for id in ('rate', 'pitch', 'volume')]
+		self._current = 0
+
+	@property
+	def currentSettingName(self):
+		return self.settings[self._current].setting.id
+
+	def _change(self, step):
+		synth = sys.modules['synthDriverHandler'].getSynth()
+		name = self.currentSettingName
+		value = getattr(synth, name) + step
+		setattr(synth, name, value)
+		return value
+
+	def increase(self):
+		return self._change(1)
+
+	def decrease(self):
+		return self._change(-1)
+
+
+class GlobalCommands:
+	"""Stand-in for globalCommands.GlobalCommands, with the scripts used by configDuringSayAll."""
+
+	def script_increaseSynthSetting(self, gesture):
+		ring = sys.modules['globalVars'].settingsRing
+		value = ring.increase()
+		sys.modules['ui'].message(f'{ring.currentSettingName} {value}')
+
+	def script_decreaseSynthSetting(self, gesture):
+		ring = sys.modules['globalVars'].settingsRing
+		value = ring.decrease()
+		sys.modules['ui'].message(f'{ring.currentSettingName} {value}')
+
+	def script_nextSynthSetting(self, gesture):
+		pass
+
+	def script_previousSynthSetting(self, gesture):
+		pass
+
+	def script_cycleSpeechSymbolLevel(self, gesture):
+		pass
+
+	def script_toggleReportCLDR(self, gesture):
+		pass
+
+	def script_reportCurrentFocus(self, gesture):
+		pass
+
+	def script_sayAll(self, gesture):
+		pass
+
+
+class InputGesture:
+	"""Stand-in for inputCore.InputGesture: the script bound to the gesture and whether say all was running."""
+	SPEECHEFFECT_CANCEL = 'cancel'
+	speechEffectWhenExecuted = SPEECHEFFECT_CANCEL
+
+	def __init__(self, script, wasInSayAll=True):
+		self.script = script
+		self.wasInSayAll = wasInSayAll
+
+
+class KeyboardInputGesture(InputGesture):
+
+	@property
+	def speechEffectWhenExecuted(self):
+		return self.SPEECHEFFECT_CANCEL
+
+
+def executeGesture(gesture):
+	"""Execute the script of gesture as NVDA's inputCore and scriptHandler do, as far as say all is concerned:
+	speech is cancelled according to the speech effect of the gesture, and say all is read again from the cursor
+	after the script if it should resume.
+	"""
+	sayAllHandler = sys.modules['speech.sayAll'].SayAllHandler
+	scriptHandler = sys.modules['scriptHandler']
+	gesture.wasInSayAll = sayAllHandler.isRunning()
+	if gesture.speechEffectWhenExecuted == gesture.SPEECHEFFECT_CANCEL:
+		sys.modules['speech'].cancelSpeech()
+	resumeSayAllMode = None
+	if scriptHandler.willSayAllResume(gesture):
+		resumeSayAllMode = sayAllHandler.lastSayAllMode
+	gesture.script(gesture)
+	if resumeSayAllMode is not None:
+		sayAllHandler.readText(resumeSayAllMode)
+
+
+def _makeModule(name, **attrs):
+	module = types.ModuleType(name)
+	module.__dict__.update(attrs)
+	sys.modules[name] = module
+	return module
+
+
+def install(synth=None, language='fr_FR'):
+	"""Install the stand-in modules in sys.modules and return the speech module.
+	The current language returned by speech.getCurrentLanguage is language.
+	"""
+	class GlobalPlugin:
+		def __init__(self, *args, **kwargs):
+			pass
+
+		def terminate(self):
+			pass
+
+	class _Log:
+		def __getattr__(self, name):
+			return lambda *args, **kwargs: None
+
+	def script(*args, **kwargs):
+		if args and callable(args[0]):
+			return args[0]
+		return lambda func: func
+
+	_makeModule('globalPluginHandler', GlobalPlugin=GlobalPlugin)
+	config = _makeModule(
+		'config',
+		conf=ConfigManager(),
+		post_configProfileSwitch=Action(),
+		post_configReset=Action(),
+	)
+	_makeModule('logHandler', log=_Log())
+	mainLoop = MainLoop()
+	_makeModule('core', callLater=mainLoop.callLater, runPendingCalls=mainLoop.runPendingCalls)
+	manager = SpeechManager(synth)
+
+	def message(text, speechPriority=None, brailleText=None):
+		manager.speak([text], Spri.NORMAL if speechPriority is None else speechPriority)
+
+	_makeModule('ui', message=message)
+	if not hasattr(builtins, '_'):
+		builtins._ = lambda text: text
+	sayAllHandler = SayAllHandler()
+
+	def willSayAllResume(gesture):
+		# As in NVDA's scriptHandler.
+		return (
+			config.conf['keyboard']['allowSkimReadingInSayAll']
+			and gesture.wasInSayAll
+			and getattr(gesture.script, 'resumeSayAllMode', None) == sayAllHandler.lastSayAllMode
+		)
+
+	_makeModule('scriptHandler', script=script, willSayAllResume=willSayAllResume)
+	_makeModule('globalCommands', GlobalCommands=GlobalCommands, commands=GlobalCommands())
+	_makeModule('globalVars', settingsRing=SettingsRing())
+	_makeModule('synthDriverHandler', getSynth=lambda: synth)
+	_makeModule('keyboardHandler', KeyboardInputGesture=KeyboardInputGesture)
+	commands = _makeModule(
+		'speech.commands',
+		SpeechCommand=SpeechCommand,
+		LangChangeCommand=LangChangeCommand,
+		RateCommand=RateCommand,
+		PitchCommand=PitchCommand,
+		VolumeCommand=VolumeCommand,
+	)
+	sayAll = _makeModule('speech.sayAll', SayAllHandler=sayAllHandler)
+	priorities = _makeModule('speech.priorities', Spri=Spri)
+
+	def cancelSpeech():
+		sayAllHandler.stop()
+		manager.cancel()
+
+	speech = _makeModule(
+		'speech',
+		commands=commands,
+		sayAll=sayAll,
+		priorities=priorities,
+		_manager=manager,
+		cancelSpeech=cancelSpeech,
+		getCurrentLanguage=lambda: language,
+	)
+	speech.__path__ = []
+	return speech
+
+
+def loadPlugin(name):
+	"""Load the global plugin module name of this repo (installed stand-ins are used for NVDA's modules).
+	As in NVDA, the module is loaded in the globalPlugins package, so that it can import its helper modules.
+	"""
+	if 'globalPlugins' not in sys.modules:
+		_makeModule('globalPlugins').__path__ = [PLUGINS_FOLDER]
+	fullName = f'globalPlugins.{name}'
+	spec = importlib.util.spec_from_file_location(fullName, os.path.join(PLUGINS_FOLDER, name + '.py'))
+	module = importlib.util.module_from_spec(spec)
+	sys.modules[fullName] = module
+	spec.loader.exec_module(module)
+	return module
@@ -0,0 +1,887 @@
+# Structure difference
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to check the structure of NVDA's documentation files (either Changes of User Guide).
+This script aligns the lines of the locale version with the English one according to their structure (headings,
+anchors, bullets, tables, KC tags), checks if the aligned lines match and prints the errors found, as well as the
+missing or extra lines. For md files, the anchors of the whole document are also checked (see AnchorIndex).
+If no error is found, nothing is printed on the output.
+
+The files may be in Markdown (md) or in txt2tags (t2t) format; each format is handled by a format plugin (see
+DocFormat) while the alignment, the cache, the parallel execution and the reports are common.
+Each file is read only once per run: its lines are used both to align the structures and to compare the lines.
+The lines of both files are thus kept in memory during the check, which is a few megabytes for the largest
+documents; the former streaming reading kept a flat memory use but read each file three times.
+
+When executed without argument, the language and the file checked are defined by the corresponding constants.
+Use the --all option to check all the locales (both changes and userGuide files) in parallel; the errors are then
+reported sorted by language. The report can also be written in JSON or JUnit XML format.
+Use the --watch option to check the locale file again each time it is saved, e.g. while translating; only the
+edited lines are checked again. Use --help for the other options.
+
+To be executed, the script needs to be placed at the same level as the folder containing the screenreaderstranslations checkout, called "SRT" (also modifiable in a  constant).
+"""
+
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+# Constants to modify manually if needed.
+CHECKOUT_FOLDER_NAME = "SRT"
+LANGUAGE = "fr"
+# FILE = "changes"  # Either "changes" or "userGuide"
+FILE = "userGuide"  # Either "changes" or "userGuide"
+
+# Set to True to check blank at end of line. It is currently disabled due to the high number of diffs in
+# the change log (French)
+CHECK_TAILING_SPACES = False
+
+CHECK_CODE_FORMATTING = True
+
+# Set to True to check the anchors defined and referenced in the whole document (md only).
+CHECK_ANCHORS = True
+
+
+FILES = ("changes", "userGuide")
+
+# Folder where the line structures are cached between two runs, one file per language, file and format.
+CACHE_FOLDER = ".structDiffCache"
+# Interval between two checks of the modification of the locale file in watch mode, in seconds.
+WATCH_INTERVAL = 0.3
+
+# To be incremented when the format of the cache or the structure returned by parseLine changes.
+CACHE_VERSION = 2
+
+
+class DocFormat:
+	"""Base class of the format plugins.
+	The structure of a line returned by parseLine is a tuple whose first element is the kind of line ("blank",
+	"noMatch" or any other value defined by the format) and whose last element is the tailing spaces.
+	The other elements, together with the kind, form the signature used to align the lines of both files.
+	"""
+
+	#: Name of the format, used on the command line.
+	name = None
+	#: Extension of the files in this format.
+	extension = None
+
+	def parseLine(self, line):
+		raise NotImplementedError
+
+	def compareStructures(self, s1, s2):
+		"""Compare the structures of two different lines; returns an error message or None."""
+		raise NotImplementedError
+
+	def compareLineContents(self, l1, l2):
+		"""Compare the content of two lines; returns an error message or None."""
+		return None
+
+	def checkDocument(self, enLines, locLines):
+		"""Yield the errors which concern the whole documents rather than aligned lines.
+		enLines and locLines are iterables over the lines of the English and locale files.
+		Errors have the same form as the ones yielded by structDiff.
+		"""
+		return iter(())
+
+	def lineErrors(self, l1, l2, s1, s2):
+		"""Return the list of the error messages for two aligned lines, whose structures are s1 and s2."""
+		errors = []
+		for err in (self.compareLines(l1, l2, s1, s2), self.compareLineContents(l1, l2)):
+			if err is not None:
+				errors.append(err)
+		return errors
+
+	def compareLines(self, l1, l2, s1=None, s2=None):
+		"""Compare the structure of two lines and returns an appropriate error message if a difference is found.
+		If no structural difference is found, returns None.
+		s1 and s2 are the structures of the lines returned by parseLine; they are computed if not provided.
+		"""
+		if l1 == l2:
+			return None
+		if s1 is None:
+			s1 = self.parseLine(l1)
+		if s2 is None:
+			s2 = self.parseLine(l2)
+		if s1[0] in ('blank', 'noMatch') or s2[0] in ('blank', 'noMatch'):
+			return 'No match'
+		return self.compareStructures(s1, s2)
+
+
+class MarkdownFormat(DocFormat):
+
+	name = "md"
+	extension = ".md"
+
+	# A regexp matching any line of the file
+	RE_LINE = re.compile(r"""
+		^
+		(  # Tags
+			<!--\ KC:(?P<kcTag>
+				(title:\ NVDA\ NVDA_VERSION\ ([^-](?!->))+)
+				|(beginInclude)
+				|(endInclude)
+				|(settingsSection:\ ([^-](?!->))+)
+				|(setting)
+			)\ -->
+		)
+		|(
+			# Blank at the beginning of the line
+			(?P<headingSpaces>[ \t]*(?![ \t]))
+			(
+				# Headings
+				((?P<preHeading>[#]+)\ [^{]+(?P<anchor>\ \{[^}]+\})?)
+				# Bullet items in list: begins with "* " or "1. "
+				|(
+					(?P<bullet>(\*|(1\.))\ )
+					(.+)
+				)
+				# Table row
+				|(\|(?P<tableCells>([^|]*\|)+))
+				# Other text: do not begin with "#", "|", "*", "<" or "1. ".
+				|(?P<normalText>([^#|*<1]|(1(?!\.\ ))).*)
+			)
+			# Blank at the end of the line
+			(?P<tailingSpaces>(?<![ \t])[ \t]*)
+		)
+		$
+	""", re.VERBOSE)
+
+	# A regexp matching an link to an anchor in the document.
+	RE_ANCHOR_LINK = re.compile(r'\[[^]]+\]\(#(?P<anchor>[^)]+)\)')
+	RE_CODE_FORMATTING_DELIMITER = re.compile(r'(?<!`)`(?!`)')
+	# A regexp matching the definition of an anchor, e.g. at the end of a heading.
+	RE_ANCHOR_DEFINITION = re.compile(r'\{#(?P<anchor>[^}]+)\}')
+
+	# Small patterns used by parseLine, each one equivalent to an alternative of RE_LINE.
+	RE_KC_LINE = re.compile(r"<!--\ KC:(?P<kcTag>(title:\ NVDA\ NVDA_VERSION\ ([^-](?!->))+)|beginInclude|endInclude|(settingsSection:\ ([^-](?!->))+)|setting)\ -->")
+	RE_HEADING_LINE = re.compile(r"(?P<preHeading>[#]+)\ [^{]+(?P<anchor>\ \{[^}]+\})?(?P<tailingSpaces>(?<![ \t])[ \t]*)$")
+	RE_TABLE_LINE = re.compile(r"\|(?P<tableCells>([^|]*\|)+)(?P<tailingSpaces>(?<![ \t])[ \t]*)$")
+
+	def parseLine(self, line):
+		"""Returns a (kind, KC tag, heading spaces, heading level, anchor, bullet, number of table cells,
+		tailing spaces) tuple, where kind is "blank", "noMatch", "kc" or "line".
+		The result is the same as the one of parseLineRegex, but the line is dispatched on its first significant
+		character so that normal text and bullets are parsed without regexp and the other lines with a small one.
+		"""
+		if line.endswith('\n'): line = line[:-1]
+		if not line.strip():
+			return ('blank', None, None, None, None, None, 0, line)
+		content = line.lstrip(' \t')
+		headingSpaces = line[:len(line) - len(content)]
+		first = content[0]
+		if first == '<':
+			m = self.RE_KC_LINE.match(line)
+			if not m:
+				return ('noMatch', None, None, None, None, None, 0, None)
+			return ('kc', m['kcTag'], None, None, None, None, 0, None)
+		if first == '#':
+			m = self.RE_HEADING_LINE.match(content)
+			if not m:
+				return ('noMatch', None, None, None, None, None, 0, None)
+			return ('line', None, headingSpaces, m['preHeading'], m['anchor'], None, 0, m['tailingSpaces'])
+		if first == '|':
+			m = self.RE_TABLE_LINE.match(content)
+			if not m:
+				return ('noMatch', None, None, None, None, None, 0, None)
+			return ('line', None, headingSpaces, None, None, None, m['tableCells'].count('|'), m['tailingSpaces'])
+		text = content.rstrip(' \t')
+		tailingSpaces = content[len(text):]
+		bullet = None
+		if first == '*' or content.startswith('1. '):
+			bullet = '* ' if first == '*' else '1. '
+			# The bullet must be followed by some text.
+			if not content.startswith(bullet) or len(text) <= len(bullet):
+				return ('noMatch', None, None, None, None, None, 0, None)
+		return ('line', None, headingSpaces, None, None, bullet, 0, tailingSpaces)
+
+	def parseLineRegex(self, line):
+		"""Same as parseLine, but with the whole RE_LINE regexp. Used as a reference by benchLineClassifier.py."""
+		if line.endswith('\n'): line = line[:-1]
+		if not line.strip():
+			return ('blank', None, None, None, None, None, 0, line)
+		m = self.RE_LINE.match(line)
+		if not m:
+			return ('noMatch', None, None, None, None, None, 0, None)
+		nPipes = m['tableCells'].count('|') if m['tableCells'] else 0
+		return (
+			'kc' if m['kcTag'] else 'line',
+			m['kcTag'],
+			m['headingSpaces'],
+			m['preHeading'],
+			m['anchor'],
+			m['bullet'],
+			nPipes,
+			m['tailingSpaces'],
+		)
+
+	def compareStructures(self, s1, s2):
+		kind1, kcTag1, headingSpaces1, preHeading1, anchor1, bullet1, nPipe1, tailingSpaces1 = s1
+		kind2, kcTag2, headingSpaces2, preHeading2, anchor2, bullet2, nPipe2, tailingSpaces2 = s2
+		if headingSpaces1 != headingSpaces2:
+			return 'No same heading spaces'
+		if preHeading1 != preHeading2:
+			return 'No same heading level'
+		if anchor1 != anchor2:
+			return 'No same anchor'
+		if bullet1 != bullet2:
+			return f'No same bullet ("{bullet1}" / "{bullet2}")'
+		if nPipe1 != nPipe2:
+			return f'No same table celll number ({nPipe1} / {nPipe2})'
+		if CHECK_TAILING_SPACES and tailingSpaces1 != tailingSpaces2:
+			return 'No same blank characters at the end of the line'
+		return None
+
+	def compareLineContents(self, l1, l2):
+		"""Compare the content of two lines and returns an appropriate error message if a difference is found.
+		The content being compared is:
+		- the anchor links
+		- the presence of code formatting
+		"""
+		if l1.endswith('\n'): l1 = l1[:-1]
+		if l2.endswith('\n'): l2 = l2[:-1]
+		f1 = self.RE_ANCHOR_LINK.findall(l1)
+		f2 = self.RE_ANCHOR_LINK.findall(l2)
+		if set(f1) != set(f2):
+			return 'No same anchor(s)'
+		if CHECK_CODE_FORMATTING:
+			n1 = len(self.RE_CODE_FORMATTING_DELIMITER.findall(l1))
+			n2 = len(self.RE_CODE_FORMATTING_DELIMITER.findall(l2))
+			if n1 != n2:
+				return f'No same number of code formatting delimiters (`): {n1} / {n2}'
+		return None
+
+	def checkDocument(self, enLines, locLines):
+		"""Check the anchors of the locale file against the ones of the English file:
+		- anchors defined more than once in the locale file
+		- anchors defined only in one of the files
+		- links of the locale file to anchors which are not defined in the locale file, distinguishing the anchors
+		which are defined in the English file, i.e. whose definition has not been translated
+		- links of the English file to anchors which are not defined in the English file, since the locale file
+		cannot be right if the English one is wrong
+		"""
+		if not CHECK_ANCHORS:
+			return
+		en = AnchorIndex.fromLines(enLines, self.RE_ANCHOR_DEFINITION, self.RE_ANCHOR_LINK)
+		loc = AnchorIndex.fromLines(locLines, self.RE_ANCHOR_DEFINITION, self.RE_ANCHOR_LINK)
+		for anchor, definitions in loc.definitions.items():
+			for lineNum, line in definitions[1:]:
+				yield (None, lineNum, f'Duplicate anchor "{anchor}"', None, line)
+		for anchor, definitions in en.definitions.items():
+			if anchor not in loc.definitions:
+				lineNum, line = definitions[0]
+				yield (lineNum, None, f'Anchor "{anchor}" not defined in locale', line, None)
+		for anchor, definitions in loc.definitions.items():
+			if anchor not in en.definitions:
+				lineNum, line = definitions[0]
+				yield (None, lineNum, f'Anchor "{anchor}" not defined in English', None, line)
+		for anchor, references in loc.references.items():
+			if anchor not in loc.definitions:
+				if anchor in en.definitions:
+					msg = f'Link to anchor "{anchor}" only defined in English'
+				else:
+					msg = f'Link to undefined anchor "{anchor}"'
+				for lineNum, line in references:
+					yield (None, lineNum, msg, None, line)
+		for anchor, references in en.references.items():
+			if anchor not in en.definitions:
+				for lineNum, line in references:
+					yield (lineNum, None, f'Link to undefined anchor "{anchor}" in English', line, None)
+
+
+class T2tFormat(DocFormat):
+
+	name = "t2t"
+	extension = ".t2t"
+
+	RE_LINE = re.compile(r"""
+		^
+		(?P<headingSpaces>[ \t]*(?![ \t]))
+		(
+			((?P<preHeading>[=+]+)\ .+\ (?P=preHeading)(?P<anchor>\[[^]]+\])?)
+			|(
+				(?P<bullet>[-+]\ *)
+				(.*)
+			)
+			|((?P<tableFirst>\|\|?)(?P<tableCells>(\ [^|]+ \|)+))
+			|(?P<normalText>[^=|+-].*)
+		)
+		(?P<tailingSpaces>(?<![ \t])[ \t]*)
+		$
+	""", re.VERBOSE)
+
+	def parseLine(self, line):
+		"""Returns a (kind, heading spaces, pre-heading marker, anchor, bullet, table first, number of table cells,
+		tailing spaces) tuple, where kind is "blank", "noMatch" or "line".
+		"""
+		if line.endswith('\n'): line = line[:-1]
+		if not line.strip():
+			return ('blank', None, None, None, None, None, 0, line)
+		m = self.RE_LINE.match(line)
+		if not m:
+			return ('noMatch', None, None, None, None, None, 0, None)
+		nPipes = m['tableCells'].count('|') if m['tableCells'] else 0
+		return (
+			'line',
+			m['headingSpaces'],
+			m['preHeading'],
+			m['anchor'],
+			m['bullet'],
+			m['tableFirst'],
+			nPipes,
+			m['tailingSpaces'],
+		)
+
+	def compareStructures(self, s1, s2):
+		kind1, headingSpaces1, preHeading1, anchor1, bullet1, tableFirst1, nPipe1, tailingSpaces1 = s1
+		kind2, headingSpaces2, preHeading2, anchor2, bullet2, tableFirst2, nPipe2, tailingSpaces2 = s2
+		if headingSpaces1 != headingSpaces2:
+			return 'No same heading spaces'
+		if preHeading1 != preHeading2:
+			return 'No same pre-heading marker'
+		if anchor1 != anchor2:
+			return 'No same anchor'
+		if bullet1 != bullet2:
+			return 'No same bullet'
+		if tableFirst1 != tableFirst2:
+			return 'No same table first'
+		if nPipe1 != nPipe2:
+			return f'No same table celll number ({nPipe1} / {nPipe2})'
+		if CHECK_TAILING_SPACES and tailingSpaces1 != tailingSpaces2:
+			return 'No same tailing spaces'
+		return None
+
+
+FORMATS = {docFormat.name: docFormat for docFormat in (MarkdownFormat(), T2tFormat())}
+
+
+def lineSignature(structure):
+	"""Return the structural signature of a line from its structure returned by parseLine, i.e. the elements of
+	its structure which should be the same in the English and the locale versions.
+	"""
+	return structure[:-1]
+
+def lineHash(line):
+	return hashlib.blake2b(line.encode('utf8'), digest_size=8).digest()
+
+def iterFileLines(path):
+	with open(path, encoding="utf8") as f:
+		yield from f
+
+class AnchorIndex:
+	"""The anchors defined and referenced in a file, built in one pass over its lines.
+	definitions and references map each anchor to the list of the (line number, line) where it appears.
+	"""
+
+	def __init__(self):
+		self.definitions = {}
+		self.references = {}
+
+	@classmethod
+	def fromLines(cls, lines, reDefinition, reReference):
+		index = cls()
+		for lineNum, line in enumerate(lines, 1):
+			# Most lines contain neither definition nor link.
+			if '{#' in line:
+				for anchor in reDefinition.findall(line):
+					index.definitions.setdefault(anchor, []).append((lineNum, line))
+			if '](#' in line:
+				for anchor in reReference.findall(line):
+					index.references.setdefault(anchor, []).append((lineNum, line))
+		return index
+
+class StructureCache:
+	"""A persistent cache of the line structures returned by parseLine.
+	Structures are stored by line hash, and the list of the line hashes of each file is stored with the revision,
+	modification time and size of the file. Thus an unmodified file is not parsed again, and in a modified file (e.g.
+	a new English revision), only the lines which did not exist in the previously cached files are parsed.
+	"""
+
+	def __init__(self, path, parseLine):
+		self.path = path
+		self.parseLine = parseLine
+		# File path -> ((revision, modification time, size), list of line hashes)
+		self._files = {}
+		# Line hash -> structure
+		self._lines = {}
+		self._modified = False
+		try:
+			with open(path, 'rb') as f:
+				data = pickle.load(f)
+			if data['version'] == CACHE_VERSION:
+				self._files = data['files']
+				self._lines = data['lines']
+		except (OSError, EOFError, pickle.UnpicklingError, KeyError, TypeError):
+			pass
+
+	def readFile(self, filePath, revision=None):
+		"""Read filePath and return the list of its lines and the list of their structures."""
+		# The file is stat'ed before being read, so that a modification during the reading is seen by the next run.
+		st = os.stat(filePath)
+		key = (revision, st.st_mtime_ns, st.st_size)
+		entry = self._files.get(filePath)
+		if entry is not None and entry[0] == key:
+			return list(iterFileLines(filePath)), [self._lines[h] for h in entry[1]]
+		# The lines are hashed and parsed while they are read.
+		lines = []
+		hashes = []
+		structures = []
+		for line in iterFileLines(filePath):
+			lines.append(line)
+			h = lineHash(line)
+			structure = self._lines.get(h)
+			if structure is None:
+				structure = self._lines[h] = self.parseLine(line)
+			hashes.append(h)
+			structures.append(structure)
+		self._files[filePath] = (key, hashes)
+		self._modified = True
+		return lines, structures
+
+	def save(self):
+		if not self._modified:
+			return
+		# Forget the files which do not exist anymore and the lines which are not in any cached file.
+		self._files = {path: entry for path, entry in self._files.items() if os.path.exists(path)}
+		usedHashes = set()
+		for key, hashes in self._files.values():
+			usedHashes.update(hashes)
+		self._lines = {h: s for h, s in self._lines.items() if h in usedHashes}
+		folder = os.path.dirname(self.path)
+		if folder:
+			os.makedirs(folder, exist_ok=True)
+		tmpPath = self.path + '.tmp'
+		with open(tmpPath, 'wb') as f:
+			pickle.dump({'version': CACHE_VERSION, 'files': self._files, 'lines': self._lines}, f)
+		os.replace(tmpPath, self.path)
+		self._modified = False
+
+def getCache(language, file, docFormat):
+	return StructureCache(
+		os.path.join(CACHE_FOLDER, f'{language}-{file}-{docFormat.name}.pickle'),
+		docFormat.parseLine,
+	)
+
+def findLatestFolder(folder):
+	latest = None
+	for f in os.listdir(folder):
+		num = int(f)
+		if not latest or latest < num:
+			latest = num
+	if latest:
+		return os.path.join(folder, str(latest))
+	raise FileNotFoundError(f'No revision in {folder}')
+
+def getFilePaths(language, file, docFormat, checkoutFolder=CHECKOUT_FOLDER_NAME):
+	"""Return the paths of the latest English revision and of the locale version of file ("changes" or "userGuide").
+	"""
+	base = os.path.join(checkoutFolder, language)
+	fileName = file + docFormat.extension
+	enFile = os.path.join(findLatestFolder(os.path.join(base, f'{file}-newRevisions')), fileName)
+	return enFile, os.path.join(base, fileName)
+
+def findLocales(docFormat, checkoutFolder=CHECKOUT_FOLDER_NAME):
+	"""Return the sorted list of the languages of the checkout folder having at least one file to check."""
+	locales = []
+	for language in sorted(os.listdir(checkoutFolder)):
+		base = os.path.join(checkoutFolder, language)
+		if any(
+			os.path.isfile(os.path.join(base, file + docFormat.extension))
+			and os.path.isdir(os.path.join(base, f'{file}-newRevisions'))
+			for file in FILES
+		):
+			locales.append(language)
+	return locales
+
+def alignLines(a, b):
+	"""Align the sequences a and b with the linear space variant of Myers' diff algorithm.
+	Returns a list of opcodes (tag, i1, i2, j1, j2) as difflib.SequenceMatcher.get_opcodes does.
+	The computation time is O((N+M)D) where D is the number of inserted or deleted lines, i.e. nearly linear when
+	the two files have almost the same structure.
+	"""
+	matches = []  # List of (i, j, length) matching blocks
+	stack = [(0, len(a), 0, len(b))]
+	while stack:
+		aLo, aHi, bLo, bHi = stack.pop()
+		start = aLo
+		while aLo < aHi and bLo < bHi and a[aLo] == b[bLo]:
+			aLo += 1
+			bLo += 1
+		if aLo > start:
+			matches.append((start, bLo - (aLo - start), aLo - start))
+		end = aHi
+		while aLo < aHi and bLo < bHi and a[aHi - 1] == b[bHi - 1]:
+			aHi -= 1
+			bHi -= 1
+		if aHi < end:
+			matches.append((aHi, bHi, end - aHi))
+		if aLo == aHi or bLo == bHi:
+			continue
+		split = _middleSnake(a, aLo, aHi, b, bLo, bHi)
+		if split is not None:
+			x, y = split
+			stack.append((x, aHi, y, bHi))
+			stack.append((aLo, x, bLo, y))
+	matches.sort()
+	opcodes = []
+	i = j = 0
+	for mi, mj, size in matches + [(len(a), len(b), 0)]:
+		if i < mi and j < mj:
+			opcodes.append(('replace', i, mi, j, mj))
+		elif i < mi:
+			opcodes.append(('delete', i, mi, j, mj))
+		elif j < mj:
+			opcodes.append(('insert', i, mi, j, mj))
+		if size:
+			opcodes.append(('equal', mi, mi + size, mj, mj + size))
+		i = mi + size
+		j = mj + size
+	return opcodes
+
+def _middleSnake(a, aLo, aHi, b, bLo, bHi):
+	"""Return the (x, y) point where a forward and a backward furthest reaching D-path overlap, or None if a and b
+	have nothing in common.
+	"""
+	n = aHi - aLo
+	m = bHi - bLo
+	maxD = (n + m + 1) // 2
+	offset = maxD
+	vLength = 2 * maxD + 2
+	vForward = [-1] * vLength
+	vForward[offset + 1] = 0
+	vBackward = [-1] * vLength
+	vBackward[offset + 1] = 0
+	delta = n - m
+	front = delta % 2 != 0
+	k1Start = k1End = k2Start = k2End = 0
+	for d in range(maxD):
+		for k1 in range(-d + k1Start, d + 1 - k1End, 2):
+			k1Offset = offset + k1
+			if k1 == -d or (k1 != d and vForward[k1Offset - 1] < vForward[k1Offset + 1]):
+				x1 = vForward[k1Offset + 1]
+			else:
+				x1 = vForward[k1Offset - 1] + 1
+			y1 = x1 - k1
+			while x1 < n and y1 < m and a[aLo + x1] == b[bLo + y1]:
+				x1 += 1
+				y1 += 1
+			vForward[k1Offset] = x1
+			if x1 > n:
+				k1End += 2
+			elif y1 > m:
+				k1Start += 2
+			elif front:
+				k2Offset = offset + delta - k1
+				if 0 <= k2Offset < vLength and vBackward[k2Offset] != -1:
+					if x1 >= n - vBackward[k2Offset]:
+						return aLo + x1, bLo + y1
+		for k2 in range(-d + k2Start, d + 1 - k2End, 2):
+			k2Offset = offset + k2
+			if k2 == -d or (k2 != d and vBackward[k2Offset - 1] < vBackward[k2Offset + 1]):
+				x2 = vBackward[k2Offset + 1]
+			else:
+				x2 = vBackward[k2Offset - 1] + 1
+			y2 = x2 - k2
+			while x2 < n and y2 < m and a[aHi - x2 - 1] == b[bHi - y2 - 1]:
+				x2 += 1
+				y2 += 1
+			vBackward[k2Offset] = x2
+			if x2 > n:
+				k2End += 2
+			elif y2 > m:
+				k2Start += 2
+			elif not front:
+				k1Offset = offset + delta - k2
+				if 0 <= k1Offset < vLength and vForward[k1Offset] != -1:
+					x1 = vForward[k1Offset]
+					y1 = offset + x1 - k1Offset
+					if x1 >= n - x2:
+						return aLo + x1, bLo + y1
+	return None
+
+def structDiff(enFile, localeFile, docFormat, cache=None):
+	"""Compare the English and locale files and yield the errors found.
+	The lines of both files are first aligned on their structural signature, so that an inserted or missing line
+	is reported alone instead of shifting all the following lines. Then the aligned lines are compared.
+	Each file is read once; its lines are also used by DocFormat.checkDocument.
+	If cache (a StructureCache) is provided, line structures are taken from it when possible.
+	Errors are (English line number, locale line number, error message, English line, locale line) tuples; for a
+	missing or extra line, the line number and the line of the other file are None.
+	The errors concerning the whole documents (see DocFormat.checkDocument) are yielded last.
+	"""
+	if cache is not None:
+		enLines, enStructures = cache.readFile(enFile, os.path.basename(os.path.dirname(enFile)))
+		locLines, locStructures = cache.readFile(localeFile)
+	else:
+		enLines = list(iterFileLines(enFile))
+		locLines = list(iterFileLines(localeFile))
+		enStructures = [docFormat.parseLine(l) for l in enLines]
+		locStructures = [docFormat.parseLine(l) for l in locLines]
+	opcodes = alignLines([lineSignature(s) for s in enStructures], [lineSignature(s) for s in locStructures])
+	yield from _iterAlignedErrors(
+		opcodes,
+		iter(enLines),
+		iter(locLines),
+		enStructures,
+		locStructures,
+		docFormat.lineErrors,
+	)
+	yield from docFormat.checkDocument(enLines, locLines)
+
+def _iterAlignedErrors(opcodes, enLines, locLines, enStructures, locStructures, lineErrors):
+	"""Yield the errors of the lines aligned by opcodes; enLines and locLines are iterators over the lines."""
+	for tag, i1, i2, j1, j2 in opcodes:
+		# Equal or replaced blocks: compare the lines two by two.
+		nPaired = min(i2 - i1, j2 - j1)
+		for i, j in zip(range(i1, i1 + nPaired), range(j1, j1 + nPaired)):
+			enLine = next(enLines)
+			locLine = next(locLines)
+			# Identical lines have the same structure and content.
+			if enLine == locLine:
+				continue
+			for err in lineErrors(enLine, locLine, enStructures[i], locStructures[j]):
+				yield (i + 1, j + 1, err, enLine, locLine)
+		# Remaining lines of replaced blocks, deleted and inserted blocks.
+		for i in range(i1 + nPaired, i2):
+			yield (i + 1, None, 'Missing line in locale', next(enLines), None)
+		for j in range(j1 + nPaired, j2):
+			yield (None, j + 1, 'Extra line in locale', None, next(locLines))
+
+class LocaleChecker:
+	"""Check successive versions of a locale file against an English file kept parsed in memory.
+	The structures of the locale lines and the errors of the aligned line pairs are remembered from one check to
+	the next, so that only the lines edited since the previous check are parsed and compared again; the lines
+	shifted by an insertion or a deletion are found in memory since they are looked up by their content.
+	"""
+
+	def __init__(self, enFile, docFormat):
+		self.docFormat = docFormat
+		self.enLines = list(iterFileLines(enFile))
+		self.enStructures = [docFormat.parseLine(l) for l in self.enLines]
+		self.enSignatures = [lineSignature(s) for s in self.enStructures]
+		# Locale line -> structure
+		self._structures = {}
+		# (English line, locale line) -> list of error messages
+		self._lineErrors = {}
+
+	def check(self, locLines):
+		"""Return the list of the errors found in locLines, the lines of the locale file, as structDiff does."""
+		structures = {}
+		for line in locLines:
+			if line not in structures:
+				structure = self._structures.get(line)
+				structures[line] = structure if structure is not None else self.docFormat.parseLine(line)
+		self._structures = structures
+		locStructures = [structures[line] for line in locLines]
+		opcodes = alignLines(self.enSignatures, [lineSignature(s) for s in locStructures])
+		previousLineErrors = self._lineErrors
+		lineErrors = self._lineErrors = {}
+
+		def getLineErrors(l1, l2, s1, s2):
+			key = (l1, l2)
+			errors = lineErrors.get(key)
+			if errors is None:
+				errors = previousLineErrors.get(key)
+				if errors is None:
+					errors = self.docFormat.lineErrors(l1, l2, s1, s2)
+				lineErrors[key] = errors
+			return errors
+
+		errors = list(_iterAlignedErrors(
+			opcodes,
+			iter(self.enLines),
+			iter(locLines),
+			self.enStructures,
+			locStructures,
+			getLineErrors,
+		))
+		errors.extend(self.docFormat.checkDocument(self.enLines, locLines))
+		return errors
+
+def watch(enFile, localeFile, docFormat, interval=WATCH_INTERVAL, out=sys.stdout):
+	"""Check localeFile each time it is saved, until interrupted with control+C.
+	The modification time and size of the file are polled every interval seconds.
+	"""
+	checker = LocaleChecker(enFile, docFormat)
+	print(f'Watching {localeFile} (English file: {enFile}); press control+C to stop.', file=out)
+	lastKey = None
+	try:
+		while True:
+			try:
+				st = os.stat(localeFile)
+			except OSError:
+				# The file is being replaced; it will be read again at the next poll.
+				st = None
+			if st is not None and (st.st_mtime_ns, st.st_size) != lastKey:
+				lastKey = (st.st_mtime_ns, st.st_size)
+				try:
+					locLines = list(iterFileLines(localeFile))
+				except (OSError, ValueError) as e:
+					print(f'Cannot read {localeFile}: {e}', file=out)
+				else:
+					t0 = time.perf_counter()
+					errors = checker.check(locLines)
+					t = time.perf_counter() - t0
+					print(f'--- {time.strftime("%H:%M:%S")}: {len(errors)} error(s), checked in {t * 1000:.0f} ms ---', file=out)
+					printErrors(errors, out)
+				out.flush()
+			time.sleep(interval)
+	except KeyboardInterrupt:
+		pass
+
+def checkFile(language, file, formatName, checkoutFolder=CHECKOUT_FOLDER_NAME, useCache=True):
+	"""Check one file of one language.
+	Returns a dictionary with the language, the file, the format, the list of the errors and the failure message
+	if the check could not be done.
+	This function is run in the worker processes when checking all the locales.
+	"""
+	docFormat = FORMATS[formatName]
+	result = {'language': language, 'file': file, 'format': formatName, 'errors': [], 'failure': None}
+	try:
+		enFile, localeFile = getFilePaths(language, file, docFormat, checkoutFolder)
+		cache = getCache(language, file, docFormat) if useCache else None
+		result['errors'] = list(structDiff(enFile, localeFile, docFormat, cache))
+		if cache is not None:
+			cache.save()
+	except (OSError, ValueError) as e:
+		result['failure'] = str(e)
+	return result
+
+def checkAllLocales(formatName, checkoutFolder=CHECKOUT_FOLDER_NAME, files=FILES, jobs=None, useCache=True):
+	"""Check the files of all the locales in a pool of processes (as many as CPUs by default).
+	Returns the list of the results of checkFile, sorted by language and file.
+	"""
+	docFormat = FORMATS[formatName]
+	tasks = [
+		(language, file)
+		for language in findLocales(docFormat, checkoutFolder)
+		for file in files
+		if os.path.isfile(os.path.join(checkoutFolder, language, file + docFormat.extension))
+	]
+	with ProcessPoolExecutor(max_workers=jobs) as executor:
+		results = list(executor.map(
+			checkFile,
+			[language for language, file in tasks],
+			[file for language, file in tasks],
+			[formatName] * len(tasks),
+			[checkoutFolder] * len(tasks),
+			[useCache] * len(tasks),
+			chunksize=4,
+		))
+	return sorted(results, key=lambda r: (r['language'], r['file']))
+
+def printErrors(errors, out=sys.stdout):
+	for enLineNum, locLineNum, err, enLine, locLine in errors:
+		if enLineNum is None:
+			print(f'Locale line {locLineNum}: {err}', file=out)
+		elif locLineNum is None or locLineNum == enLineNum:
+			print(f'Line {enLineNum}: {err}', file=out)
+		else:
+			print(f'Line {enLineNum} (locale line {locLineNum}): {err}', file=out)
+		if enLine is not None:
+			print(f'English = {repr(enLine)}', file=out)
+		if locLine is not None:
+			print(f'Locale = {repr(locLine)}', file=out)
+
+def writeTextReport(results, out, withHeaders=True):
+	for result in results:
+		if result['failure'] is None and not result['errors']:
+			continue
+		if withHeaders:
+			print(f"=== {result['language']} - {result['file']}.{result['format']} ===", file=out)
+		if result['failure'] is not None:
+			print(f"Check failed: {result['failure']}", file=out)
+		printErrors(result['errors'], out)
+
+def writeJsonReport(results, out):
+	report = []
+	for result in results:
+		report.append(dict(
+			result,
+			errors=[
+				{'enLineNumber': e[0], 'localeLineNumber': e[1], 'message': e[2], 'english': e[3], 'locale': e[4]}
+				for e in result['errors']
+			],
+		))
+	json.dump(report, out, ensure_ascii=False, indent='\t')
+	print(file=out)
+
+def writeJUnitReport(results, out):
+	"""Write a JUnit XML report with a test suite per language and a test case per file."""
+	testSuites = ET.Element('testsuites', name='structDiff')
+	suites = {}
+	for result in results:
+		suite = suites.get(result['language'])
+		if suite is None:
+			suite = suites[result['language']] = ET.SubElement(
+				testSuites, 'testsuite', name=result['language'], tests='0', failures='0', errors='0',
+			)
+		suite.set('tests', str(int(suite.get('tests')) + 1))
+		testCase = ET.SubElement(
+			suite, 'testcase', classname=result['language'], name=f"{result['file']}.{result['format']}",
+		)
+		if result['failure'] is not None:
+			suite.set('errors', str(int(suite.get('errors')) + 1))
+			ET.SubElement(testCase, 'error', message=result['failure'])
+		elif result['errors']:
+			suite.set('failures', str(int(suite.get('failures')) + 1))
+			failure = ET.SubElement(testCase, 'failure', message=f"{len(result['errors'])} structure error(s)")
+			lines = []
+			for enLineNum, locLineNum, err, enLine, locLine in result['errors']:
+				lines.append(f'Line {enLineNum} / locale line {locLineNum}: {err}')
+			failure.text = '\n'.join(lines)
+	ET.ElementTree(testSuites).write(out, encoding='unicode', xml_declaration=True)
+	print(file=out)
+
+REPORT_WRITERS = {
+	'text': writeTextReport,
+	'json': writeJsonReport,
+	'junit': writeJUnitReport,
+}
+
+def main(argv=None, defaultFormat='md', defaultFile=FILE):
+	parser = argparse.ArgumentParser(description="Check the structure of NVDA's documentation files.")
+	parser.add_argument('--format', choices=sorted(FORMATS), default=defaultFormat, help=f"format of the files (default: {defaultFormat})")
+	parser.add_argument('--all', action='store_true', help="check all the locales in parallel")
+	parser.add_argument('-w', '--watch', action='store_true', help="check the locale file again each time it is saved")
+	parser.add_argument('-l', '--language', default=LANGUAGE, help=f"language to check (default: {LANGUAGE})")
+	parser.add_argument('-f', '--file', choices=FILES, help=f"file to check (default: {defaultFile}, or both files with --all)")
+	parser.add_argument('-r', '--root', default=CHECKOUT_FOLDER_NAME, help=f"SRT checkout folder (default: {CHECKOUT_FOLDER_NAME})")
+	parser.add_argument('-j', '--jobs', type=int, help="number of processes with --all (default: number of CPUs)")
+	parser.add_argument('--no-cache', dest='useCache', action='store_false', help=f"do not use the line structure cache stored in {CACHE_FOLDER}")
+	parser.add_argument('--report', choices=sorted(REPORT_WRITERS), default='text', help="format of the report (default: text)")
+	parser.add_argument('-o', '--output', help="file where the report is written (default: standard output)")
+	args = parser.parse_args(argv)
+	if args.watch:
+		if args.all:
+			parser.error('--watch cannot be used with --all')
+		docFormat = FORMATS[args.format]
+		enFile, localeFile = getFilePaths(args.language, args.file or defaultFile, docFormat, args.root)
+		watch(enFile, localeFile, docFormat)
+		return
+	if args.all:
+		files = (args.file,) if args.file else FILES
+		results = checkAllLocales(args.format, args.root, files, args.jobs, args.useCache)
+	else:
+		results = [checkFile(args.language, args.file or defaultFile, args.format, args.root, args.useCache)]
+	writeReport = REPORT_WRITERS[args.report]
+	out = open(args.output, 'w', encoding='utf8') if args.output else sys.stdout
+	try:
+		if writeReport is writeTextReport:
+			writeReport(results, out, withHeaders=args.all)
+		else:
+			writeReport(results, out)
+	finally:
+		if args.output:
+			out.close()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,349 @@
+# Compiled symbol dictionaries
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to compile NVDA's symbol dictionary files (symbols-xx.dic) to a binary form, and a loader for them.
+The text files are parsed as NVDA's characterProcessing.SpeechSymbols.load does. The compiled file contains the
+version of its format, the size, modification time and hash of the text file it has been compiled from and the
+symbols, stored so that they can be loaded with a single read and decoded lazily:
+- the identifiers are sorted and concatenated in a single string, with an array of their offsets, so that a symbol
+is found by binary search without building a dictionary;
+- the other fields of each symbol are concatenated in another string, and only decoded when the symbol is used.
+loadSymbols uses the compiled file if the size and modification time of the text file have not changed since it
+has been compiled; otherwise the text file is read and hashed, and only parsed and compiled again if its hash has
+changed.
+
+Usage: python symbolsCache.py [file.dic ...]
+By default, symbols-fr.dic at the root of this repo is compiled.
+"""
+
+import argparse
+from array import array
+from collections import namedtuple
+import hashlib
+import marshal
+import os
+
+# Start of the compiled files.
+MAGIC = b'NVDASYMB'
+# To be incremented when the compiled format or the parsing of the text files changes.
+FORMAT_VERSION = 2
+# Extension added to the path of the text file to get the path of its compiled form.
+COMPILED_EXTENSION = '.cache'
+
+DEFAULT_FILES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'symbols-fr.dic')]
+
+# Values of characterProcessing.SymbolLevel and of the SYMPRES_* constants in NVDA.
+LEVEL_INPUT = {
+	'none': 0,
+	'some': 100,
+	'most': 200,
+	'all': 300,
+	'char': 1000,
+	'unchanged': -1,
+}
+PRESERVE_INPUT = {
+	'never': 0,
+	'always': 1,
+	'norep': 2,
+}
+IDENTIFIER_ESCAPES_INPUT = {
+	'0': '\0',
+	't': '\t',
+	'n': '\n',
+	'r': '\r',
+	'f': '\f',
+	'v': '\v',
+	'#': '#',
+	'\\': '\\',
+}
+
+# Encoding of None in the fields of the compiled records.
+NONE_FIELD = '\0'
+FIELD_SEPARATOR = '\t'
+
+SpeechSymbol = namedtuple('SpeechSymbol', ['identifier', 'replacement', 'level', 'preserve', 'displayName'])
+
+
+def _loadSymbolField(field, inputMap=None):
+	if field == '-':
+		# Default.
+		return None
+	if not inputMap:
+		return field
+	try:
+		return inputMap[field]
+	except KeyError:
+		raise ValueError
+
+
+def parseSymbolLine(line):
+	fields = line.split('\t')
+	level = preserve = displayName = None
+	if fields[-1].startswith('#'):
+		# Whatever the number of fields, a last field beginning with "#" is the display name.
+		displayName = fields.pop()[1:].lstrip()
+	if len(fields) < 2 or not fields[0]:
+		# The identifier and the replacement are mandatory.
+		raise ValueError
+	identifier = fields[0]
+	if identifier.startswith('\\') and len(identifier) >= 2:
+		identifier = IDENTIFIER_ESCAPES_INPUT.get(identifier[1], identifier[1]) + identifier[2:]
+	replacement = _loadSymbolField(fields[1])
+	if len(fields) >= 4:
+		level = _loadSymbolField(fields[2], LEVEL_INPUT)
+		preserve = _loadSymbolField(fields[3], PRESERVE_INPUT)
+	elif len(fields) == 3:
+		level = _loadSymbolField(fields[2], LEVEL_INPUT)
+	return SpeechSymbol(identifier, replacement, level, preserve, displayName)
+
+
+def parseSymbols(text):
+	"""Parse the text of a symbol dictionary file.
+	Returns the dictionary of the complex symbols (identifier -> pattern), the dictionary of the symbols
+	(identifier -> SpeechSymbol), both in the order of the file, and the list of the invalid lines.
+	"""
+	complexSymbols = {}
+	symbols = {}
+	invalidLines = []
+	section = None
+	for line in text.split('\n'):
+		line = line.rstrip('\r')
+		if not line or line.isspace() or line.startswith('#'):
+			continue
+		try:
+			if line == 'complexSymbols:':
+				section = complexSymbols
+			elif line == 'symbols:':
+				section = symbols
+			elif section is complexSymbols:
+				identifier, pattern = line.split('\t')
+				complexSymbols[identifier] = pattern
+			elif section is symbols:
+				symbol = parseSymbolLine(line)
+				symbols[symbol.identifier] = symbol
+			else:
+				raise ValueError
+		except ValueError:
+			invalidLines.append(line)
+	return complexSymbols, symbols, invalidLines
+
+
+def getSourceHash(source):
+	return hashlib.blake2b(source, digest_size=16).digest()
+
+
+def getSourceStamp(path):
+	"""Return the (size, modification time in ns) of the file path, to check its compiled form without reading it."""
+	st = os.stat(path)
+	return (st.st_size, st.st_mtime_ns)
+
+
+def getCompiledPath(path):
+	return path + COMPILED_EXTENSION
+
+
+def _encodeField(value):
+	return NONE_FIELD if value is None else str(value)
+
+
+def _decodeField(field, isInt=False):
+	if field == NONE_FIELD:
+		return None
+	return int(field) if isInt else field
+
+
+class SymbolTable:
+	"""The symbols of a dictionary, decoded lazily from the compiled form."""
+
+	def __init__(self, sourceHash, sourceStamp, complexSymbols, identifiers, identifierOffsets, records, recordOffsets, order):
+		self.sourceHash = sourceHash
+		#: (size, modification time in ns) of the text file when it has been compiled
+		self.sourceStamp = sourceStamp
+		#: Tuple of the (identifier, pattern) of the complex symbols
+		self.complexSymbols = complexSymbols
+		# Sorted identifiers concatenated, and array of their start offsets followed by the end of the string.
+		self._identifiers = identifiers
+		self._identifierOffsets = identifierOffsets
+		# Fields of the symbols other than the identifier, in the order of the identifiers.
+		self._records = records
+		self._recordOffsets = recordOffsets
+		# Indexes of the symbols in the order of the text file.
+		self._order = order
+
+	@classmethod
+	def fromSymbols(cls, sourceHash, sourceStamp, complexSymbols, symbols):
+		"""Create a table from the results of parseSymbols."""
+		identifiers = sorted(symbols)
+		identifierOffsets = array('I', [0])
+		recordOffsets = array('I', [0])
+		records = []
+		pos = recordPos = 0
+		for identifier in identifiers:
+			symbol = symbols[identifier]
+			pos += len(identifier)
+			identifierOffsets.append(pos)
+			record = FIELD_SEPARATOR.join(_encodeField(value) for value in symbol[1:])
+			records.append(record)
+			recordPos += len(record)
+			recordOffsets.append(recordPos)
+		indexes = {identifier: i for i, identifier in enumerate(identifiers)}
+		order = array('I', [indexes[identifier] for identifier in symbols])
+		return cls(
+			sourceHash,
+			sourceStamp,
+			tuple(complexSymbols.items()),
+			''.join(identifiers),
+			identifierOffsets,
+			''.join(records),
+			recordOffsets,
+			order,
+		)
+
+	@classmethod
+	def fromCompiled(cls, data):
+		"""Create a table from the content of a compiled file; return None if it is not a compiled file of the
+		current format.
+		"""
+		if not data.startswith(MAGIC):
+			return None
+		try:
+			version, sourceHash, sourceStamp, complexSymbols, identifiers, identifierOffsets, records, recordOffsets, order = (
+				marshal.loads(memoryview(data)[len(MAGIC):])
+			)
+		except (EOFError, ValueError, TypeError):
+			return None
+		if version != FORMAT_VERSION:
+			return None
+		arrays = []
+		for b in (identifierOffsets, recordOffsets, order):
+			a = array('I')
+			a.frombytes(b)
+			arrays.append(a)
+		return cls(sourceHash, tuple(sourceStamp), complexSymbols, identifiers, arrays[0], records, arrays[1], arrays[2])
+
+	def toCompiled(self):
+		return MAGIC + marshal.dumps((
+			FORMAT_VERSION,
+			self.sourceHash,
+			self.sourceStamp,
+			self.complexSymbols,
+			self._identifiers,
+			self._identifierOffsets.tobytes(),
+			self._records,
+			self._recordOffsets.tobytes(),
+			self._order.tobytes(),
+		))
+
+	def __len__(self):
+		return len(self._order)
+
+	def _getIdentifier(self, index):
+		offsets = self._identifierOffsets
+		return self._identifiers[offsets[index]:offsets[index + 1]]
+
+	def _find(self, identifier):
+		"""Return the index of identifier in the sorted identifiers, or -1."""
+		lo, hi = 0, len(self._order)
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self._getIdentifier(mid) < identifier:
+				lo = mid + 1
+			else:
+				hi = mid
+		if lo < len(self._order) and self._getIdentifier(lo) == identifier:
+			return lo
+		return -1
+
+	def _getSymbol(self, index):
+		offsets = self._recordOffsets
+		replacement, level, preserve, displayName = self._records[offsets[index]:offsets[index + 1]].split(FIELD_SEPARATOR)
+		return SpeechSymbol(
+			self._getIdentifier(index),
+			_decodeField(replacement),
+			_decodeField(level, isInt=True),
+			_decodeField(preserve, isInt=True),
+			_decodeField(displayName),
+		)
+
+	def __contains__(self, identifier):
+		return self._find(identifier) >= 0
+
+	def get(self, identifier, default=None):
+		index = self._find(identifier)
+		if index < 0:
+			return default
+		return self._getSymbol(index)
+
+	def __iter__(self):
+		"""Yield the symbols in the order of the text file."""
+		for index in self._order:
+			yield self._getSymbol(index)
+
+
+def _parseSource(source, sourceHash, sourceStamp):
+	"""Return the SymbolTable and the list of the invalid lines of the content of a symbol dictionary file."""
+	complexSymbols, symbols, invalidLines = parseSymbols(source.decode('utf_8_sig', errors='replace'))
+	return SymbolTable.fromSymbols(sourceHash, sourceStamp, complexSymbols, symbols), invalidLines
+
+
+def compileSymbols(path, compiledPath=None):
+	"""Compile the symbol dictionary file path and return the SymbolTable and the list of the invalid lines."""
+	# The stamp is taken before the read, so that a change during the read is seen by the next load.
+	sourceStamp = getSourceStamp(path)
+	with open(path, 'rb') as f:
+		source = f.read()
+	table, invalidLines = _parseSource(source, getSourceHash(source), sourceStamp)
+	with open(compiledPath or getCompiledPath(path), 'wb') as f:
+		f.write(table.toCompiled())
+	return table, invalidLines
+
+
+def loadSymbols(path, compiledPath=None):
+	"""Return the SymbolTable of the symbol dictionary file path, loaded from its compiled form if it has been
+	compiled from the current text, else parsed from the text and compiled again.
+	The text file is only read if its size or modification time has changed since it has been compiled.
+	"""
+	compiledPath = compiledPath or getCompiledPath(path)
+	sourceStamp = getSourceStamp(path)
+	try:
+		with open(compiledPath, 'rb') as f:
+			table = SymbolTable.fromCompiled(f.read())
+	except OSError:
+		table = None
+	if table is not None and table.sourceStamp == sourceStamp:
+		return table
+	with open(path, 'rb') as f:
+		source = f.read()
+	sourceHash = getSourceHash(source)
+	if table is not None and table.sourceHash == sourceHash:
+		# E.g. the file has been copied or saved again without change: only its stamp is updated.
+		table.sourceStamp = sourceStamp
+	else:
+		table, invalidLines = _parseSource(source, sourceHash, sourceStamp)
+	try:
+		with open(compiledPath, 'wb') as f:
+			f.write(table.toCompiled())
+	except OSError:
+		# E.g. read-only folder: the text file will be parsed again next time.
+		pass
+	return table
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Compile NVDA's symbol dictionary files to a binary form.")
+	parser.add_argument('files', nargs='*', default=DEFAULT_FILES, help="symbol dictionary files (default: symbols-fr.dic of this repo)")
+	args = parser.parse_args()
+	for path in args.files:
+		table, invalidLines = compileSymbols(path)
+		compiledPath = getCompiledPath(path)
+		print(
+			f'{path}: {len(table)} symbols, {len(table.complexSymbols)} complex symbols; '
+			f'{os.path.getsize(path)} bytes -> {compiledPath}: {os.path.getsize(compiledPath)} bytes'
+		)
+		for line in invalidLines:
+			print(f'  Invalid line: {line!r}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,171 @@
+# Translation memory
+# Copyright (C) 2024 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""A script to find the lines of NVDA's documentation files which are probably not translated.
+For each file (changes and userGuide) of a language, the locale lines are aligned with the English ones (see
+structDiff.py) and the following lines are reported:
+- the locale lines identical to the English ones, with the revision since which the English text is unchanged;
+- among them, the lines whose exact English text is translated elsewhere in the locale files, with this
+translation, which can be reused.
+
+The English texts of all the revisions stored in the *-newRevisions folders and the translations found in the
+locale files are indexed by line hash, so that the time is linear in the total number of lines whatever the number
+of revisions.
+
+To be executed, the script needs to be placed at the same level as the folder containing the screenreaderstranslations checkout, called "SRT" (also modifiable in a  constant of structDiff.py).
+"""
+
+import argparse
+import os
+import re
+import sys
+
+import structDiff
+
+# Lines with less words than this are not considered as translatable (e.g. "NVDA+f1", tables of keys).
+MIN_WORDS = 2
+
+# A regexp matching a word, i.e. at least 3 letters.
+RE_WORD = re.compile(r'[^\W\d_]{3,}')
+# A regexp matching the parts of a line which do not need to be translated: code, anchors and link targets.
+RE_UNTRANSLATABLE = re.compile(r'`[^`]*`|\{#[^}]*\}|\]\([^)]*\)|<!--.*?-->')
+
+
+def isTranslatable(line, structure):
+	if structure[0] != 'line':
+		return False
+	return len(RE_WORD.findall(RE_UNTRANSLATABLE.sub(' ', line))) >= MIN_WORDS
+
+def iterRevisions(folder, fileName):
+	"""Yield (revision number, path) of the English revisions of a file, from the oldest to the latest."""
+	for revision in sorted(int(f) for f in os.listdir(folder)):
+		path = os.path.join(folder, str(revision), fileName)
+		if os.path.isfile(path):
+			yield revision, path
+
+
+class TranslationMemory:
+	"""An index of the English lines and of their translations, by line hash."""
+
+	def __init__(self):
+		# English line hash -> first revision where this line appears
+		self.firstRevisions = {}
+		# English line hash -> locale line
+		self.translations = {}
+
+	def addRevision(self, revision, enFile):
+		firstRevisions = self.firstRevisions
+		for line in structDiff.iterFileLines(enFile):
+			h = structDiff.lineHash(line)
+			if revision < firstRevisions.get(h, revision + 1):
+				firstRevisions[h] = revision
+
+	def addTranslation(self, enLine, locLine):
+		self.translations.setdefault(structDiff.lineHash(enLine), locLine)
+
+	def getFirstRevision(self, enLine):
+		return self.firstRevisions.get(structDiff.lineHash(enLine))
+
+	def getTranslation(self, enLine):
+		return self.translations.get(structDiff.lineHash(enLine))
+
+
+def findUntranslatedLines(enFile, localeFile, docFormat, memory):
+	"""Align the English and locale files, add the translated lines to memory and return the list of the
+	(English line number, locale line number, English line) of the translatable lines identical in both files.
+	"""
+	enLines = list(structDiff.iterFileLines(enFile))
+	locLines = list(structDiff.iterFileLines(localeFile))
+	enStructures = [docFormat.parseLine(l) for l in enLines]
+	locStructures = [docFormat.parseLine(l) for l in locLines]
+	opcodes = structDiff.alignLines(
+		[structDiff.lineSignature(s) for s in enStructures],
+		[structDiff.lineSignature(s) for s in locStructures],
+	)
+	untranslated = []
+	for tag, i1, i2, j1, j2 in opcodes:
+		if i2 - i1 == j2 - j1:
+			# Equal blocks and 1:1 replace blocks: each locale line is the translation of its English line.
+			for i, j in zip(range(i1, i2), range(j1, j2)):
+				if not isTranslatable(enLines[i], enStructures[i]):
+					continue
+				if enLines[i] == locLines[j]:
+					untranslated.append((i + 1, j + 1, enLines[i]))
+				else:
+					memory.addTranslation(enLines[i], locLines[j])
+		elif tag == 'replace':
+			# The lines of the block cannot be paired, so nothing is learnt from them; only the English lines found
+			# as is among the locale lines of the block are reported.
+			locLineNums = {}
+			for j in range(j1, j2):
+				locLineNums.setdefault(locLines[j], j + 1)
+			for i in range(i1, i2):
+				locLineNum = locLineNums.get(enLines[i])
+				if locLineNum is not None and isTranslatable(enLines[i], enStructures[i]):
+					untranslated.append((i + 1, locLineNum, enLines[i]))
+	return untranslated
+
+def checkLanguage(language, docFormat, checkoutFolder=structDiff.CHECKOUT_FOLDER_NAME, files=structDiff.FILES):
+	"""Return the list of the results of the files of a language, in the form of structDiff.checkFile's results."""
+	memory = TranslationMemory()
+	results = []
+	for file in files:
+		result = {'language': language, 'file': file, 'format': docFormat.name, 'errors': [], 'failure': None}
+		results.append(result)
+		try:
+			fileName = file + docFormat.extension
+			revisions = list(iterRevisions(
+				os.path.join(checkoutFolder, language, f'{file}-newRevisions'),
+				fileName,
+			))
+			if not revisions:
+				raise FileNotFoundError(f'No revision of {fileName}')
+			for revision, enFile in revisions:
+				memory.addRevision(revision, enFile)
+			result['latestRevision'], enFile = revisions[-1]
+			result['untranslated'] = findUntranslatedLines(
+				enFile,
+				os.path.join(checkoutFolder, language, fileName),
+				docFormat,
+				memory,
+			)
+		except (OSError, ValueError) as e:
+			result['failure'] = str(e)
+	# The translations of all the files are known only now.
+	for result in results:
+		for enLineNum, locLineNum, line in result.pop('untranslated', []):
+			firstRevision = memory.getFirstRevision(line)
+			if firstRevision == result['latestRevision']:
+				err = 'Line identical to English (new in the latest revision)'
+			else:
+				err = f'Line identical to English (English text unchanged since revision {firstRevision})'
+			result['errors'].append((enLineNum, locLineNum, err, line, line))
+			translation = memory.getTranslation(line)
+			if translation is not None:
+				result['errors'].append((enLineNum, locLineNum, 'Translation available', line, translation))
+		result.pop('latestRevision', None)
+	return results
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Find the lines of NVDA's documentation files which are probably not translated.")
+	parser.add_argument('--format', choices=sorted(structDiff.FORMATS), default='md', help="format of the files (default: md)")
+	parser.add_argument('-l', '--language', default=structDiff.LANGUAGE, help=f"language to check (default: {structDiff.LANGUAGE})")
+	parser.add_argument('-f', '--file', choices=structDiff.FILES, help="file to check (default: both files)")
+	parser.add_argument('-r', '--root', default=structDiff.CHECKOUT_FOLDER_NAME, help=f"SRT checkout folder (default: {structDiff.CHECKOUT_FOLDER_NAME})")
+	parser.add_argument('--report', choices=sorted(structDiff.REPORT_WRITERS), default='text', help="format of the report (default: text)")
+	args = parser.parse_args(argv)
+	docFormat = structDiff.FORMATS[args.format]
+	if args.file:
+		files = (args.file,)
+	else:
+		files = [
+			file for file in structDiff.FILES
+			if os.path.isfile(os.path.join(args.root, args.language, file + docFormat.extension))
+		]
+	results = checkLanguage(args.language, docFormat, args.root, files)
+	writeReport = structDiff.REPORT_WRITERS[args.report]
+	writeReport(results, sys.stdout)
+
+if __name__ == '__main__':
+	main()
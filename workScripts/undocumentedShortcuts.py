@@ -4,18 +4,35 @@
 
 """A script to check NVDA's shortcuts between doc and code.
 This script list all the shortcuts defined in NVDA's code which are not listed in NVDA's user guide.
+The gestures are extracted from the syntax tree of the source files and stored with their location in an SQLite
+index (see gestureIndex.py), so that the file, line and script of each undocumented shortcut are printed. The index
+can also be queried to find where a shortcut is defined (--where) or where the shortcuts of a script are documented
+(--script).
+With the --all option, the user guides of all the languages (md or t2t) are checked in parallel against the source
+code, parsed once, and a matrix of the shortcuts missing in each language is printed.
+Only the files modified since the previous run are parsed again, in a pool of processes (see GestureIndex).
+With the --regex option, the former extraction with a regexp is used instead; the source files are then scanned in a
+pool of processes too and the shortcuts found in each file are cached in JSON (see CACHE_FILE) with the modification
+time and size of the file, so that only the modified files are scanned again on the next run.
 """
 
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
 import os
 import re
 
-# locale folder
-pathRoot = os.path.join(
-	os.getenv('homepath'),
-	r"Documents\DevP\GIT\nvda",
-)
-pathSource = os.path.join(pathRoot, 'source')
-pathDoc = os.path.join(pathRoot, 'user_docs', 'en', 'userGuide.t2t')
+import gestureIndex
+
+# NVDA repository folder; can also be set with the NVDA_REPO environment variable or the --root option.
+DEFAULT_ROOT = os.getenv('NVDA_REPO') or os.path.join(os.path.expanduser('~'), 'Documents', 'DevP', 'GIT', 'nvda')
+# Extensions of the user guide, by order of preference.
+DOC_EXTENSIONS = ('.md', '.t2t')
+
+# File where the shortcuts found in each source file by the --regex extraction are cached between two runs.
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.undocumentedShortcutsCache.json')
+# To be incremented when the format of the cache or the extraction of the shortcuts changes.
+CACHE_VERSION = 2
 
 def pythonFilesGenerator(pathRoot):
 	for path, folders, files in os.walk(pathRoot):
@@ -30,28 +47,161 @@ REC_SHORTCUT = re.compile(RE_SHORTCUT, re.I)
 REC_SHORTCUT_IN_CODE = re.compile(RE_SHORTCUT_IN_CODE, re.I)
 
 
-def getSourceShortcuts(path):
-	shortcuts = set()
+def loadCache(cachePath):
+	"""Return the cache, a dictionary: file path -> (modification time, size, shortcuts)."""
+	try:
+		with open(cachePath, encoding='utf8') as f:
+			data = json.load(f)
+		if data['version'] == CACHE_VERSION:
+			return data['files']
+	except (OSError, ValueError, KeyError, TypeError):
+		pass
+	return {}
+
+def saveCache(cachePath, files):
+	tmpPath = cachePath + '.tmp'
+	with open(tmpPath, 'w', encoding='utf8') as f:
+		json.dump({'version': CACHE_VERSION, 'files': files}, f)
+	os.replace(tmpPath, cachePath)
+
+def getSourceShortcuts(path, jobs=None, cachePath=CACHE_FILE):
+	"""Return the set of the shortcuts defined in the source files of path.
+	The files modified since the previous run (or all the files if cachePath is None) are scanned in a pool of jobs
+	processes (as many as CPUs by default).
+	"""
+	cache = loadCache(cachePath) if cachePath else {}
+	files = {}
+	toScan = []
 	for file in pythonFilesGenerator(path):
-		shortcuts.update(getSourceShortcutsInFile(file, inCode=True))
+		st = os.stat(file)
+		entry = cache.get(file)
+		if entry is not None and entry[:2] == [st.st_mtime_ns, st.st_size]:
+			files[file] = entry
+		else:
+			files[file] = [st.st_mtime_ns, st.st_size, None]
+			toScan.append(file)
+	if toScan:
+		with ProcessPoolExecutor(max_workers=jobs) as executor:
+			for file, fileShortcuts in zip(toScan, executor.map(getSourceShortcutsInCodeFile, toScan, chunksize=32)):
+				files[file][2] = sorted(fileShortcuts)
+		if cachePath:
+			# Files which do not exist anymore are not kept in the cache.
+			saveCache(cachePath, files)
+	shortcuts = set()
+	for mtime, size, fileShortcuts in files.values():
+		shortcuts.update(fileShortcuts)
 	return shortcuts
 
+def getSourceShortcutsInCodeFile(path):
+	return getSourceShortcutsInFile(path, inCode=True)
+
 def getSourceShortcutsInFile(path, inCode):
 	shortcuts = set()
 	with open(path, 'r', encoding='utf8') as f:
-		for line in f:
-			line = line.lower().strip()
-			if line.startswith('#'):
-				continue
-			recShortcut = REC_SHORTCUT_IN_CODE if inCode else REC_SHORTCUT
-			shortcuts.update(recShortcut.findall(line))
+		text = f.read().lower()
+	# Cheap prefilter: in code, shortcuts are always introduced by "kb" (e.g. "kb:nvda+f1").
+	if inCode and 'kb' not in text:
+		return []
+	recShortcut = REC_SHORTCUT_IN_CODE if inCode else REC_SHORTCUT
+	for line in text.splitlines():
+		if inCode and 'kb' not in line:
+			continue
+		line = line.strip()
+		if line.startswith('#'):
+			continue
+		shortcuts.update(recShortcut.findall(line))
 	if inCode:
 		shortcuts = [s.split(':', 1)[1] for s in shortcuts]
 	return shortcuts
 
 
-shortcutsInSource = getSourceShortcuts(pathSource)
-shortcutsInDoc = getSourceShortcutsInFile(pathDoc, inCode=False)
+def findUserGuides(userDocsPath):
+	"""Return a dictionary: language -> path of the user guide, md or t2t."""
+	guides = {}
+	for language in sorted(os.listdir(userDocsPath)):
+		for ext in DOC_EXTENSIONS:
+			path = os.path.join(userDocsPath, language, 'userGuide' + ext)
+			if os.path.isfile(path):
+				guides[language] = path
+				break
+	return guides
+
+def getIndex(sourcePath, docPaths, indexPath=gestureIndex.INDEX_FILE):
+	"""Return the gesture index, updated with the source files and the documentation files."""
+	index = gestureIndex.GestureIndex(indexPath)
+	index.updateSource(list(pythonFilesGenerator(sourcePath)))
+	for path in index.failures:
+		print(f'Cannot parse {path}')
+	index.updateDoc(list(docPaths), REC_SHORTCUT)
+	return index
+
+def getCodeShortcuts(index):
+	# Only the shortcuts with modifiers are listed in the user guide in a form which can be found.
+	return {s for s in index.getSourceShortcuts() if REC_SHORTCUT.fullmatch(s)}
+
+def printUndocumentedShortcuts(index, sourcePath, docPath):
+	shortcutsInSource = getCodeShortcuts(index)
+	shortcutsInDoc = index.getDocShortcuts(docPath)
+	print('In source, not in doc:')
+	for shortcut in sorted(shortcutsInSource - shortcutsInDoc):
+		locations = ', '.join(
+			f'{os.path.relpath(path, sourcePath)}:{line} ({script})'
+			for shortcut, layout, path, line, script, className in index.findInSource(shortcut)
+		)
+		print(f'{shortcut}: {locations}')
+
+def printCoverageMatrix(index, guides):
+	"""Print the shortcuts of the code missing in the user guide of at least one language, with an "x" in the column
+	of each language where it is missing.
+	"""
+	shortcutsInSource = getCodeShortcuts(index)
+	languages = sorted(guides)
+	missing = {language: shortcutsInSource - index.getDocShortcuts(guides[language]) for language in languages}
+	rows = sorted(set().union(*missing.values()))
+	width = max([len('shortcut')] + [len(shortcut) for shortcut in rows])
+	print(' '.join(['shortcut'.ljust(width)] + languages))
+	for shortcut in rows:
+		cells = [('x' if shortcut in missing[language] else '.').center(len(language)) for language in languages]
+		print(' '.join([shortcut.ljust(width)] + cells))
+	print()
+	print(f'Missing shortcuts per language ({len(shortcutsInSource)} shortcuts in source):')
+	for language in languages:
+		print(f'{language}: {len(missing[language])} ({os.path.basename(guides[language])})')
+
+def main():
+	parser = argparse.ArgumentParser(description="Check NVDA's shortcuts between doc and code.")
+	parser.add_argument('-r', '--root', default=DEFAULT_ROOT, help=f"NVDA repository folder (default: {DEFAULT_ROOT})")
+	parser.add_argument('-l', '--language', default='en', help="language of the user guide to check (default: en)")
+	parser.add_argument('--all', action='store_true', help="check the user guides of all the languages and print a matrix of the missing shortcuts")
+	parser.add_argument('--regex', action='store_true', help="extract the shortcuts with a regexp instead of the gesture index")
+	parser.add_argument('--where', metavar='SHORTCUT', help="print where a shortcut is defined in the code and documented")
+	parser.add_argument('--script', help="print the shortcuts of a script and where they are documented")
+	args = parser.parse_args()
+	pathSource = os.path.join(args.root, 'source')
+	guides = findUserGuides(os.path.join(args.root, 'user_docs'))
+	if args.language not in guides:
+		parser.error(f'No user guide found for language {args.language}')
+	pathDoc = guides[args.language]
+	if args.regex:
+		shortcutsInSource = getSourceShortcuts(pathSource)
+		shortcutsInDoc = getSourceShortcutsInFile(pathDoc, inCode=False)
+
+		srcNotDoc = '\n'.join(sorted(shortcutsInSource - shortcutsInDoc))
+		print('In source, not in doc:\n{}'.format(srcNotDoc))
+		return
+	index = getIndex(pathSource, guides.values() if args.all else [pathDoc])
+	try:
+		if args.where or args.script:
+			for shortcut, layout, path, line, script, className in index.findInSource(args.where, args.script):
+				print(f'Code: {path}:{line}: {shortcut} ({className}.{script})')
+			for shortcut, path, line in index.findInDoc(args.where, args.script):
+				print(f'Doc: {path}:{line}: {shortcut}')
+		elif args.all:
+			printCoverageMatrix(index, guides)
+		else:
+			printUndocumentedShortcuts(index, pathSource, pathDoc)
+	finally:
+		index.close()
 
-srcNotDoc = '\n'.join(sorted(shortcutsInSource - shortcutsInDoc))
-print('In source, not in doc:\n{}'.format(srcNotDoc))
+if __name__ == '__main__':
+	main()